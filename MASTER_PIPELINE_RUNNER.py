@@ -3,26 +3,66 @@
 MASTER PIPELINE RUNNER - BP010 Data Pipelines
 =============================================
 Orquestador Maestro (v2 - Optimizado):
-  1. INIT      → DDL + SPs (full reset)
+  1. INIT      → DDL + SPs (full reset; stage se conserva si no cambió)
   2. LOAD      → Referencial + Ingesta + Seeds
   3. DQ        → Validación calidad de datos
   4. TRANSFORM → Facts (hora/día/mes) + Snapshot
   5. ENRICH    → Targets + Evaluación + Derivados + KPIs
   6. DEFAULTS  → Baselines desde tbl_config_kpi
 
-Flujo: init_schemas → load_referencial → ingest → seeds → DQ
+Flujo: init_schemas → load_referencial → ingest → seeds → pivot landing → DQ
        → sp_load_to_reporting → current_values → sync_targets
        → evaluación_universal → derivados_completos
        → poblar_kpi_business → sp_populate_defaults
+
+Ejecución: las fases se declaran como DAG (src/pipeline_dag.py) con sus
+tablas de lectura/escritura; los pasos independientes (p.ej. referencial ∥
+ingesta, DQ ∥ sp_load_to_reporting ∥ snapshot) corren en paralelo sobre un
+pool acotado (PIPELINE_WORKERS + INGEST_WORKERS conexiones).
+PIPELINE_WORKERS=1 → secuencial.
+init_schemas, load_referencial e ingest_real_telemetry se importan en el mismo
+proceso y comparten el engine de src/db.py (un solo pool por corrida).
+
+Instrumentación (src/pipeline_metrics.py): cada paso registra duración, filas
+afectadas por tabla y RAISE NOTICE en reporting.pipeline_run_log (V14) y en
+logs/pipeline_runs/run_<id>.json. Con --explain (o PIPELINE_EXPLAIN=1) se
+capturan además los planes EXPLAIN (ANALYZE, BUFFERS) de cada CALL.
+
+Checkpoint/resume (src/pipeline_checkpoint.py): cada paso OK se registra en
+logs/pipeline_runs/run_state.json con un fingerprint de sus entradas (SQL con
+parámetros, hash de archivos de entrada, delta del watermark, fingerprints de
+sus dependencias). Con --resume se omiten los pasos ya completados y vigentes:
+un fallo en 5.3 se reintenta sin repetir init/referencial/ingesta.
+
+Modos:
+  python MASTER_PIPELINE_RUNNER.py                → FULL (DROP SCHEMA + recálculo
+                                                     de toda la ventana LOOKBACK_DAYS;
+                                                     sin DROP ni recarga de stage si el
+                                                     DDL y los dumps no cambiaron)
+  python MASTER_PIPELINE_RUNNER.py --incremental  → INCREMENTAL: conserva los
+        schemas, pivotea solo las filas nuevas de landing_scada_data
+        (stage.tbl_pivot_watermark, V6.4), detecta por pozo las lecturas
+        posteriores al watermark (reporting.pipeline_watermark, V13) y las
+        re-pivoteadas por debajo de él (stage.tbl_produccion_cambios, V6.4)
+        y pasa solo esas fechas/pozos a
+        DQ, sp_load_to_reporting, sp_calcular_derivados_completos y
+        poblar_kpi_business. No recarga referencial ni dumps: los datos nuevos
+        llegan a stage por el EL/pivot. Cambios de catálogo → corrida FULL.
 """
 
+import argparse
+import importlib
 import os
-import subprocess
 import sys
 from datetime import date, timedelta
-from sqlalchemy import create_engine, text
+from pathlib import Path
+from sqlalchemy import text
 from dotenv import load_dotenv
 
+from src.pipeline_checkpoint import RunState, file_digest
+from src.pipeline_dag import PipelineDAG, PipelineStep, PipelineStepError
+from src.pipeline_metrics import RunRecorder, execute_instrumented
+
 # Cargar variables de entorno (.env)
 load_dotenv()
 
@@ -30,19 +70,6 @@ load_dotenv()
 # CONFIGURACIÓN
 # -----------------------------------------------------------------------------
 
-# Detectar Python del entorno virtual (auditor) o fallback al sistema
-POSSIBLE_PATHS = [
-    os.path.join("auditor", "Scripts", "python.exe"),  # Windows venv
-    os.path.join("auditor", "bin", "python"),          # Linux/Mac venv
-    sys.executable                                     # System python
-]
-
-PYTHON_EXE = sys.executable
-for path in POSSIBLE_PATHS:
-    if os.path.exists(path):
-        PYTHON_EXE = path
-        break
-
 # Configuración de Base de Datos
 DB_USER = os.getenv('DB_USER', 'audit')
 DB_PASS = os.getenv('DEV_DB_PASSWORD', 'audit')
@@ -57,6 +84,33 @@ LOOKBACK_DAYS = int(os.getenv('LOOKBACK_DAYS', '3650'))  # Default: ~10 años
 FECHA_FIN = os.getenv('FECHA_FIN', str(date.today() + timedelta(days=365*5)))
 FECHA_INICIO = os.getenv('FECHA_INICIO', str(date.today() - timedelta(days=LOOKBACK_DAYS)))
 
+# Concurrencia del DAG (env: PIPELINE_WORKERS). La ingesta (2.2) abre además
+# INGEST_WORKERS conexiones propias mientras corre en paralelo con 2.1, así que
+# el pool (src/db.py) se dimensiona PIPELINE_WORKERS + INGEST_WORKERS salvo que
+# DB_POOL_SIZE diga otra cosa, para que ningún paso espere conexión.
+PIPELINE_WORKERS = max(1, int(os.getenv('PIPELINE_WORKERS', '4')))
+INGEST_WORKERS = max(1, int(os.getenv('INGEST_WORKERS', '4')))
+os.environ['INGEST_WORKERS'] = str(INGEST_WORKERS)
+os.environ.setdefault('DB_POOL_SIZE', str(PIPELINE_WORKERS + INGEST_WORKERS))
+
+from src import db  # noqa: E402  (lee DB_POOL_SIZE al importarse)
+
+# Instrumentación (env: PIPELINE_EXPLAIN, PIPELINE_EXPLAIN_MIN_MS, PIPELINE_REPORT_DIR)
+PIPELINE_EXPLAIN = os.getenv('PIPELINE_EXPLAIN', '0') == '1'
+PIPELINE_EXPLAIN_MIN_MS = int(os.getenv('PIPELINE_EXPLAIN_MIN_MS', '100'))
+PIPELINE_REPORT_DIR = Path(os.getenv('PIPELINE_REPORT_DIR', os.path.join('logs', 'pipeline_runs')))
+
+# Checkpoint para --resume (env: PIPELINE_STATE_FILE)
+PIPELINE_STATE_FILE = Path(os.getenv('PIPELINE_STATE_FILE', str(PIPELINE_REPORT_DIR / 'run_state.json')))
+
+# Recorder de la corrida en curso (lo crea run_pipeline)
+RECORDER = None
+
+
+def get_engine():
+    """Engine compartido del proceso (pool + pre-ping, ver src/db.py)."""
+    return db.get_engine(DB_URL)
+
 # -----------------------------------------------------------------------------
 # FUNCIONES AUXILIARES
 # -----------------------------------------------------------------------------
@@ -64,7 +118,7 @@ FECHA_INICIO = os.getenv('FECHA_INICIO', str(date.today() - timedelta(days=LOOKB
 def execute_sql_file(filename, description):
     """Lee y ejecuta un archivo SQL completo."""
     print(f"\n>>> Executing SQL File: {filename} ({description})...")
-    engine = create_engine(DB_URL)
+    engine = get_engine()
 
     # Buscar archivo en src/sql/schema, src/sql/process, o raíz
     search_paths = [
@@ -101,127 +155,429 @@ def execute_sql_file(filename, description):
 
 
 def execute_sql_query(query):
-    """Ejecuta una consulta SQL puntual (CALL procedure)."""
-    engine = create_engine(DB_URL)
+    """
+    Ejecuta una consulta SQL puntual (CALL procedure).
+
+    Dentro de un paso instrumentado adjunta a sus métricas los NOTICE, las
+    filas afectadas por tabla y (modo explain) los planes auto_explain.
+    """
+    engine = get_engine()
+    metrics = RECORDER.current_step() if RECORDER else None
     try:
         with engine.begin() as conn:
-            conn.execute(text(query))
+            execute_instrumented(conn, query, metrics,
+                                 explain=RECORDER is not None and RECORDER.explain,
+                                 explain_min_ms=PIPELINE_EXPLAIN_MIN_MS)
     except Exception as e:
+        if metrics is not None:
+            metrics.error = str(e)
         print(f"[ERROR] Query Failed: {query}")
         print(f"Details: {e}")
         sys.exit(1)
 
+
+
+def run_module(module, entry):
+    """
+    Importa un script del pipeline en este proceso y ejecuta su entry point.
+
+    El import es diferido: el modo incremental nunca paga pandas/openpyxl.
+    Los scripts obtienen su engine de src.db → mismo pool que el runner.
+    """
+    getattr(importlib.import_module(module), entry)()
+
+
+def sql_step(name, title, query, ok, reads, writes, after=()):
+    """Construye un PipelineStep que ejecuta un CALL con sus mensajes de log."""
+    def action():
+        print(f"\n>>> {title}...")
+        execute_sql_query(query)
+        metrics = RECORDER.current_step() if RECORDER else None
+        if metrics is not None and metrics.filas_afectadas is not None:
+            print(f"[OK] {ok} ({metrics.filas_afectadas} filas)")
+        else:
+            print(f"[OK] {ok}")
+    return PipelineStep(name, action, reads=set(reads), writes=set(writes),
+                        description=title, after=set(after),
+                        fingerprint=lambda: " ".join(query.split()))
+
+
+def module_fingerprint(module):
+    """Hash del código del script y de sus archivos de entrada (input_files())."""
+    mod = importlib.import_module(module)
+    return file_digest([mod.__file__] + list(mod.input_files()))
+
+
+def module_step(name, title, module, entry, ok, reads, writes, after=()):
+    """Construye un PipelineStep que ejecuta un script del pipeline in-process."""
+    def action():
+        print(f"\n>>> {title}...")
+        run_module(module, entry)
+        print(f"[OK] {ok}")
+    return PipelineStep(name, action, reads=set(reads), writes=set(writes),
+                        description=title, after=set(after),
+                        fingerprint=lambda: module_fingerprint(module))
+
 # -----------------------------------------------------------------------------
-# EJECUCIÓN PRINCIPAL
+# DAG DEL PIPELINE
 # -----------------------------------------------------------------------------
+# Las dependencias se derivan de los conjuntos reads/writes en el orden de
+# declaración (ver src/pipeline_dag.py). Lecturas sobre "referencial.*" se
+# declaran a nivel de schema: el catálogo solo se escribe en FASE 1-2.
 
-def run_pipeline():
-    print("="*60)
-    print("MASTER PIPELINE ORCHESTRATION (v2)")
-    print(f"Python: {PYTHON_EXE}")
-    print(f"Fechas: {FECHA_INICIO} → {FECHA_FIN}")
-    print(f"DB: {DB_HOST}:{DB_PORT}/{DB_NAME}")
-    print("="*60)
+ALL_SCHEMAS = {"stage.*", "referencial.*", "reporting.*", "universal.*"}
 
-    # =========================================================================
-    # FASE 1: INIT (DDL + SPs) — Full Reset
-    # =========================================================================
-    # Carga 12 SQL files: V4 schemas, V1 universal, V6.* SPs, V7 KPI+clasificación,
-    # V8 evaluación, V9 funciones. Todo con CREATE OR REPLACE / DROP+CREATE.
-    print("\n>>> 1. Initializing Schemas (Full Reset)...")
-    subprocess.run([PYTHON_EXE, "init_schemas.py"], check=True)
-    print("[OK] Init Schemas completed.")
+FACTS = {
+    "reporting.fact_operaciones_horarias",
+    "reporting.fact_operaciones_diarias",
+    "reporting.fact_operaciones_mensuales",
+}
+
+
+def sql_int_array(values):
+    """Literal SQL INT[] (NULL = todos los pozos)."""
+    if values is None:
+        return "NULL::INT[]"
+    return f"ARRAY[{', '.join(str(int(v)) for v in values)}]::INT[]"
 
-    # =========================================================================
-    # FASE 2: LOAD (Referencial + Ingesta + Seeds)
-    # =========================================================================
-    print("\n>>> 2.1 Loading Referencial Master...")
-    subprocess.run([PYTHON_EXE, "load_referencial.py"], check=True)
-    print("[OK] Referencial loaded.")
 
-    print("\n>>> 2.2 Ingesting Telemetry (SQL Dumps + Excel)...")
-    subprocess.run([PYTHON_EXE, "ingest_real_telemetry.py"], check=True)
-    print("[OK] Ingestion completed.")
+def sql_bigint_array(values):
+    """Literal SQL BIGINT[] (None dentro del arreglo = NULL)."""
+    if values is None:
+        return "NULL::BIGINT[]"
+    return "ARRAY[" + ", ".join("NULL" if v is None else str(int(v)) for v in values) + "]::BIGINT[]"
 
-    print("\n>>> 2.3 Seeding Missing Referencial Data...")
-    execute_sql_query("CALL referencial.sp_seed_defaults();")
-    print("[OK] Seeds populated.")
+
+def sql_timestamp_array(values):
+    """Literal SQL TIMESTAMP[] (NULL = MAX actual por pozo)."""
+    if values is None:
+        return "NULL::TIMESTAMP[]"
+    return "ARRAY[" + ", ".join(f"'{v}'" for v in values) + "]::TIMESTAMP[]"
+
+
+def pivotar_landing_incremental():
+    """
+    Pivotea a stage.tbl_pozo_produccion solo las filas nuevas de
+    stage.landing_scada_data (watermark por unit_id, V6.4) antes de detectar
+    el delta. El watermark avanza en la misma transacción que el pivot.
+
+    Returns:
+        Lecturas insertadas/actualizadas.
+    """
+    from src.landing_pivot import pivot_landing_incremental
+    try:
+        with get_engine().begin() as conn:
+            return pivot_landing_incremental(conn)
+    except Exception as e:
+        print("[ERROR] Falló el pivot incremental de landing (V6.4)")
+        print(f"Details: {e}")
+        sys.exit(1)
+
+
+def detectar_delta_incremental():
+    """
+    Consulta reporting.fnc_detectar_delta_incremental() (V13).
+
+    Returns:
+        Lista de filas (well_id, fecha_min, fecha_max, ts_max, num_lecturas,
+        cambio_max).
+    """
+    try:
+        with get_engine().connect() as conn:
+            return conn.execute(text(
+                "SELECT well_id, fecha_min, fecha_max, ts_max, num_lecturas, cambio_max "
+                "FROM reporting.fnc_detectar_delta_incremental()"
+            )).fetchall()
+    except Exception as e:
+        print("[ERROR] No se pudo detectar el delta incremental "
+              "(¿falta una corrida FULL que cree V13?)")
+        print(f"Details: {e}")
+        sys.exit(1)
+
+
+def build_pipeline_dag(fecha_inicio=FECHA_INICIO, fecha_fin=FECHA_FIN,
+                       well_ids=None, incremental=False, watermark_hasta=None,
+                       cambio_hasta=None):
+    """
+    Declara las fases del pipeline.
+
+    Args:
+        fecha_inicio, fecha_fin: Ventana de fechas de los SPs.
+        well_ids: Pozos a recalcular (None = todos).
+        incremental: True → omite INIT/LOAD (conserva schemas y catálogo).
+        watermark_hasta: ts_max por pozo (paralelo a well_ids) para avanzar
+                         el watermark; None → MAX actual de cada pozo.
+        cambio_hasta: cambio_max por pozo (paralelo a well_ids): claves
+                      re-pivoteadas consumidas; None → se borran todas.
+    """
+    dag = PipelineDAG()
+    p_well_ids = sql_int_array(well_ids)
+
+    if not incremental:
+        # =====================================================================
+        # FASE 1: INIT (DDL + SPs) — Full Reset
+        # =====================================================================
+        # Carga los SQL files de init_schemas.SCHEMA_FILES. Todo con
+        # CREATE OR REPLACE / DROP+CREATE. init_pipeline conserva stage si ni
+        # el DDL ni las entradas de la ingesta cambiaron (manifiesto V17).
+        dag.add(module_step(
+            "1_init_schemas", "1. Initializing Schemas (Full Reset)", "init_schemas", "init_pipeline",
+            "Init Schemas completed.",
+            reads=set(), writes=ALL_SCHEMAS,
+        ))
+
+        # =====================================================================
+        # FASE 2: LOAD (Referencial + Ingesta + Seeds)
+        # =====================================================================
+        # Referencial (referencial.*) e ingesta (stage.*) no comparten tablas → paralelo.
+        dag.add(module_step(
+            "2.1_load_referencial", "2.1 Loading Referencial Master", "load_referencial", "main",
+            "Referencial loaded.",
+            reads=set(), writes={"referencial.*"},
+        ))
+        dag.add(module_step(
+            "2.2_ingest_telemetry", "2.2 Ingesting Telemetry (SQL Dumps + Excel)",
+            "ingest_real_telemetry", "main", "Ingestion completed.",
+            reads=set(),
+            writes={"stage.tbl_pozo_maestra", "stage.tbl_pozo_produccion",
+                    "stage.tbl_pozo_reservas", "stage.landing_scada_data"},
+        ))
+        dag.add(sql_step(
+            "2.3_seed_defaults", "2.3 Seeding Missing Referencial Data",
+            "CALL referencial.sp_seed_defaults();", "Seeds populated.",
+            reads={"referencial.*"},
+            writes={"referencial.tbl_limites_pozo", "referencial.tbl_maestra_variables",
+                    "referencial.tbl_ref_paneles_bi"},
+        ))
+        # Pivot EAV landing → producción generado desde tbl_var_scada_map (V6.4)
+        dag.add(sql_step(
+            "2.4_pivot_landing", "2.4 Pivoting Landing SCADA → tbl_pozo_produccion",
+            "CALL stage.sp_pivot_landing_to_produccion();", "Landing pivoted.",
+            reads={"stage.landing_scada_data", "stage.tbl_pozo_maestra", "referencial.*"},
+            writes={"stage.tbl_pozo_produccion", "stage.tbl_produccion_cambios"},
+        ))
 
     # =========================================================================
     # FASE 3: DATA QUALITY
     # =========================================================================
-    print("\n>>> 3. Running Data Quality Validation...")
-    execute_sql_query(f"""
+    dag.add(sql_step(
+        "3_dq_validation", "3. Running Data Quality Validation",
+        f"""
         CALL stage.sp_execute_dq_validation(
-            '{FECHA_INICIO}'::DATE,
-            '{FECHA_FIN}'::DATE,
+            '{fecha_inicio}'::DATE,
+            '{fecha_fin}'::DATE,
             NULL::INT
         );
-    """)
-    print("[OK] DQ Validation completed.")
+        """, "DQ Validation completed.",
+        reads={"stage.tbl_pozo_produccion", "referencial.*"},
+        writes={"stage.tbl_pozo_scada_dq"},
+    ))
 
     # =========================================================================
     # FASE 4: TRANSFORM (Stage → Reporting Facts + Snapshot)
     # =========================================================================
-    print("\n>>> 4.1 Loading Reporting Facts (Hourly, Daily, Monthly)...")
-    execute_sql_query(f"""
+    dag.add(sql_step(
+        "4.1_load_to_reporting", "4.1 Loading Reporting Facts (Hourly, Daily, Monthly)",
+        f"""
         CALL reporting.sp_load_to_reporting(
-            '{FECHA_INICIO}'::DATE,
-            '{FECHA_FIN}'::DATE,
-            TRUE, TRUE, TRUE
+            '{fecha_inicio}'::DATE,
+            '{fecha_fin}'::DATE,
+            TRUE, TRUE, TRUE,
+            p_well_ids => {p_well_ids}
         );
-    """)
-    print("[OK] Facts loaded.")
-
-    print("\n>>> 4.2 Updating Snapshot (dataset_current_values)...")
-    execute_sql_query("CALL reporting.actualizar_current_values_v4();")
-    print("[OK] Snapshot updated.")
+        """, "Facts loaded.",
+        reads={"stage.tbl_pozo_produccion", "stage.tbl_pozo_maestra", "referencial.*"},
+        writes={"reporting.dim_tiempo", "reporting.dim_hora", "reporting.dim_pozo"} | FACTS,
+    ))
+    dag.add(sql_step(
+        "4.2_current_values", "4.2 Updating Snapshot (dataset_current_values)",
+        "CALL reporting.actualizar_current_values_v4();", "Snapshot updated.",
+        reads={"stage.tbl_pozo_produccion", "stage.tbl_pozo_maestra"},
+        writes={"reporting.dataset_current_values"},
+    ))
 
     # =========================================================================
     # FASE 5: ENRICH (Targets + Evaluación + Derivados + KPIs)
     # =========================================================================
-    print("\n>>> 5.1 Syncing Dim Pozo Targets...")
-    execute_sql_query("CALL reporting.sp_sync_dim_pozo_targets();")
-    print("[OK] Targets synced.")
-
-    print("\n>>> 5.2 Applying Universal Evaluation (Semáforos V8)...")
-    execute_sql_query("CALL reporting.aplicar_evaluacion_universal();")
-    print("[OK] Evaluation applied.")
+    dag.add(sql_step(
+        "5.1_sync_targets", "5.1 Syncing Dim Pozo Targets",
+        "CALL reporting.sp_sync_dim_pozo_targets();", "Targets synced.",
+        reads={"stage.tbl_pozo_maestra", "stage.tbl_pozo_reservas", "referencial.*"},
+        writes={"reporting.dim_pozo"},
+    ))
+    dag.add(sql_step(
+        "5.2_evaluacion_universal", "5.2 Applying Universal Evaluation (Semáforos V8)",
+        "CALL reporting.aplicar_evaluacion_universal();", "Evaluation applied.",
+        reads={"reporting.dim_pozo", "stage.tbl_pozo_scada_dq",
+               "stage.tbl_pozo_produccion", "referencial.*"},
+        writes={"reporting.dataset_current_values"},
+    ))
 
     # sp_calcular_derivados_completos ejecuta: derivados_current_values,
     # derivados_horarios, kpis_horarios, promedios_diarios,
     # completar_fact_diarias, reagregar_mensuales, kpis_business
-    print("\n>>> 5.3 Running Derived Calculations (V9)...")
-    execute_sql_query(f"""
+    dag.add(sql_step(
+        "5.3_derivados_completos", "5.3 Running Derived Calculations (V9)",
+        f"""
         CALL reporting.sp_calcular_derivados_completos(
-            '{FECHA_INICIO}'::DATE,
-            '{FECHA_FIN}'::DATE
+            '{fecha_inicio}'::DATE,
+            '{fecha_fin}'::DATE,
+            p_well_ids => {p_well_ids}
         );
-    """)
-    print("[OK] Derived calculations completed.")
-
-    print("\n>>> 5.4 Populating KPI Business (V7 WIDE)...")
-    execute_sql_query(f"""
+        """, "Derived calculations completed.",
+        reads={"stage.tbl_pozo_produccion", "stage.tbl_pozo_reservas",
+               "reporting.dim_pozo", "reporting.dim_tiempo", "referencial.*"},
+        writes={"reporting.dataset_current_values", "reporting.dataset_kpi_business"} | FACTS,
+    ))
+    dag.add(sql_step(
+        "5.4_kpi_business", "5.4 Populating KPI Business (V7 WIDE)",
+        f"""
         CALL reporting.poblar_kpi_business(
-            '{FECHA_INICIO}'::DATE,
-            '{FECHA_FIN}'::DATE
+            '{fecha_inicio}'::DATE,
+            '{fecha_fin}'::DATE,
+            p_well_ids => {p_well_ids}
         );
-    """)
-    print("[OK] KPI Business populated.")
+        """, "KPI Business populated.",
+        reads={"reporting.dataset_current_values", "reporting.dim_pozo",
+               "reporting.dim_tiempo", "stage.tbl_pozo_produccion", "referencial.*"} | FACTS,
+        writes={"reporting.dataset_kpi_business"},
+    ))
 
     # =========================================================================
     # FASE 6: DEFAULTS (Baselines desde tbl_config_kpi)
     # =========================================================================
-    print("\n>>> 6. Populating Baselines & Defaults...")
-    execute_sql_query("CALL reporting.sp_populate_defaults();")
-    print("[OK] Defaults populated.")
+    dag.add(sql_step(
+        "6_populate_defaults", "6. Populating Baselines & Defaults",
+        "CALL reporting.sp_populate_defaults();", "Defaults populated.",
+        reads={"reporting.dataset_current_values", "referencial.*"},
+        writes={"reporting.dataset_current_values", "reporting.dataset_kpi_business"},
+    ))
 
     # =========================================================================
     # FASE 7: CONSISTENCY VALIDATION (RC-001..RC-006)
     # =========================================================================
-    print("\n>>> 7. Running Consistency Rules Validation...")
-    execute_sql_query("CALL stage.sp_execute_consistency_validation();")
-    print("[OK] Consistency validation completed.")
+    dag.add(sql_step(
+        "7_consistency_validation", "7. Running Consistency Rules Validation",
+        "CALL stage.sp_execute_consistency_validation();",
+        "Consistency validation completed.",
+        reads={"reporting.dataset_current_values", "referencial.*"},
+        writes=set(),
+    ))
+
+    # =========================================================================
+    # FASE 8: WATERMARK (solo si todo lo anterior terminó OK)
+    # =========================================================================
+    dag.add(sql_step(
+        "8_watermark", "8. Advancing Incremental Watermark",
+        f"""
+        CALL reporting.sp_avanzar_watermark(
+            {p_well_ids},
+            {sql_timestamp_array(watermark_hasta)},
+            {sql_bigint_array(cambio_hasta)}
+        );
+        """, "Watermark advanced.",
+        reads={"stage.tbl_pozo_produccion"},
+        writes={"reporting.pipeline_watermark", "stage.tbl_produccion_cambios"},
+        after=set(dag.steps),
+    ))
+
+    return dag
+
+# -----------------------------------------------------------------------------
+# EJECUCIÓN PRINCIPAL
+# -----------------------------------------------------------------------------
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="BP010 Master Pipeline Runner")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Conserva los schemas y procesa solo lecturas posteriores al watermark")
+    parser.add_argument("--explain", action="store_true", default=PIPELINE_EXPLAIN,
+                        help="Captura EXPLAIN (ANALYZE, BUFFERS) de las sentencias de cada CALL")
+    parser.add_argument("--resume", action="store_true",
+                        help="Omite los pasos ya completados con las mismas entradas (run_state.json)")
+    return parser.parse_args(argv)
+
+
+def persistir_metricas(recorder):
+    """Escribe el reporte JSON y reporting.pipeline_run_log (sin abortar si falla)."""
+    path = recorder.write_json(PIPELINE_REPORT_DIR)
+    print(f"Reporte de corrida: {path}")
+    try:
+        recorder.write_run_log(get_engine())
+    except Exception as e:
+        print(f"[WARN] No se pudo escribir reporting.pipeline_run_log: {e}")
+
+
+def run_pipeline(incremental=False, explain=PIPELINE_EXPLAIN, resume=False):
+    global RECORDER
+    modo = "INCREMENTAL" if incremental else "FULL"
+    print("="*60)
+    print(f"MASTER PIPELINE ORCHESTRATION (v2) — {modo}")
+    print(f"Python: {sys.executable}")
+    print(f"DB: {DB_HOST}:{DB_PORT}/{DB_NAME}")
+    print(f"Workers: {PIPELINE_WORKERS}")
+    if explain:
+        print(f"EXPLAIN: on (sentencias > {PIPELINE_EXPLAIN_MIN_MS} ms)")
+
+    base_fingerprint = f"{modo}|{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    if incremental:
+        print(f"Pivot landing (incremental): {pivotar_landing_incremental()} lecturas")
+        delta = detectar_delta_incremental()
+        if not delta:
+            print("Sin lecturas nuevas desde el último watermark. Nada que procesar.")
+            print("="*60)
+            return
+        well_ids = [row.well_id for row in delta]
+        fecha_inicio = min(row.fecha_min for row in delta)
+        fecha_fin = max(row.fecha_max for row in delta)
+        print(f"Delta: {sum(row.num_lecturas for row in delta)} lecturas nuevas o "
+              f"re-pivoteadas en {len(well_ids)} pozos")
+        print(f"Fechas: {fecha_inicio} → {fecha_fin}")
+        print("="*60)
+        base_fingerprint += "|" + ",".join(f"{row.well_id}@{row.ts_max}#{row.cambio_max}"
+                                           for row in delta)
+        dag = build_pipeline_dag(fecha_inicio, fecha_fin, well_ids=well_ids,
+                                 incremental=True,
+                                 watermark_hasta=[row.ts_max for row in delta],
+                                 cambio_hasta=[row.cambio_max for row in delta])
+    else:
+        print(f"Fechas: {FECHA_INICIO} → {FECHA_FIN}")
+        print("="*60)
+        dag = build_pipeline_dag()
+
+    print("Plan de ejecución (DAG):")
+    print(dag.describe())
+
+    RECORDER = RunRecorder(mode=modo, explain=explain,
+                           explain_min_ms=PIPELINE_EXPLAIN_MIN_MS)
+
+    # Checkpoint: fingerprint por paso (encadenado con sus dependencias)
+    state = RunState(PIPELINE_STATE_FILE)
+    fingerprints = dag.fingerprints(base=base_fingerprint)
+    skip = set()
+    if resume:
+        skip = state.resumable(dag, fingerprints)
+        for name in skip:
+            RECORDER.mark_skipped(name, dag.steps[name].description)
+        print(f"Resume: {len(skip)} pasos ya completados se omiten"
+              + (f" ({', '.join(s for s in dag.steps if s in skip)})" if skip else ""))
+    else:
+        state.reset()
+
+    if "1_init_schemas" in dag.steps and "1_init_schemas" not in skip:
+        RECORDER.carry_over(get_engine())  # el full reset borra reporting.*
+
+    try:
+        dag.run(max_workers=PIPELINE_WORKERS, recorder=RECORDER, skip=skip,
+                on_success=lambda name: state.mark_done(name, fingerprints[name]))
+    except PipelineStepError as e:
+        print(f"[ERROR] Pipeline abortado en paso {e.step_name}: {e.cause}")
+        print("Reintentar desde el paso fallido: python MASTER_PIPELINE_RUNNER.py --resume"
+              + (" --incremental" if incremental else ""))
+        sys.exit(1)
+    finally:
+        persistir_metricas(RECORDER)
+        db.dispose_engines()
 
     print("\n" + "="*60)
     print(">>> PIPELINE COMPLETED SUCCESSFULLY <<<")
@@ -229,4 +585,5 @@ def run_pipeline():
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    args = parse_args()
+    run_pipeline(incremental=args.incremental, explain=args.explain, resume=args.resume)
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Backfill paralelo de reporting.sp_load_to_reporting
+===================================================
+
+Recarga el histórico stage → reporting (horario, diario, mensual) dividiendo
+el rango en chunks y ejecutando N chunks en paralelo, cada uno en su propia
+conexión y transacción (en vez de una sola transacción de años con un único
+set de locks).
+
+Chunks:
+  --chunk month      → un chunk por mes calendario (default)
+  --chunk partition  → alineados a las particiones anuales de
+                       fact_operaciones_horarias (fact_horarias_yYYYY); los
+                       tramos que caen en la partición DEFAULT se parten por año
+
+Ambos modos están alineados a meses: la capa mensual de cada chunk re-agrega
+meses completos y los deltas horarios (LAG por pozo/día) no cruzan chunks.
+
+Flujo:
+  1. Dimensiones (dim_tiempo, dim_hora, dim_pozo) una sola vez para todo el rango
+  2. Chunks en paralelo con p_actualizar_dimensiones => FALSE
+  3. Progreso en reporting.backfill_progress (V15): al relanzar con el mismo
+     rango/modo se omiten los chunks OK (--restart los recalcula todos)
+
+Uso:
+  python backfill_reporting.py --desde 2016-01-01 --hasta 2026-12-31
+  python backfill_reporting.py --desde 2016-01-01 --hasta 2026-12-31 --chunk partition --workers 8
+"""
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src.db import get_engine
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# === CONFIGURACIÓN ===
+DB_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'audit')}:"
+    f"{os.getenv('DEV_DB_PASSWORD', 'audit')}@"
+    f"{os.getenv('DB_HOST', 'localhost')}:"
+    f"{os.getenv('DB_PORT', '5433')}/"
+    f"{os.getenv('DB_NAME', 'etl_data')}"
+)
+
+BACKFILL_WORKERS = max(1, int(os.getenv("BACKFILL_WORKERS", "4")))
+FACT_PARTICIONADA = "reporting.fact_operaciones_horarias"
+
+
+# ------------------------------------------------------------
+# Planificación de chunks
+# ------------------------------------------------------------
+def _fin_de_mes(d: date) -> date:
+    siguiente = date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+    return siguiente - timedelta(days=1)
+
+
+def chunks_mensuales(desde: date, hasta: date) -> list:
+    """[(inicio, fin)] por mes calendario, recortando el primero y el último al rango."""
+    chunks, cursor = [], desde
+    while cursor <= hasta:
+        fin = min(_fin_de_mes(cursor), hasta)
+        chunks.append((cursor, fin))
+        cursor = fin + timedelta(days=1)
+    return chunks
+
+
+def limites_particiones(conn) -> list:
+    """[(desde, hasta_exclusivo)] de las particiones RANGE (fecha_id YYYYMMDD) de la fact horaria."""
+    rows = conn.execute(text("""
+        SELECT pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:tabla AS regclass)
+    """), {"tabla": FACT_PARTICIONADA}).fetchall()
+    limites = []
+    for (bound,) in rows:
+        m = re.search(r"FROM \('?(\d{8})'?\) TO \('?(\d{8})'?\)", bound or "")
+        if m:  # DEFAULT no tiene límites
+            ini, fin = (date(int(v[:4]), int(v[4:6]), int(v[6:])) for v in m.groups())
+            limites.append((ini, fin))
+    return sorted(limites)
+
+
+def chunks_por_particion(desde: date, hasta: date, limites: list) -> list:
+    """
+    [(inicio, fin)] alineados a las particiones; los huecos (partición
+    DEFAULT) se cortan por año calendario.
+    """
+    chunks, cursor = [], desde
+    while cursor <= hasta:
+        dentro = next(((lo, hi) for lo, hi in limites if lo <= cursor < hi), None)
+        if dentro:
+            fin = min(hasta, dentro[1] - timedelta(days=1))
+        else:
+            proximo = min((lo for lo, _ in limites if lo > cursor), default=None)
+            fin = min(hasta, date(cursor.year, 12, 31))
+            if proximo is not None:
+                fin = min(fin, proximo - timedelta(days=1))
+        chunks.append((cursor, fin))
+        cursor = fin + timedelta(days=1)
+    return chunks
+
+
+def planificar_chunks(engine, desde: date, hasta: date, modo: str) -> list:
+    if modo == "partition":
+        with engine.connect() as conn:
+            return chunks_por_particion(desde, hasta, limites_particiones(conn))
+    return chunks_mensuales(desde, hasta)
+
+
+# ------------------------------------------------------------
+# Progreso (reporting.backfill_progress)
+# ------------------------------------------------------------
+def registrar_chunks(engine, backfill_id: str, chunks: list, restart: bool) -> list:
+    """Registra los chunks y devuelve los pendientes (todo lo que no está OK)."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO reporting.backfill_progress (backfill_id, chunk_inicio, chunk_fin)
+            VALUES (:id, :ini, :fin)
+            ON CONFLICT (backfill_id, chunk_inicio) DO NOTHING
+        """), [{"id": backfill_id, "ini": ini, "fin": fin} for ini, fin in chunks])
+        if restart:
+            conn.execute(text("""
+                UPDATE reporting.backfill_progress
+                SET estado = 'PENDIENTE', error = NULL
+                WHERE backfill_id = :id
+            """), {"id": backfill_id})
+        rows = conn.execute(text("""
+            SELECT chunk_inicio, chunk_fin
+            FROM reporting.backfill_progress
+            WHERE backfill_id = :id AND estado <> 'OK'
+            ORDER BY chunk_inicio
+        """), {"id": backfill_id}).fetchall()
+    return [(r.chunk_inicio, r.chunk_fin) for r in rows]
+
+
+def poblar_dimensiones(engine, desde: date, hasta: date) -> None:
+    """dim_tiempo/dim_hora/dim_pozo una sola vez (sin capas horaria/diaria/mensual)."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CALL reporting.sp_load_to_reporting(:ini, :fin, FALSE, FALSE, FALSE)"
+        ), {"ini": desde, "fin": hasta})
+
+
+def procesar_chunk(engine, backfill_id: str, ini: date, fin: date, well_ids=None) -> tuple:
+    """
+    Ejecuta un chunk en su propia transacción. El estado OK se escribe en la
+    misma transacción que el CALL: un chunk OK nunca queda a medias.
+
+    Returns:
+        (ok, duracion_ms, error)
+    """
+    clave = {"id": backfill_id, "ini": ini}
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE reporting.backfill_progress
+            SET estado = 'EN_CURSO', intentos = intentos + 1,
+                inicio = CURRENT_TIMESTAMP, fin = NULL, error = NULL
+            WHERE backfill_id = :id AND chunk_inicio = :ini
+        """), clave)
+
+    t0 = time.perf_counter()
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CALL reporting.sp_load_to_reporting(
+                    :ini, :fin, TRUE, TRUE, TRUE,
+                    p_well_ids => CAST(:wells AS INT[]),
+                    p_actualizar_dimensiones => FALSE
+                )
+            """), {"ini": ini, "fin": fin, "wells": well_ids})
+            ms = int((time.perf_counter() - t0) * 1000)
+            conn.execute(text("""
+                UPDATE reporting.backfill_progress
+                SET estado = 'OK', fin = CURRENT_TIMESTAMP, duracion_ms = :ms
+                WHERE backfill_id = :id AND chunk_inicio = :ini
+            """), {**clave, "ms": ms})
+        return True, ms, None
+    except Exception as e:
+        ms = int((time.perf_counter() - t0) * 1000)
+        with engine.begin() as conn:
+            conn.execute(text("""
+                UPDATE reporting.backfill_progress
+                SET estado = 'ERROR', fin = CURRENT_TIMESTAMP, duracion_ms = :ms, error = :err
+                WHERE backfill_id = :id AND chunk_inicio = :ini
+            """), {**clave, "ms": ms, "err": str(e)})
+        return False, ms, str(e)
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+def run_backfill(desde: date, hasta: date, modo: str = "month", workers: int = BACKFILL_WORKERS,
+                 well_ids=None, restart: bool = False, engine=None) -> dict:
+    """
+    Backfill de [desde, hasta] en chunks paralelos.
+
+    Returns:
+        Resumen {backfill_id, chunks, omitidos, ok, error}.
+    """
+    engine = engine or get_engine(DB_URL, pool_size=workers + 1)
+    backfill_id = f"{desde}_{hasta}_{modo}"
+    if well_ids:
+        backfill_id += "_w" + "-".join(str(w) for w in sorted(well_ids))
+
+    chunks = planificar_chunks(engine, desde, hasta, modo)
+    pendientes = registrar_chunks(engine, backfill_id, chunks, restart)
+    logger.info(f"📅 Backfill {backfill_id}: {len(chunks)} chunks, "
+                f"{len(chunks) - len(pendientes)} ya OK, {len(pendientes)} pendientes, "
+                f"{workers} workers")
+    resumen = {"backfill_id": backfill_id, "chunks": len(chunks),
+               "omitidos": len(chunks) - len(pendientes), "ok": 0, "error": 0}
+    if not pendientes:
+        return resumen
+
+    poblar_dimensiones(engine, desde, hasta)
+    logger.info("✅ Dimensiones pobladas")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="backfill") as pool:
+        futuros = {
+            pool.submit(procesar_chunk, engine, backfill_id, ini, fin, well_ids): (ini, fin)
+            for ini, fin in pendientes
+        }
+        for futuro in as_completed(futuros):
+            ini, fin = futuros[futuro]
+            ok, ms, err = futuro.result()
+            if ok:
+                resumen["ok"] += 1
+                logger.info(f"✅ Chunk {ini} → {fin} ({ms} ms) "
+                            f"[{resumen['ok'] + resumen['error']}/{len(pendientes)}]")
+            else:
+                resumen["error"] += 1
+                logger.error(f"❌ Chunk {ini} → {fin}: {err}")
+
+    return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill paralelo de sp_load_to_reporting")
+    parser.add_argument("--desde", required=True, type=date.fromisoformat)
+    parser.add_argument("--hasta", required=True, type=date.fromisoformat)
+    parser.add_argument("--chunk", choices=["month", "partition"], default="month")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--wells", default=None, help="Lista de well_id separada por comas")
+    parser.add_argument("--restart", action="store_true",
+                        help="Recalcula también los chunks ya OK")
+    args = parser.parse_args()
+
+    if args.desde > args.hasta:
+        parser.error("--desde debe ser <= --hasta")
+    well_ids = [int(w) for w in args.wells.split(",")] if args.wells else None
+
+    logger.info("====================================================")
+    logger.info(">>> BACKFILL REPORTING (sp_load_to_reporting en chunks)")
+    logger.info("====================================================")
+    resumen = run_backfill(args.desde, args.hasta, args.chunk, max(1, args.workers),
+                           well_ids, args.restart)
+    logger.info(f">>> BACKFILL {'COMPLETO' if resumen['error'] == 0 else 'CON ERRORES'}: {resumen}")
+    if resumen["error"]:
+        logger.info("Relanzar el mismo comando reintenta solo los chunks pendientes/fallidos.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: carga de landing_scada_data — executemany vs. COPY
+=============================================================
+
+Compara las dos rutas de src/elt_process.py para el EL RAW → stage:
+
+  executemany : fetchmany(CHUNK_SIZE) + row._asdict() + insert() executemany
+  copy        : fetchmany(COPY_CHUNK_SIZE) → CSV en memoria → un único
+                COPY FROM STDIN (copy_expert)
+
+Genera una tabla origen sintética con la forma de scada_raw_table (idn,
+unit_id, location_id, var_id, measure, datatime, moddate), la lee con cursor
+de servidor y la carga en la tabla temporal del EL (tmp_el_landing) dentro
+de una transacción que se revierte al terminar.
+Reporta filas, segundos (mediana) y filas/s por ruta.
+
+Uso:
+  python benchmark_landing_copy.py
+  python benchmark_landing_copy.py --rows 2000000 --repeticiones 3
+  python benchmark_landing_copy.py --solo copy --chunk-size 50000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src import elt_process
+from src.db import get_engine
+
+load_dotenv()
+
+DB_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'audit')}:"
+    f"{os.getenv('DEV_DB_PASSWORD', 'audit')}@"
+    f"{os.getenv('DB_HOST', 'localhost')}:"
+    f"{os.getenv('DB_PORT', '5433')}/"
+    f"{os.getenv('DB_NAME', 'etl_data')}"
+)
+
+TABLA_ORIGEN = "bench_scada_raw"
+
+QUERY_ORIGEN = f"""
+    SELECT idn, unit_id, location_id, var_id, measure,
+           moddate, CAST(moddate AS TIME) AS modtime, datatime
+    FROM {TABLA_ORIGEN}
+    WHERE datatime > :piso
+    ORDER BY datatime ASC
+"""
+
+
+def crear_origen(engine, rows: int, units: int) -> None:
+    """Tabla UNLOGGED con la forma de scada_raw_table."""
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLA_ORIGEN}"))
+        conn.execute(text(f"""
+            CREATE UNLOGGED TABLE {TABLA_ORIGEN} AS
+            SELECT g                                            AS idn,
+                   1 + g % :units                               AS unit_id,
+                   1                                            AS location_id,
+                   (ARRAY[727, 12058, 740, 741, 3, 10000])[1 + g % 6] AS var_id,
+                   CASE WHEN g % 6 = 4 THEN 'true'
+                        ELSE round((random() * 1000)::NUMERIC, 3)::TEXT END AS measure,
+                   TIMESTAMP '2025-01-01' + make_interval(secs => g / 6 * 60) AS datatime,
+                   TIMESTAMP '2025-01-01' + make_interval(secs => g / 6 * 60) AS moddate
+            FROM generate_series(0, :rows - 1) g
+        """), {"units": units, "rows": rows})
+        conn.execute(text(f"ANALYZE {TABLA_ORIGEN}"))
+
+
+def medir(engine, loader, chunk_size: int) -> tuple:
+    """Una carga completa en transacción revertida → (filas, segundos)."""
+    with engine.connect() as conn_raw, engine.connect() as conn_stage:
+        trans = conn_stage.begin()
+        destino = elt_process.crear_tabla_temporal(conn_stage)
+        t0 = time.perf_counter()
+        filas = loader(conn_raw, conn_stage, {"piso": datetime(1900, 1, 1)},
+                       chunk_size=chunk_size, query=QUERY_ORIGEN, destino=destino)
+        segundos = time.perf_counter() - t0
+        trans.rollback()
+    return filas, segundos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark executemany vs COPY en landing_scada_data")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Lote de fetchmany (default: CHUNK_SIZE / COPY_CHUNK_SIZE de elt_process)")
+    parser.add_argument("--solo", choices=["executemany", "copy"], default=None)
+    args = parser.parse_args()
+
+    rutas = {
+        "executemany": (elt_process.load_executemany, args.chunk_size or elt_process.CHUNK_SIZE),
+        "copy":        (elt_process.load_copy, args.chunk_size or elt_process.COPY_CHUNK_SIZE),
+    }
+    if args.solo:
+        rutas = {args.solo: rutas[args.solo]}
+
+    engine = get_engine(DB_URL, pool_size=2)
+    print(f"Generando {args.rows} filas origen ({args.units} unidades)...")
+    crear_origen(engine, args.rows, args.units)
+    try:
+        print("-" * 64)
+        print(f"{'ruta':<12} {'lote':>7} {'filas':>10} {'s (med)':>10} {'filas/s':>12}")
+        print("-" * 64)
+        base = None
+        for nombre, (loader, chunk) in rutas.items():
+            tiempos, filas = [], 0
+            for _ in range(args.repeticiones):
+                filas, seg = medir(engine, loader, chunk)
+                tiempos.append(seg)
+            med = statistics.median(tiempos)
+            tasa = filas / med if med else 0
+            base = base or tasa
+            print(f"{nombre:<12} {chunk:>7} {filas:>10} {med:>10.2f} {tasa:>12,.0f}"
+                  + (f"  (x{tasa / base:.1f})" if base and nombre != next(iter(rutas)) else ""))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLA_ORIGEN}"))
+
+
+if __name__ == "__main__":
+    main()
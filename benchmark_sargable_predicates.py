@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark: predicados de fecha no sargables vs. rango semiabierto
+=================================================================
+
+Compara, con EXPLAIN (ANALYZE, BUFFERS), los filtros que usaban los motores
+de reporting/DQ contra el rango semiabierto que los reemplaza:
+
+  legacy_date  : DATE(timestamp_lectura) BETWEEN :d0 AND :d1      (V6.1 / V9)
+  legacy_cast  : timestamp_lectura::DATE BETWEEN :d0 AND :d1      (V6.2 DQ)
+  half_open    : timestamp_lectura >= :t0 AND timestamp_lectura < :t1
+
+para una agregación diaria de todos los pozos y otra filtrada por pozos
+(p_well_ids). Reporta el tipo de scan, tiempo mediano y buffers leídos.
+
+Por defecto genera una tabla TEMP sintética con los mismos índices que
+stage.tbl_pozo_produccion (uq_scada_timestamp_pozo + idx_pozo_produccion_ts);
+--use-stage mide contra la tabla real.
+
+Uso:
+  python benchmark_sargable_predicates.py
+  python benchmark_sargable_predicates.py --wells 50 --days 730 --window-days 7
+  python benchmark_sargable_predicates.py --use-stage --desde 2025-01-01 --window-days 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+from datetime import date, timedelta
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src.db import get_engine
+
+load_dotenv()
+
+DB_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'audit')}:"
+    f"{os.getenv('DEV_DB_PASSWORD', 'audit')}@"
+    f"{os.getenv('DB_HOST', 'localhost')}:"
+    f"{os.getenv('DB_PORT', '5433')}/"
+    f"{os.getenv('DB_NAME', 'etl_data')}"
+)
+
+PREDICADOS = {
+    "legacy_date": "DATE(timestamp_lectura) BETWEEN :d0 AND :d1",
+    "legacy_cast": "timestamp_lectura::DATE BETWEEN :d0 AND :d1",
+    "half_open":   "timestamp_lectura >= :t0 AND timestamp_lectura < :t1",
+}
+
+CONSULTAS = {
+    "diaria_todos": """
+        SELECT well_id, DATE(timestamp_lectura) AS fecha, AVG(pip), COUNT(*)
+        FROM {tabla}
+        WHERE {pred}
+        GROUP BY 1, 2
+    """,
+    "diaria_pozos": """
+        SELECT well_id, DATE(timestamp_lectura) AS fecha, AVG(pip), COUNT(*)
+        FROM {tabla}
+        WHERE {pred} AND well_id = ANY(:wells)
+        GROUP BY 1, 2
+    """,
+}
+
+
+def crear_tabla_sintetica(conn, wells: int, days: int, lecturas_hora: int, desde: date) -> str:
+    """Tabla TEMP con la forma/índices de stage.tbl_pozo_produccion."""
+    conn.execute(text("""
+        CREATE TEMP TABLE bench_produccion (
+            produccion_id BIGSERIAL PRIMARY KEY,
+            well_id INT NOT NULL,
+            timestamp_lectura TIMESTAMP NOT NULL,
+            pip DECIMAL,
+            CONSTRAINT uq_bench_timestamp_pozo UNIQUE (well_id, timestamp_lectura)
+        )
+    """))
+    conn.execute(text(
+        "CREATE INDEX idx_bench_ts ON bench_produccion (timestamp_lectura, well_id)"
+    ))
+    conn.execute(text("""
+        INSERT INTO bench_produccion (well_id, timestamp_lectura, pip)
+        SELECT w, ts, random() * 500
+        FROM generate_series(1, :wells) w,
+             generate_series(CAST(:desde AS TIMESTAMP),
+                             CAST(:desde AS TIMESTAMP) + make_interval(days => :days),
+                             make_interval(secs => 3600.0 / :lph)) ts
+    """), {"wells": wells, "desde": desde, "days": days, "lph": lecturas_hora})
+    conn.execute(text("ANALYZE bench_produccion"))
+    return "bench_produccion"
+
+
+def _scans(plan: dict) -> list:
+    """Nodos de scan del plan (Seq Scan, Index Scan, Bitmap Heap Scan, ...)."""
+    nodos = []
+    if "Scan" in plan.get("Node Type", ""):
+        nodos.append(f"{plan['Node Type']}({plan.get('Index Name') or plan.get('Relation Name', '')})")
+    for hijo in plan.get("Plans", []):
+        nodos.extend(_scans(hijo))
+    return nodos
+
+
+def medir(conn, sql: str, params: dict, repeticiones: int) -> dict:
+    tiempos, plan = [], None
+    for _ in range(repeticiones):
+        raw = conn.execute(text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql), params).scalar()
+        plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+        tiempos.append(plan["Execution Time"])
+    raiz = plan["Plan"]
+    return {
+        "scans": _scans(raiz),
+        "filas": raiz.get("Actual Rows"),
+        "ms_mediana": round(statistics.median(tiempos), 2),
+        "buffers": raiz.get("Shared Hit Blocks", 0) + raiz.get("Shared Read Blocks", 0)
+                   + raiz.get("Local Hit Blocks", 0) + raiz.get("Local Read Blocks", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de predicados de fecha sargables")
+    parser.add_argument("--use-stage", action="store_true",
+                        help="Medir contra stage.tbl_pozo_produccion en vez de datos sintéticos")
+    parser.add_argument("--wells", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--lecturas-hora", type=int, default=4)
+    parser.add_argument("--desde", type=date.fromisoformat, default=date(2025, 1, 1),
+                        help="Inicio de los datos sintéticos / de la ventana medida")
+    parser.add_argument("--window-days", type=int, default=3)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = get_engine(DB_URL)
+    with engine.connect() as conn:
+        if args.use_stage:
+            tabla = "stage.tbl_pozo_produccion"
+            ventana_ini = args.desde
+        else:
+            print(f"Generando {args.wells} pozos × {args.days} días × {args.lecturas_hora} lecturas/h...")
+            tabla = crear_tabla_sintetica(conn, args.wells, args.days, args.lecturas_hora, args.desde)
+            ventana_ini = args.desde + timedelta(days=args.days // 2)
+
+        ventana_fin = ventana_ini + timedelta(days=args.window_days - 1)
+        wells = [r[0] for r in conn.execute(text(
+            f"SELECT DISTINCT well_id FROM {tabla} ORDER BY 1 LIMIT 2"))]
+        params = {
+            "d0": ventana_ini, "d1": ventana_fin,
+            "t0": ventana_ini, "t1": ventana_fin + timedelta(days=1),
+            "wells": wells,
+        }
+        total = conn.execute(text(f"SELECT COUNT(*) FROM {tabla}")).scalar()
+        print(f"Tabla: {tabla} ({total} filas) | ventana {ventana_ini} → {ventana_fin} | pozos filtro {wells}")
+        print("-" * 110)
+        print(f"{'consulta':<14} {'predicado':<12} {'filas':>7} {'ms (med)':>10} {'buffers':>9}  scans")
+        print("-" * 110)
+
+        for nombre_q, plantilla in CONSULTAS.items():
+            base = None
+            for nombre_p, pred in PREDICADOS.items():
+                r = medir(conn, plantilla.format(tabla=tabla, pred=pred), params, args.repeticiones)
+                base = base or r
+                aviso = "" if r["filas"] == base["filas"] else "  ⚠️ filas distintas"
+                print(f"{nombre_q:<14} {nombre_p:<12} {r['filas']:>7} {r['ms_mediana']:>10} "
+                      f"{r['buffers']:>9}  {', '.join(r['scans'])}{aviso}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
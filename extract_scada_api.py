@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Extracción paralela API SCADA → stage.landing_scada_data
+========================================================
+
+Reemplaza la extracción de a una unidad del notebook
+0_2_raw_to_stage_AWS_v0.ipynb (last_data_api_extraction con UNIT_ID /
+LOCATION_ID fijos): toma los pares (unit_id, location_id) de
+stage.tbl_pozo_maestra y los consulta en paralelo.
+
+  - Pool de hilos acotado (SCADA_API_CONCURRENCY, default 8): la latencia por
+    unidad se solapa en vez de sumarse.
+  - Reintentos con backoff exponencial + jitter ante errores de red, 429 y 5xx
+    (SCADA_API_MAX_RETRIES, SCADA_API_BACKOFF_S). Los 4xx no se reintentan.
+  - Un único escritor COPY compartido: los workers encolan el lote de cada
+    unidad (cola acotada → backpressure) y un hilo con una sola conexión lo
+    vuelca con COPY a una tabla temporal. Al final, en la misma transacción,
+    se pasa a landing solo lo posterior al watermark de cada unidad/locación
+    (stage.etl_watermark, fuente 'api') y se avanza el watermark.
+
+location_id: el último conocido por unidad en stage.etl_watermark; si no hay,
+SCADA_API_LOCATION_ID.
+
+Credenciales y URL por entorno (SCADA_API_URL, SCADA_API_USER, SCADA_API_PASS).
+--stub levanta un servidor HTTP local (src/scada_api_stub.py) en lugar de la API.
+
+Uso:
+  python extract_scada_api.py
+  python extract_scada_api.py --concurrency 16 --wells 5,7,9
+  python extract_scada_api.py --stub --stub-latency 0.3 --stub-fail-rate 0.1
+  python extract_scada_api.py --stub --units 300 --no-write
+"""
+
+import argparse
+import csv
+import io
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from src.db import get_engine
+
+logging.basicConfig(level=logging.INFO,
+                    format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# === CONFIGURACIÓN ===
+DB_URL = (
+    f"postgresql://{os.getenv('DB_USER', 'audit')}:"
+    f"{os.getenv('DEV_DB_PASSWORD', 'audit')}@"
+    f"{os.getenv('DB_HOST', 'localhost')}:"
+    f"{os.getenv('DB_PORT', '5433')}/"
+    f"{os.getenv('DB_NAME', 'etl_data')}"
+)
+
+API_URL = os.getenv("SCADA_API_URL", "")
+API_USER = os.getenv("SCADA_API_USER", "")
+API_PASS = os.getenv("SCADA_API_PASS", "")
+API_LOCATION_ID = os.getenv("SCADA_API_LOCATION_ID", os.getenv("LOCATION_ID"))
+API_CONCURRENCY = max(1, int(os.getenv("SCADA_API_CONCURRENCY", "8")))
+API_MAX_RETRIES = max(0, int(os.getenv("SCADA_API_MAX_RETRIES", "3")))
+API_BACKOFF_S = float(os.getenv("SCADA_API_BACKOFF_S", "0.5"))
+API_TIMEOUT_S = float(os.getenv("SCADA_API_TIMEOUT_S", "30"))
+
+FUENTE = "api"
+COLUMNAS = ("unit_id", "location_id", "var_id", "measure", "moddate", "modtime")
+TABLA_TEMPORAL = "tmp_api_landing"
+
+_local = threading.local()
+
+
+class ErrorNoReintentable(Exception):
+    """Respuesta 4xx (distinta de 429): reintentar no cambia el resultado."""
+
+
+# ------------------------------------------------------------
+# Unidades a consultar
+# ------------------------------------------------------------
+def pares_desde_maestra(engine, location_default=API_LOCATION_ID, well_ids=None) -> list:
+    """[(unit_id, location_id)] de tbl_pozo_maestra; location del watermark o el default."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT m.well_id AS unit_id, COALESCE(w.location_id, CAST(:loc AS INT)) AS location_id
+            FROM stage.tbl_pozo_maestra m
+            LEFT JOIN (
+                SELECT DISTINCT ON (unit_id) unit_id, location_id
+                FROM stage.etl_watermark
+                WHERE fuente = :fuente
+                ORDER BY unit_id, ultimo_datatime DESC
+            ) w ON w.unit_id = m.well_id
+            WHERE CAST(:wells AS INT[]) IS NULL OR m.well_id = ANY(CAST(:wells AS INT[]))
+            ORDER BY m.well_id
+        """), {"loc": location_default, "fuente": FUENTE, "wells": well_ids}).fetchall()
+    sin_locacion = [r.unit_id for r in rows if r.location_id is None]
+    if sin_locacion:
+        logger.warning(f"⚠️ {len(sin_locacion)} pozos sin location_id (definir SCADA_API_LOCATION_ID): "
+                       f"{sin_locacion[:10]}")
+    return [(r.unit_id, r.location_id) for r in rows if r.location_id is not None]
+
+
+# ------------------------------------------------------------
+# HTTP con reintentos
+# ------------------------------------------------------------
+def _session() -> requests.Session:
+    """Una sesión (pool keep-alive) por hilo del pool."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({"x-user": API_USER, "x-pass": API_PASS,
+                                "Content-Type": "application/json"})
+        _local.session = session
+    return session
+
+
+def fetch_unidad(base_url: str, unit_id: int, location_id: int,
+                 max_retries: int = API_MAX_RETRIES, backoff_s: float = API_BACKOFF_S) -> tuple:
+    """
+    Lecturas más recientes de una unidad como tuplas en el orden de COLUMNAS.
+
+    Returns:
+        (filas, intentos)
+    """
+    url = f"{base_url.rstrip('/')}/get-latest-data-full/{unit_id}/{location_id}"
+    intento = 0
+    while True:
+        intento += 1
+        try:
+            resp = _session().post(url, timeout=API_TIMEOUT_S)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                resp.raise_for_status()
+            if resp.status_code >= 400:
+                raise ErrorNoReintentable(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            filas = [
+                (r["unit_idn"], r["unit_location_idn"], r["var_idn"],
+                 r["measure"], r["moddate"], r["modtime"])
+                for r in resp.json()
+            ]
+            return filas, intento
+        except ErrorNoReintentable:
+            raise
+        except (requests.RequestException, ValueError) as e:
+            if intento > max_retries:
+                raise
+            espera = backoff_s * 2 ** (intento - 1) + random.uniform(0, backoff_s)
+            logger.debug(f"Unidad {unit_id}/{location_id} intento {intento} falló ({e}); "
+                         f"reintento en {espera:.2f}s")
+            time.sleep(espera)
+
+
+# ------------------------------------------------------------
+# Escritor COPY compartido
+# ------------------------------------------------------------
+class CopyWriter:
+    """
+    Hilo escritor único: consume lotes de una cola acotada y los vuelca con
+    COPY ... FROM STDIN (CSV) a la tabla temporal, sobre una sola conexión
+    y una sola transacción (la del llamador).
+    """
+
+    _FIN = object()
+
+    def __init__(self, conn, tabla=TABLA_TEMPORAL, max_cola=2 * API_CONCURRENCY):
+        self.conn = conn
+        self.tabla = tabla
+        self.filas = 0
+        self.error = None
+        self._cola = queue.Queue(maxsize=max(1, max_cola))
+        self._hilo = threading.Thread(target=self._run, name="copy-writer", daemon=True)
+
+    def start(self) -> "CopyWriter":
+        self.conn.execute(text(f"""
+            CREATE TEMP TABLE {self.tabla} (
+                unit_id INT, location_id INT, var_id INT, measure TEXT,
+                moddate TIMESTAMP, modtime TIME
+            ) ON COMMIT DROP
+        """))
+        self._hilo.start()
+        return self
+
+    def put(self, filas: list) -> None:
+        self._cola.put(filas)
+
+    def close(self) -> int:
+        self._cola.put(self._FIN)
+        self._hilo.join()
+        if self.error is not None:
+            raise self.error
+        return self.filas
+
+    def _run(self) -> None:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        cursor = self.conn.connection.cursor()
+        try:
+            while True:
+                lote = self._cola.get()
+                if lote is self._FIN:
+                    return
+                if self.error is not None or not lote:
+                    continue  # tras un error se sigue drenando para no bloquear a los workers
+                try:
+                    buf.seek(0)
+                    buf.truncate()
+                    writer.writerows(lote)
+                    buf.seek(0)
+                    cursor.copy_expert(
+                        f"COPY {self.tabla} ({', '.join(COLUMNAS)}) FROM STDIN WITH (FORMAT csv)", buf)
+                    self.filas += len(lote)
+                except Exception as e:
+                    self.error = e
+        finally:
+            cursor.close()
+
+
+def merge_landing(conn, tabla=TABLA_TEMPORAL) -> int:
+    """
+    Pasa a landing solo lo posterior al watermark 'api' de cada unidad/locación
+    (la API devuelve el último snapshot: lo ya cargado se descarta) y avanza
+    el watermark en la misma transacción. landing.idn lo asigna la identidad,
+    igual que en el EL RAW (src/elt_process.py, que guarda el idn de RAW en
+    raw_idn): en orden de lectura, para el pivot incremental (V6.4).
+
+    Returns:
+        Filas nuevas insertadas en landing.
+    """
+    nuevas = conn.execute(text(f"""
+        INSERT INTO stage.landing_scada_data ({', '.join(COLUMNAS)})
+        SELECT {', '.join('t.' + c for c in COLUMNAS)}
+        FROM {tabla} t
+        LEFT JOIN stage.etl_watermark w
+               ON w.fuente = :fuente
+              AND w.unit_id = t.unit_id
+              AND w.location_id = COALESCE(t.location_id, 0)
+        WHERE t.moddate > COALESCE(w.ultimo_datatime, '-infinity'::TIMESTAMP)
+        ORDER BY t.moddate, t.unit_id, t.var_id
+    """), {"fuente": FUENTE}).rowcount
+    conn.execute(text(f"""
+        INSERT INTO stage.etl_watermark
+            (fuente, unit_id, location_id, ultimo_datatime, filas_ultima_carga, actualizado_en)
+        SELECT :fuente, unit_id, COALESCE(location_id, 0), MAX(moddate), COUNT(*), CURRENT_TIMESTAMP
+        FROM {tabla}
+        WHERE unit_id IS NOT NULL AND moddate IS NOT NULL
+        GROUP BY unit_id, COALESCE(location_id, 0)
+        ON CONFLICT (fuente, unit_id, location_id) DO UPDATE SET
+            ultimo_datatime    = GREATEST(stage.etl_watermark.ultimo_datatime, EXCLUDED.ultimo_datatime),
+            filas_ultima_carga = EXCLUDED.filas_ultima_carga,
+            actualizado_en     = EXCLUDED.actualizado_en
+    """), {"fuente": FUENTE})
+    return nuevas
+
+
+class _SinEscritura:
+    """Sumidero para --no-write: cuenta filas sin tocar la base."""
+
+    def __init__(self):
+        self.filas = 0
+        self._lock = threading.Lock()
+
+    def put(self, filas: list) -> None:
+        with self._lock:
+            self.filas += len(filas)
+
+
+# ------------------------------------------------------------
+# Driver
+# ------------------------------------------------------------
+def extraer(pares: list, base_url: str, sink, concurrency: int = API_CONCURRENCY,
+            max_retries: int = API_MAX_RETRIES, backoff_s: float = API_BACKOFF_S) -> dict:
+    """Consulta todas las unidades con un pool acotado y encola cada lote en el sink."""
+    resumen = {"unidades": len(pares), "ok": 0, "error": 0, "reintentos": 0, "fallidas": []}
+
+    def tarea(unit_id, location_id):
+        filas, intentos = fetch_unidad(base_url, unit_id, location_id, max_retries, backoff_s)
+        sink.put(filas)
+        return len(filas), intentos
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="api") as pool:
+        futuros = {pool.submit(tarea, u, l): (u, l) for u, l in pares}
+        for futuro in as_completed(futuros):
+            unit_id, location_id = futuros[futuro]
+            try:
+                _, intentos = futuro.result()
+                resumen["ok"] += 1
+                resumen["reintentos"] += intentos - 1
+            except Exception as e:
+                resumen["error"] += 1
+                resumen["fallidas"].append((unit_id, location_id))
+                logger.error(f"❌ Unidad {unit_id}/{location_id}: {e}")
+    return resumen
+
+
+def run_extraccion(pares: list, base_url: str = API_URL, concurrency: int = API_CONCURRENCY,
+                   escribir: bool = True, engine=None) -> dict:
+    """
+    Extracción paralela + carga. Con escribir=True todo (COPY, merge y
+    watermark) va en una sola transacción de stage.
+
+    Returns:
+        Resumen {unidades, ok, error, reintentos, fallidas, filas, nuevas, segundos}.
+    """
+    if not base_url:
+        raise ValueError("SCADA_API_URL no definido (o usar --stub)")
+    t0 = time.perf_counter()
+    if not escribir:
+        sink = _SinEscritura()
+        resumen = extraer(pares, base_url, sink, concurrency)
+        resumen.update(filas=sink.filas, nuevas=0)
+    else:
+        engine = engine or get_engine(DB_URL)
+        with engine.begin() as conn:
+            writer = CopyWriter(conn, max_cola=2 * concurrency).start()
+            try:
+                resumen = extraer(pares, base_url, writer, concurrency)
+            finally:
+                filas = writer.close()
+            resumen.update(filas=filas, nuevas=merge_landing(conn))
+    resumen["segundos"] = round(time.perf_counter() - t0, 2)
+    return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extracción paralela API SCADA → landing_scada_data")
+    parser.add_argument("--concurrency", type=int, default=API_CONCURRENCY)
+    parser.add_argument("--wells", default=None, help="Lista de well_id separada por comas")
+    parser.add_argument("--no-write", action="store_true", help="Solo extrae (no escribe en stage)")
+    parser.add_argument("--stub", action="store_true",
+                        help="Usa el servidor HTTP local src/scada_api_stub.py en vez de la API")
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--stub-fail-rate", type=float, default=0.0)
+    parser.add_argument("--units", type=int, default=None,
+                        help="Pares sintéticos 1..N (location 1) en vez de tbl_pozo_maestra")
+    args = parser.parse_args()
+
+    logger.info("====================================================")
+    logger.info(">>> EXTRACCIÓN PARALELA API SCADA → LANDING")
+    logger.info("====================================================")
+
+    if args.units:
+        pares = [(u, 1) for u in range(1, args.units + 1)]
+    else:
+        wells = [int(w) for w in args.wells.split(",")] if args.wells else None
+        pares = pares_desde_maestra(get_engine(DB_URL), well_ids=wells)
+    logger.info(f"📡 {len(pares)} unidades, concurrencia {args.concurrency}")
+
+    stub = None
+    base_url = API_URL
+    if args.stub:
+        from src.scada_api_stub import ScadaApiStub
+        stub = ScadaApiStub(latency_s=args.stub_latency, fail_rate=args.stub_fail_rate).start()
+        base_url = stub.url
+        logger.info(f"🧪 Stub API local en {base_url}")
+    try:
+        resumen = run_extraccion(pares, base_url, max(1, args.concurrency),
+                                 escribir=not args.no_write)
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    logger.info(f">>> EXTRACCIÓN {'COMPLETA' if resumen['error'] == 0 else 'CON ERRORES'}: "
+                f"{resumen['ok']}/{resumen['unidades']} unidades, {resumen['filas']} filas, "
+                f"{resumen['nuevas']} nuevas, {resumen['reintentos']} reintentos, {resumen['segundos']} s")
+    if resumen["error"]:
+        logger.info(f"Unidades fallidas: {resumen['fallidas']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import os
 import difflib
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
-import importlib.util
+from src.rangos_catalog import catalog
 
 load_dotenv()
 
@@ -19,14 +19,10 @@ DB_URL = (
 )
 engine = create_engine(DB_URL)
 
-# Cargar archivo original del cliente
-spec = importlib.util.spec_from_file_location(
-    "variables_ref",
+# Cargar archivo original del cliente (catálogo compilado, src/rangos_catalog.py)
+variables_petroleras = catalog().variables(
     "inputs_referencial/Rangos_de_validacion_variables_petroleras.py"
 )
-module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(module)
-variables_petroleras = module.VARIABLES_PETROLERAS
 
 print("=" * 80)
 print("FASE 1 — MAPEADOR AUTOMÁTICO POR SIMILITUD")
@@ -111,7 +107,7 @@ with open(nuevo_path, "w", encoding="utf-8") as f:
 
         nombre_tecnico = m["nombre_tecnico"]
         descripcion = data.get("descripcion", "").replace("'", "\\'")
-        tipo_nombre = data.get("tipo", float).__name__
+        tipo_nombre = data.get("tipo", "float")
         unidad = data.get("unidad", "")
         ejemplo = data.get("ejemplo")
         rmin = data.get("Rango_Min")
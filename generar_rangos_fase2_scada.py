@@ -9,7 +9,7 @@ import pandas as pd
 import difflib
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
-import importlib.util
+from src.rangos_catalog import catalog
 
 load_dotenv()
 
@@ -26,11 +26,8 @@ RUTA_ARCHIVO = "inputs_referencial/Rangos_de_validacion_variables_petroleras.py"
 if not os.path.exists(RUTA_ARCHIVO):
     raise FileNotFoundError(f"ERROR: No se encontró el archivo {RUTA_ARCHIVO}")
 
-spec = importlib.util.spec_from_file_location("variables_ref", RUTA_ARCHIVO)
-module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(module)
-
-variables_petroleras = module.VARIABLES_PETROLERAS
+# Catálogo compilado (src/rangos_catalog.py): no se ejecuta el módulo del cliente
+variables_petroleras = catalog().variables(RUTA_ARCHIVO)
 
 if not variables_petroleras:
     raise ValueError("ERROR: VARIABLES_PETROLERAS está vacío. Revisa el archivo original.")
@@ -143,7 +140,7 @@ with open(nuevo_path, "w", encoding="utf-8") as f:
         d = variables_petroleras[var_simple]
 
         descripcion = d.get("descripcion", "").replace("'", "\\'")
-        tipo_nombre = d.get("tipo", float).__name__
+        tipo_nombre = d.get("tipo", "float")
         unidad = d.get("unidad", "")
         ejemplo = d.get("ejemplo")
         rmin = d.get("Rango_Min")
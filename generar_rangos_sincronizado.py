@@ -16,15 +16,11 @@ load_dotenv()
 DB_URL = f"postgresql://{os.getenv('DB_USER', 'audit')}:{os.getenv('DEV_DB_PASSWORD', 'audit')}@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'etl_data')}"
 engine = create_engine(DB_URL)
 
-# Cargar VARIABLES_PETROLERAS del archivo actual
-import importlib.util
-spec = importlib.util.spec_from_file_location(
-    "variables_ref",
+# Cargar VARIABLES_PETROLERAS del archivo actual (catálogo compilado, src/rangos_catalog.py)
+from src.rangos_catalog import catalog
+variables_petroleras = catalog().variables(
     "inputs_referencial/Rangos_de_validacion_variables_petroleras.py"
 )
-module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(module)
-variables_petroleras = module.VARIABLES_PETROLERAS
 
 print("=" * 80)
 print("GENERADOR DE RANGOS DE VALIDACIÓN SINCRONIZADO")
@@ -134,7 +130,7 @@ for var_simple in sorted(variables_petroleras.keys()):
     if nombre_tecnico:  # Solo incluir variables mapeadas
         count_mapeadas += 1
         descripcion = data.get('descripcion', 'N/A').replace("'", "\\'")
-        tipo_nombre = data.get('tipo', float).__name__
+        tipo_nombre = data.get('tipo', 'float')
         coincidencia = mapeo.get('coincidencia', 'desconocida')
         score = mapeo.get('score', 0)
         nuevo_archivo_contenido += f"\n    # Original: {var_simple}\n"
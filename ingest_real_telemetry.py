@@ -5,15 +5,25 @@ Ingesta híbrida:
 - Producción desde SQL
 - Reservas desde Excel
 - Landing SCADA desde SQL
+
+Los archivos se planifican como un DAG (src/pipeline_dag.py): la maestra va
+antes que producción y reservas (FK well_id); los archivos de una misma clase
+y las clases independientes (landing no tiene FK) se cargan en paralelo, cada
+uno en su propia conexión del pool (INGEST_WORKERS).
 """
 
 import os
+import time
 import pandas as pd
 from datetime import datetime
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import logging
 
+from src.db import POOL_SIZE, get_engine
+from src.input_manifest import InputManifest
+from src.pipeline_dag import PipelineDAG, PipelineStep
+from src.sql_dump_stream import copy_sql_dump
+
 # Logging
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
@@ -33,22 +43,62 @@ DB_URL = (
     f"{os.getenv('DB_NAME', 'etl_data')}"
 )
 
-engine = create_engine(DB_URL)
+engine = get_engine(DB_URL)
+manifest = InputManifest(engine, "ingest_real_telemetry")
+
+# Archivos cargados en paralelo (cada uno ocupa una conexión del pool compartido)
+INGEST_WORKERS = max(1, int(os.getenv("INGEST_WORKERS", str(min(4, POOL_SIZE)))))
+
+# Clases de dump: (patrón en el nombre, tabla destino, clases de las que depende)
+CLASES_DUMP = (
+    ("maestra", "stage.tbl_pozo_maestra", ()),
+    ("produccion", "stage.tbl_pozo_produccion", ("maestra",)),   # FK well_id
+    ("landing_scada_data", "stage.landing_scada_data", ()),      # EAV sin FK
+)
+
+
+# ------------------------------------------------------------
+# Archivos de entrada (fingerprint de --resume en el runner)
+# ------------------------------------------------------------
+def input_files() -> list:
+    dumps = []
+    if os.path.isdir(DATA_DIR):
+        dumps = [os.path.join(DATA_DIR, f) for f in sorted(os.listdir(DATA_DIR))
+                 if f.endswith(".sql")]
+    return dumps + [EXCEL_PATH]
 
 
 # ------------------------------------------------------------
-# Ejecutar archivo SQL (maestra, producción, landing)
+# Cargar dump SQL (maestra, producción, landing)
 # ------------------------------------------------------------
-def execute_sql_file(file_path: str) -> None:
-    logger.info(f"📂 Ejecutando SQL: {os.path.basename(file_path)}")
+def execute_sql_file(file_path: str) -> dict:
+    """
+    Carga un dump INSERT ... VALUES en streaming: se tokeniza por bloques y
+    cada tupla pasa a COPY por lotes (src/sql_dump_stream.py), con memoria
+    acotada sin importar el tamaño del dump. Un archivo = una transacción;
+    cualquier error revierte el archivo y se propaga (aborta la ingesta).
+    Un dump ya cargado y sin cambios (manifiesto de entradas, V17) se omite.
+
+    Returns:
+        Estadísticas del archivo (filas por tabla, segundos, filas/s).
+    """
+    nombre = os.path.basename(file_path)
+    if manifest.current([file_path]):
+        logger.info(f"⏭️ Sin cambios, omitido: {nombre}")
+        return {"archivo": nombre, "tablas": {}, "filas": 0, "segundos": 0.0,
+                "filas_s": None, "omitido": True}
+    logger.info(f"📂 Cargando dump SQL: {nombre}")
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            sql = f.read()
         with engine.begin() as conn:
-            conn.execute(text(sql))
-        logger.info(f"✅ OK: {os.path.basename(file_path)}")
+            stats = copy_sql_dump(conn, file_path)
+            manifest.record([file_path], stats["tablas"], conn=conn)
     except Exception as e:
-        logger.error(f"❌ Error ejecutando {file_path}: {e}")
+        logger.error(f"❌ Error cargando {file_path}: {e}")
+        raise
+    tablas = ", ".join(f"{t}={n}" for t, n in stats["tablas"].items()) or "sin filas"
+    logger.info(f"✅ OK: {nombre} — {stats['filas']} filas ({tablas}) en {stats['segundos']} s "
+                f"({stats['filas_s']} filas/s, {stats['mb_s']} MB/s)")
+    return stats
 
 
 # ------------------------------------------------------------
@@ -96,20 +146,81 @@ def transformar_reservas(df_raw: pd.DataFrame) -> pd.DataFrame:
 # ------------------------------------------------------------
 # Insertar reservas desde Excel
 # ------------------------------------------------------------
-def insertar_reservas_desde_excel() -> None:
+def insertar_reservas_desde_excel():
+    """Filas insertadas, o None si el Excel no cambió desde la última carga."""
+    if manifest.current([EXCEL_PATH]):
+        logger.info("⏭️ Excel de reservas sin cambios: omitido.")
+        return None
     logger.info("📘 Ingestando RESERVAS desde Excel...")
     df_raw = pd.read_excel(EXCEL_PATH, sheet_name="Datos Reserva")
     df_reservas = transformar_reservas(df_raw)
 
-    df_reservas.to_sql(
-        name="tbl_pozo_reservas",
-        schema="stage",
-        con=engine,
-        if_exists="append",
-        index=False,
-        method="multi",
-    )
+    with engine.begin() as conn:
+        df_reservas.to_sql(
+            name="tbl_pozo_reservas",
+            schema="stage",
+            con=conn,
+            if_exists="append",
+            index=False,
+            method="multi",
+        )
+        manifest.record([EXCEL_PATH], {"stage.tbl_pozo_reservas": len(df_reservas)}, conn=conn)
     logger.info("✅ Reservas insertadas correctamente desde Excel.")
+    return len(df_reservas)
+
+
+# ------------------------------------------------------------
+# Planificador de ingesta por archivo
+# ------------------------------------------------------------
+def clasificar_dumps(files: list) -> dict:
+    """{clase: [rutas]} de los .sql de DATA_DIR según CLASES_DUMP."""
+    clases = {clase: [] for clase, _, _ in CLASES_DUMP}
+    for f in files:
+        if not f.endswith(".sql"):
+            continue
+        for clase, _, _ in CLASES_DUMP:
+            if clase in f.lower():
+                clases[clase].append(os.path.join(DATA_DIR, f))
+                break
+    return clases
+
+
+def planificar_ingesta(files: list, resumen: list) -> PipelineDAG:
+    """
+    Un paso por archivo. Los archivos de una clase no se ordenan entre sí
+    (COPY concurrente a la misma tabla, cada uno en su transacción); cada
+    archivo espera a todos los de las clases de las que depende. Reservas
+    (Excel) espera a la maestra.
+    """
+    dag = PipelineDAG()
+    clases = clasificar_dumps(files)
+    pasos = {}
+
+    def paso_dump(path):
+        def action():
+            resumen.append(execute_sql_file(path))
+        return action
+
+    for clase, tabla, depende in CLASES_DUMP:
+        previos = {n for d in depende for n in pasos.get(d, ())}
+        pasos[clase] = []
+        for path in clases[clase]:
+            nombre = os.path.basename(path)
+            # Sin writes: dos archivos de la misma tabla no se serializan; el orden lo da after
+            dag.add(PipelineStep(nombre, paso_dump(path), description=f"{clase} → {tabla}",
+                                 after=previos))
+            pasos[clase].append(nombre)
+
+    def paso_reservas():
+        t0 = time.perf_counter()
+        filas = insertar_reservas_desde_excel()
+        resumen.append({"archivo": os.path.basename(EXCEL_PATH), "filas": filas,
+                        "segundos": round(time.perf_counter() - t0, 3), "filas_s": None,
+                        "omitido": filas is None})
+
+    dag.add(PipelineStep("reservas_excel", paso_reservas, description="Excel → stage.tbl_pozo_reservas",
+                         after=set(pasos["maestra"])))
+    return dag
 
 
 # ------------------------------------------------------------
@@ -120,26 +231,25 @@ def main() -> None:
     logger.info(">>> INGESTA HÍBRIDA + LANDING SCADA (SQL)")
     logger.info("====================================================")
 
-    files = os.listdir(DATA_DIR)
+    resumen = []
+    dag = planificar_ingesta(sorted(os.listdir(DATA_DIR)), resumen)
+    logger.info(f"🗺️ Plan de ingesta ({len(dag.steps)} archivos, {INGEST_WORKERS} en paralelo):\n"
+                f"{dag.describe()}")
 
-    # 1. MAESTRA
-    for f in files:
-        if "maestra" in f.lower() and f.endswith(".sql"):
-            execute_sql_file(os.path.join(DATA_DIR, f))
-
-    # 2. PRODUCCIÓN
-    for f in files:
-        if "produccion" in f.lower() and f.endswith(".sql"):
-            execute_sql_file(os.path.join(DATA_DIR, f))
-
-    # 3. RESERVAS (Excel)
-    insertar_reservas_desde_excel()
-
-    # 4. LANDING SCADA
-    for f in files:
-        if "landing_scada_data" in f.lower() and f.endswith(".sql"):
-            execute_sql_file(os.path.join(DATA_DIR, f))
+    t0 = time.perf_counter()
+    dag.run(max_workers=INGEST_WORKERS)
+    pared = time.perf_counter() - t0
 
+    logger.info("⏱️ Tiempos por archivo:")
+    for st in sorted(resumen, key=lambda st: st["segundos"], reverse=True):
+        filas = "-" if st["filas"] is None else st["filas"]
+        tasa = "" if not st["filas_s"] else f" ({st['filas_s']} filas/s)"
+        logger.info(f"   {st['archivo']:<48} {filas:>10} filas {st['segundos']:>9.2f} s{tasa}")
+    filas = sum(st["filas"] or 0 for st in resumen)
+    serie = sum(st["segundos"] for st in resumen)
+    omitidos = sum(1 for st in resumen if st.get("omitido"))
+    logger.info(f"📊 {len(resumen)} archivos ({omitidos} sin cambios), {filas} filas en {pared:.1f} s "
+                f"(suma por archivo {serie:.1f} s)")
     logger.info(">>> INGESTA COMPLETA <<<")
 
 
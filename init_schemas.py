@@ -2,10 +2,13 @@
 import os
 import sys
 from pathlib import Path
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from dotenv import load_dotenv
 import logging
 
+from src.db import get_engine
+from src.input_manifest import InputManifest
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -30,6 +33,7 @@ SCHEMA_FILES = [
     # ─────────────────────────────────────────────────────────────
     "V4__stage_schema_redesign.sql",              # stage.* (landing, maestra, produccion, reservas, dq)
     "V4__referencial_schema_redesign.sql",         # referencial.* (unidades, estados, variables, limites, dq_rules, funciones eval)
+    "V4.1__referencial_vistas_stage.sql",          # referencial.vw_limites_pozo_pivot_v4 (lee stage; se recrea siempre)
     "V2__universal_schema.sql",                    # universal.* (patron, stroke, diagnostico, validacion, ipr, arps, bombeo)
     "V4__reporting_schema_redesign.sql",            # reporting.* (dims, facts PARTICIONADA, datasets) ← PARTICIONAMIENTO APLICADO
 
@@ -45,6 +49,7 @@ SCHEMA_FILES = [
     "V6.1__historical_reporting_engine_v4.sql",     # reporting.sp_load_to_reporting() (horario/diario/mensual)
     "V6.2__dq_engine_v4.sql",                       # stage.sp_execute_dq_validation()
     "V6.3__sync_dim_pozo_targets_v4.sql",           # reporting.sp_sync_dim_pozo_targets()
+    "V6.4__landing_pivot_engine.sql",               # stage.sp_pivot_landing_to_produccion() (pivot desde tbl_var_scada_map)
     "V6__stored_procedures_v4_compatible.sql",       # reporting.actualizar_current_values_v4() (snapshot zero-calc)
 
     # ─────────────────────────────────────────────────────────────
@@ -67,37 +72,113 @@ SCHEMA_FILES = [
     # FAMILIA 7: VISTAS HELPER FRONTEND
     # ─────────────────────────────────────────────────────────────
     "V12__vistas_helper_frontend.sql",              # vw_dashboard_main, vw_kpi_daily/monthly, vw_well_selector/alerts
+
+    # ─────────────────────────────────────────────────────────────
+    # FAMILIA 8: ORQUESTACIÓN — Soporte del MASTER_PIPELINE_RUNNER
+    # ─────────────────────────────────────────────────────────────
+    "V13__pipeline_incremental_watermark.sql",      # pipeline_watermark + delta incremental por pozo
+    "V14__pipeline_run_log.sql",                    # pipeline_run_log + tendencia por paso (instrumentación)
+    "V15__reporting_backfill_progress.sql",         # backfill_progress (chunks de backfill_reporting.py)
+    "V16__stage_etl_watermark.sql",                 # etl_watermark (EL RAW → landing, src/elt_process.py)
+    "V17__control_input_manifest.sql",              # control.tbl_input_manifest (skip cache; sobrevive al reset)
+    "V18__dynacard_native_arrays.sql",              # cartas dinagráficas REAL[] + fnc_card_stats
+    "V19__universal_stroke_features.sql",           # stroke_features (src/dynacard_features.py)
+    "V20__universal_stroke_queue.sql",              # cola CDI SKIP LOCKED sobre universal.stroke
+    "V21__universal_diagnostico_merge.sql",         # claves de merge para diagnóstico / validación
+    "V22__universal_reporting_change_log.sql",      # bridge_cambios + triggers (puente V10 incremental)
 ]
 
-def init_db():
-    engine = create_engine(DB_URL)
-    # Ajusta esta ruta si tus SQLs no están en src/sql/schema
-    base_path = Path(__file__).parent / "src" / "sql" / "schema"
+def resolve_schema_file(filename):
+    """Ruta de un SQL de SCHEMA_FILES (src/sql/schema → src/sql/process → raíz) o None."""
+    base_dir = Path(__file__).parent
+    for file_path in (base_dir / "src" / "sql" / "schema" / filename,
+                      base_dir / "src" / "sql" / "process" / filename,
+                      base_dir / filename):
+        if file_path.exists():
+            return file_path
+    return None
+
+
+def input_files():
+    """Archivos de entrada del paso (para el fingerprint de --resume)."""
+    return [resolve_schema_file(f) or f for f in SCHEMA_FILES]
+
+
+# Schemas que la corrida FULL puede conservar:
+#   schema → (DDL que lo recrea con DROP SCHEMA ... CASCADE, tabla testigo)
+ESQUEMAS_CONSERVABLES = {
+    "stage": ("V4__stage_schema_redesign.sql", "stage.tbl_pozo_maestra"),
+    "referencial": ("V4__referencial_schema_redesign.sql", "referencial.tbl_maestra_variables"),
+}
+
+# Consumidores del manifiesto que cargan cada schema: al eliminarlo se borran
+# sus entradas (si no, solo el primer archivo por tabla destino se recargaría).
+CONSUMIDORES_MANIFIESTO = {
+    "stage": ("ingest_real_telemetry",),
+    "referencial": ("load_referencial",),
+}
+
+
+def esquemas_conservables(engine):
+    """
+    Schemas que la corrida FULL puede conservar sin DROP ni recarga.
+
+    Ningún SCHEMA_FILE debe haber cambiado desde el último init (manifiesto,
+    consumidor init_schemas). Además:
+    - stage: todas las entradas de la ingesta siguen vigentes; si no, se
+      recrea y se recarga completo.
+    - referencial: REFERENCIAL_MODO=merge. Se conserva aunque los CSV hayan
+      cambiado: load_referencial los aplica con merge y los IDs no cambian.
+      Con reload se recrea en cada corrida FULL.
+    """
+    if not InputManifest(engine, "init_schemas").current(input_files()):
+        return set()
+    import ingest_real_telemetry
+    import load_referencial
+    conservar = set()
+    if ingest_real_telemetry.manifest.current(ingest_real_telemetry.input_files()):
+        conservar.add("stage")
+    if load_referencial.REFERENCIAL_MODO == "merge":
+        conservar.add("referencial")
+    return conservar
+
+
+def init_db(engine=None, conservar=()):
+    """
+    Full reset: DROP de los schemas y ejecución de SCHEMA_FILES.
+
+    conservar: schemas de ESQUEMAS_CONSERVABLES que no se eliminan. Se omite
+    su DDL; el resto de los archivos (CREATE OR REPLACE / IF NOT EXISTS) se
+    aplica sobre ellos.
+    """
+    engine = engine or get_engine(DB_URL)
+    conservar = set(conservar)
+    omitidos = {ESQUEMAS_CONSERVABLES[s][0] for s in conservar}
     
     logger.info(">>> INICIANDO CREACIÓN DE ESQUEMAS <<<")
     
     # FORZAR RESET LIMPIO (Atomic)
     with engine.connect() as conn:
         logger.info("Forzando eliminación de esquemas antiguos...")
-        conn.execute(text("DROP SCHEMA IF EXISTS referencial CASCADE;"))
-        conn.execute(text("DROP SCHEMA IF EXISTS stage CASCADE;"))
-        conn.execute(text("DROP SCHEMA IF EXISTS reporting CASCADE;"))
-        conn.execute(text("DROP SCHEMA IF EXISTS universal CASCADE;"))
+        for schema in ("referencial", "stage", "reporting", "universal"):
+            if schema in conservar:
+                logger.info(f"Conservando {schema} (sin DROP, ver esquemas_conservables)")
+                continue
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE;"))
+            for consumidor in CONSUMIDORES_MANIFIESTO.get(schema, ()):
+                borradas = InputManifest(engine, consumidor).forget(conn=conn)
+                if borradas:
+                    logger.info(f"Manifiesto: {borradas} entradas de {consumidor} invalidadas")
         conn.commit()
     
     with engine.begin() as conn:
         for filename in SCHEMA_FILES:
-            file_path = base_path / filename
-            
-            if not file_path.exists():
-                # Fallback 1: buscar en src/sql/process/
-                file_path = Path(__file__).parent / "src" / "sql" / "process" / filename
-            
-            if not file_path.exists():
-                # Fallback 2: buscar en la raíz
-                file_path = Path(__file__).parent / filename
-            
-            if not file_path.exists():
+            if filename in omitidos:
+                logger.info(f"Skip: {filename} (schema conservado)")
+                continue
+            file_path = resolve_schema_file(filename)
+
+            if file_path is None:
                 logger.error(f"❌ ARCHIVO NO ENCONTRADO: {filename}")
                 sys.exit(1)
                 
@@ -112,7 +193,17 @@ def init_db():
                 logger.error(f"❌ Error en {filename}: {e}")
                 sys.exit(1)
 
+        # Versión de DDL aplicada (tablas testigo: solo se exige que existan)
+        InputManifest(engine, "init_schemas").record(
+            input_files(), {tabla: 0 for _, tabla in ESQUEMAS_CONSERVABLES.values()}, conn=conn)
+
     logger.info(">>> BD INICIALIZADA CORRECTAMENTE <<<")
 
+
+def init_pipeline(engine=None):
+    """Init de la corrida FULL del runner: conserva los schemas sin cambios."""
+    engine = engine or get_engine(DB_URL)
+    init_db(engine, conservar=esquemas_conservables(engine))
+
 if __name__ == "__main__":
     init_db()
\ No newline at end of file
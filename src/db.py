@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Shared Database Engine
+======================
+
+Process-wide pooled SQLAlchemy engine for the pipeline scripts.
+
+MASTER_PIPELINE_RUNNER imports init_schemas, load_referencial and
+ingest_real_telemetry in-process; all of them obtain their engine here, so a
+run opens one connection pool instead of one engine (and one handshake) per
+query or per script.
+
+Engines are cached per URL: scripts that resolve to the same database share
+the same pool.
+
+Environment:
+    DB_POOL_SIZE      Persistent connections in the pool (default: PIPELINE_WORKERS or 5)
+    DB_MAX_OVERFLOW   Extra connections allowed above the pool size (default: 0)
+    DB_POOL_PRE_PING  Validate connections on checkout, 1/0 (default: 1)
+    DB_POOL_RECYCLE   Seconds before a connection is recycled, -1 = never (default: 1800)
+
+Usage:
+    from src.db import get_engine
+
+    engine = get_engine(DB_URL)
+    with engine.begin() as conn:
+        conn.execute(text("SELECT 1"))
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, Engine
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = max(1, int(os.getenv("DB_POOL_SIZE", os.getenv("PIPELINE_WORKERS", "5"))))
+MAX_OVERFLOW = max(0, int(os.getenv("DB_MAX_OVERFLOW", "0")))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").strip().lower() not in ("0", "false", "no")
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+_ENGINES: Dict[str, Engine] = {}
+_LOCK = threading.Lock()
+
+
+def get_engine(url: str, pool_size: Optional[int] = None) -> Engine:
+    """
+    Return the shared engine for ``url``, creating it on first use.
+
+    Args:
+        url: SQLAlchemy database URL.
+        pool_size: Override of DB_POOL_SIZE; only applies when the engine is created.
+
+    Returns:
+        Pooled engine shared by every caller in this process.
+    """
+    with _LOCK:
+        engine = _ENGINES.get(url)
+        if engine is None:
+            size = max(1, int(pool_size)) if pool_size else POOL_SIZE
+            engine = create_engine(
+                url,
+                pool_size=size,
+                max_overflow=MAX_OVERFLOW,
+                pool_pre_ping=POOL_PRE_PING,
+                pool_recycle=POOL_RECYCLE,
+            )
+            _ENGINES[url] = engine
+            logger.debug(
+                f"Engine created (pool_size={size}, max_overflow={MAX_OVERFLOW}, "
+                f"pre_ping={POOL_PRE_PING})"
+            )
+        return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection (end of run)."""
+    with _LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+CDI Diagnostic Writer
+=====================
+
+Bulk writer for classifier output: top-K (stroke_id, patron_id, score) rows
+into universal.diagnostico and expert labels into
+universal.validacion_experta, instead of one INSERT per row.
+
+write_diagnoses(), in one transaction:
+
+1. COPY the batch into a temp table.
+2. When a queue is given (src/stroke_queue.py), keep only strokes still
+   EN_PROCESO for that worker and lock them (FOR UPDATE), so a concurrent
+   visibility-timeout release cannot hand them to another worker before the
+   commit. Rows for lost claims are discarded and counted.
+3. Merge on (stroke_id, patron_id) (V21): changed scores are updated, new
+   patterns inserted, patterns no longer in a stroke's top-K deleted.
+4. Flip the batch's strokes to COMPLETADO.
+
+Input is a DataFrame with stroke_id / patron_id / score columns, a mapping of
+those names to arrays, or a (stroke_ids, patron_ids, scores) tuple. top_k()
+turns a classifier probability matrix into that long form. Scores are clipped
+to [0, 1] and rounded to NUMERIC(5,4). A stroke with any non-finite score
+(NaN, inf) is dropped whole before the COPY, so a partial top-K never deletes
+its stored patterns; it is not completed (with a queue the visibility timeout
+returns it for a retry) and its rows are counted in ``descartados``.
+
+Usage:
+    from src.diagnostic_writer import top_k, write_diagnoses
+
+    rows = top_k(stroke_ids, probabilities, patron_ids, k=3)
+    with engine.begin() as conn:
+        stats = write_diagnoses(conn, rows, queue=queue)
+
+    python -m src.diagnostic_writer --max-strokes 100000 --k 3
+"""
+
+import argparse
+import io
+import logging
+import os
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+TOP_K = int(os.getenv("CDI_TOP_K", "3"))
+
+DIAGNOSIS_COLUMNS = ("stroke_id", "patron_id", "score")
+VALIDATION_COLUMNS = ("stroke_id", "patron_id", "experto", "comentario")
+
+
+def _as_columns(data, names: Sequence[str]) -> list:
+    """DataFrame / mapping / tuple of sequences -> list of NumPy columns in ``names`` order."""
+    if hasattr(data, "columns") or isinstance(data, dict):
+        cols = [np.asarray(data[n]) for n in names]
+    else:
+        cols = [np.asarray(c) for c in data]
+        if len(cols) != len(names):
+            raise ValueError(f"expected {len(names)} columns ({', '.join(names)}), got {len(cols)}")
+    if len({len(c) for c in cols}) > 1:
+        raise ValueError(f"columns {', '.join(names)} have different lengths")
+    return cols
+
+
+def top_k(stroke_ids, probabilities, patron_ids, k: int = 3) -> dict:
+    """
+    Long-form top-K rows from a classifier probability matrix.
+
+    Args:
+        stroke_ids: [n] stroke of each matrix row.
+        probabilities: [n, p] scores per pattern.
+        patron_ids: [p] patron_id of each matrix column.
+        k: Patterns kept per stroke.
+    """
+    probs = np.asarray(probabilities, dtype=np.float64)
+    k = min(k, probs.shape[1])
+    idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    return {
+        "stroke_id": np.repeat(np.asarray(stroke_ids), k),
+        "patron_id": np.asarray(patron_ids)[idx].ravel(),
+        "score": np.take_along_axis(probs, idx, axis=1).ravel(),
+    }
+
+
+def _copy(conn, table: str, columns: Sequence[str], payload: str) -> None:
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+                           io.StringIO(payload), size=1 << 16)
+    finally:
+        cursor.close()
+
+
+def write_diagnoses(conn, data, queue=None) -> dict:
+    """
+    Merge a batch of diagnoses and complete their strokes on conn's transaction.
+
+    Args:
+        conn: Open connection (the caller owns the transaction).
+        data: stroke_id / patron_id / score rows (see module docstring).
+        queue: StrokeQueue whose claims the batch belongs to; None completes
+            the strokes regardless of owner.
+
+    Returns:
+        {diagnosticos, strokes, completados, descartados, borrados, segundos}
+        ``descartados`` counts rows of strokes with non-finite scores plus,
+        with a queue, rows of claims no longer held.
+    """
+    t0 = time.perf_counter()
+    stroke_ids, patron_ids, scores = _as_columns(data, DIAGNOSIS_COLUMNS)
+    scores = scores.astype(np.float64)
+
+    # np.clip passes NaN through and COPY would reject 'nan' for NUMERIC(5,4)
+    no_finitos = np.isin(stroke_ids, stroke_ids[~np.isfinite(scores)])
+    descartados = int(no_finitos.sum())
+    if descartados:
+        logger.warning(f"Diagnoses: {descartados} rows discarded "
+                       f"({len(np.unique(stroke_ids[no_finitos]))} strokes with non-finite scores)")
+        stroke_ids, patron_ids, scores = stroke_ids[~no_finitos], patron_ids[~no_finitos], scores[~no_finitos]
+    scores = np.round(np.clip(scores, 0.0, 1.0), 4)
+
+    conn.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_diagnostico (
+            stroke_id BIGINT NOT NULL, patron_id SMALLINT NOT NULL, score NUMERIC(5,4) NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """))
+    _copy(conn, "tmp_diagnostico", DIAGNOSIS_COLUMNS,
+          "".join(f"{s}\t{p}\t{sc:.4f}\n" for s, p, sc in
+                  zip(stroke_ids.tolist(), patron_ids.tolist(), scores.tolist())))
+
+    if queue is not None:
+        conn.execute(text("""
+            SELECT s.stroke_id FROM universal.stroke s
+            WHERE s.stroke_id IN (SELECT stroke_id FROM tmp_diagnostico)
+              AND s.estado = 'EN_PROCESO' AND s.worker = :w
+            ORDER BY s.stroke_id
+            FOR UPDATE
+        """), {"w": queue.worker})
+        perdidos = conn.execute(text("""
+            DELETE FROM tmp_diagnostico t
+            WHERE NOT EXISTS (SELECT 1 FROM universal.stroke s
+                              WHERE s.stroke_id = t.stroke_id
+                                AND s.estado = 'EN_PROCESO' AND s.worker = :w)
+        """), {"w": queue.worker}).rowcount
+        if perdidos:
+            logger.warning(f"Diagnoses: {perdidos} rows discarded (claims no longer held by {queue.worker})")
+        descartados += perdidos
+
+    # Duplicate (stroke, patron) rows in one batch: keep the highest score
+    diagnosticos = conn.execute(text("""
+        INSERT INTO universal.diagnostico AS d (stroke_id, patron_id, score)
+        SELECT DISTINCT ON (stroke_id, patron_id) stroke_id, patron_id, score
+        FROM tmp_diagnostico
+        ORDER BY stroke_id, patron_id, score DESC
+        ON CONFLICT (stroke_id, patron_id) DO UPDATE
+            SET score = EXCLUDED.score, created_at = now()
+            WHERE d.score IS DISTINCT FROM EXCLUDED.score
+    """)).rowcount
+    borrados = conn.execute(text("""
+        DELETE FROM universal.diagnostico d
+        WHERE d.stroke_id IN (SELECT stroke_id FROM tmp_diagnostico)
+          AND NOT EXISTS (SELECT 1 FROM tmp_diagnostico t
+                          WHERE t.stroke_id = d.stroke_id AND t.patron_id = d.patron_id)
+    """)).rowcount
+
+    ids = [r[0] for r in conn.execute(text("SELECT DISTINCT stroke_id FROM tmp_diagnostico"))]
+    if queue is not None:
+        completados = queue.complete(ids, conn=conn)
+    else:
+        completados = conn.execute(text("""
+            UPDATE universal.stroke
+            SET estado = 'COMPLETADO', completado_en = now(), ultimo_error = NULL
+            WHERE stroke_id = ANY(:ids) AND estado <> 'COMPLETADO'
+        """), {"ids": ids}).rowcount
+
+    return {
+        "diagnosticos": diagnosticos,
+        "strokes": len(ids),
+        "completados": completados,
+        "descartados": descartados,
+        "borrados": borrados,
+        "segundos": round(time.perf_counter() - t0, 3),
+    }
+
+
+def write_validations(conn, data) -> int:
+    """
+    Upsert expert validations (stroke_id, patron_id, experto, comentario).
+
+    One row per (stroke_id, experto) (V21); a correction updates patron_id,
+    comentario and updated_at. Duplicates within the batch keep the last row.
+    Returns rows inserted or changed.
+    """
+    stroke_ids, patron_ids, expertos, comentarios = _as_columns(data, VALIDATION_COLUMNS)
+
+    def esc(v) -> str:
+        if v is None or (isinstance(v, float) and np.isnan(v)):
+            return r"\N"
+        return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+    conn.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_validacion (
+            stroke_id BIGINT NOT NULL, patron_id SMALLINT NOT NULL, experto TEXT NOT NULL, comentario TEXT,
+            orden BIGINT NOT NULL
+        ) ON COMMIT DELETE ROWS
+    """))
+    _copy(conn, "tmp_validacion", VALIDATION_COLUMNS + ("orden",),
+          "".join(f"{s}\t{p}\t{esc(e)}\t{esc(c)}\t{i}\n" for i, (s, p, e, c) in
+                  enumerate(zip(stroke_ids.tolist(), patron_ids.tolist(), expertos.tolist(), comentarios.tolist()))))
+    return conn.execute(text("""
+        INSERT INTO universal.validacion_experta AS v (stroke_id, patron_id, experto, comentario)
+        SELECT DISTINCT ON (stroke_id, experto) stroke_id, patron_id, experto, comentario
+        FROM tmp_validacion
+        ORDER BY stroke_id, experto, orden DESC
+        ON CONFLICT (stroke_id, experto) DO UPDATE
+            SET patron_id = EXCLUDED.patron_id, comentario = EXCLUDED.comentario, updated_at = now()
+            WHERE (v.patron_id, v.comentario) IS DISTINCT FROM (EXCLUDED.patron_id, EXCLUDED.comentario)
+    """)).rowcount
+
+
+def run_simulated(engine, batch: int, k: int = TOP_K, max_strokes: Optional[int] = None,
+                  seed: int = 0) -> dict:
+    """
+    Drain the stroke queue with random probabilities standing in for the classifier.
+
+    Measures the write path only: claim, top_k(), write_diagnoses() per batch.
+    Only strokes with current-version features are claimed (V20), so run
+    src/dynacard_features.py first.
+
+    Returns:
+        {strokes, diagnosticos, lotes, segundos, seg_escritura, strokes_s}
+    """
+    from src.stroke_queue import StrokeQueue
+
+    queue = StrokeQueue(engine, worker=f"diagnostic-writer:{os.getpid()}")
+    with engine.connect() as conn:
+        patron_ids = np.array([r[0] for r in conn.execute(
+            text("SELECT patron_id FROM universal.patron ORDER BY patron_id"))])
+    if not len(patron_ids):
+        raise RuntimeError("universal.patron is empty (run simulate_universal_data.py first)")
+
+    rng = np.random.default_rng(seed)
+    strokes = diagnosticos = lotes = 0
+    seg_escritura = 0.0
+    t0 = time.perf_counter()
+    while max_strokes is None or strokes < max_strokes:
+        claimed = queue.claim(batch if max_strokes is None else min(batch, max_strokes - strokes))
+        if not claimed:
+            break
+        ids = np.array([c.stroke_id for c in claimed], dtype=np.int64)
+        rows = top_k(ids, rng.dirichlet(np.ones(len(patron_ids)), size=len(ids)), patron_ids, k)
+        with engine.begin() as conn:
+            stats = write_diagnoses(conn, rows, queue=queue)
+        seg_escritura += stats["segundos"]
+        strokes += stats["completados"]
+        diagnosticos += stats["diagnosticos"]
+        lotes += 1
+    segundos = time.perf_counter() - t0
+    return {
+        "strokes": strokes,
+        "diagnosticos": diagnosticos,
+        "lotes": lotes,
+        "segundos": round(segundos, 3),
+        "seg_escritura": round(seg_escritura, 3),
+        "strokes_s": round(strokes / segundos) if segundos else 0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk CDI diagnosis writer benchmark over the stroke queue")
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--k", type=int, default=TOP_K, help="patterns kept per stroke")
+    parser.add_argument("--max-strokes", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from dotenv import load_dotenv
+    from src.db import get_engine
+
+    load_dotenv()
+    engine = get_engine(
+        f"postgresql://{os.getenv('DB_USER', 'audit')}:{os.getenv('DEV_DB_PASSWORD', 'audit')}"
+        f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'etl_data')}"
+    )
+    stats = run_simulated(engine, args.batch, args.k, args.max_strokes)
+    print(f"{stats['strokes']} strokes / {stats['diagnosticos']} diagnoses in {stats['lotes']} batches, "
+          f"{stats['segundos']}s ({stats['strokes_s']}/s; writer {stats['seg_escritura']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Dynacard Feature Extractor
+==========================
+
+Batch engine that computes card features for pending universal.stroke rows
+and writes them to universal.stroke_features (V19) for the CDI classifier.
+
+Per batch (CDI_FEATURES_BATCH strokes, keyset on stroke_id):
+
+1. One query reads the four REAL[] cards (V18) of the batch's strokes.
+2. Each card column is decoded into a NaN-padded NumPy matrix
+   (strokes x points) with a single flatten + scatter, not one array per row.
+3. One vectorized pass over the matrices computes stroke length, peak/min
+   load, load range, closed-polygon area, a fill ratio estimate
+   (downhole area / (stroke x load range)) and a fixed-length shape vector
+   (downhole card, or surface card when there is none, normalized to 0-1 and
+   resampled to CDI_FORMA_PUNTOS points: [x_0..x_n-1, y_0..y_n-1]).
+4. The batch is COPYed into a temp table and merged into
+   universal.stroke_features (ON CONFLICT (stroke_id) DO UPDATE).
+
+Strokes are selected while estado = 'PENDIENTE' and their features are
+missing or were computed by another FEATURES_VERSION; the extractor does not
+change estado (that belongs to the diagnosis step).
+
+Usage:
+    from src.dynacard_features import enqueue_strokes, run_features
+
+    with engine.begin() as conn:
+        enqueue_strokes(conn)
+    stats = run_features(engine)
+    print(stats["strokes"], stats["cartas_min"])
+
+    python -m src.dynacard_features [--enqueue] [--batch 5000] [--max-strokes N]
+    python -m src.dynacard_features --synthetic 20000   # compute-only benchmark, no DB
+"""
+
+import argparse
+import io
+import itertools
+import logging
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURES_VERSION = "v1"
+BATCH_SIZE = int(os.getenv("CDI_FEATURES_BATCH", "5000"))
+SHAPE_POINTS = int(os.getenv("CDI_FORMA_PUNTOS", "64"))
+
+FEATURE_COLUMNS = (
+    "puntos_superficie", "puntos_fondo",
+    "carrera_superficie_in", "carrera_fondo_in",
+    "carga_max_superficie", "carga_min_superficie",
+    "rango_carga_superficie", "rango_carga_fondo",
+    "area_superficie", "area_fondo",
+    "llenado_estimado",
+)
+
+# NULL elements become NaN so every array decodes straight to float
+QUERY_BATCH = """
+    SELECT s.stroke_id,
+           array_replace(p.surface_rod_position, NULL, 'NaN'::REAL),
+           array_replace(p.surface_rod_load, NULL, 'NaN'::REAL),
+           array_replace(p.downhole_pump_position, NULL, 'NaN'::REAL),
+           array_replace(p.downhole_pump_load, NULL, 'NaN'::REAL)
+    FROM universal.stroke s
+    JOIN stage.tbl_pozo_produccion p ON p.produccion_id = s.produccion_id
+    LEFT JOIN universal.stroke_features f ON f.stroke_id = s.stroke_id
+    WHERE s.estado = 'PENDIENTE'
+      AND s.stroke_id > :desde
+      AND (f.stroke_id IS NULL OR f.version_extractor <> :version)
+    ORDER BY s.stroke_id
+    LIMIT :lote
+"""
+
+
+# ---------------------------------------------------------------------------
+# Vectorized features
+# ---------------------------------------------------------------------------
+
+def decode_cards(cards: Sequence[Optional[Sequence[float]]], width: Optional[int] = None):
+    """
+    Decode a column of variable-length cards into a NaN-padded matrix.
+
+    Returns:
+        (matrix float64 [n, width], lengths int64 [n]); None cards have length 0.
+    """
+    n = len(cards)
+    lengths = np.fromiter((len(c) if c is not None else 0 for c in cards), dtype=np.int64, count=n)
+    total = int(lengths.sum())
+    if width is None:
+        width = int(lengths.max(initial=0))
+    out = np.full((n, max(width, 1)), np.nan)
+    if total:
+        flat = np.fromiter(itertools.chain.from_iterable(c for c in cards if c), dtype=np.float64, count=total)
+        rows = np.repeat(np.arange(n), lengths)
+        cols = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        out[rows, cols] = flat
+    return out, lengths
+
+
+def _card_stats(x, y, n):
+    """
+    Per-row min/max, area and valid point count of paired position/load matrices.
+
+    Same semantics as stage.fnc_card_stats (V18): points with a missing
+    position or load are dropped and the polygon closes over the remaining
+    points in order.
+    """
+    width = x.shape[1]
+    idx = np.arange(width)
+    mask = (idx < n[:, None]) & np.isfinite(x) & np.isfinite(y)
+    xm, ym = np.where(mask, x, np.nan), np.where(mask, y, np.nan)
+    puntos = mask.sum(axis=1)
+
+    # Valid points first, in their original order
+    orden = np.argsort(~mask, axis=1, kind="stable")
+    xc = np.take_along_axis(xm, orden, axis=1)
+    yc = np.take_along_axis(ym, orden, axis=1)
+
+    # Closed polygon: valid point i pairs with i + 1, the last one with the first
+    nxt = np.where(idx + 1 < puntos[:, None], idx + 1, 0)
+    x_sig = np.take_along_axis(xc, nxt, axis=1)
+    y_sig = np.take_along_axis(yc, nxt, axis=1)
+    cruz = np.where(idx < puntos[:, None], xc * y_sig - x_sig * yc, 0.0)
+    area = np.abs(cruz.sum(axis=1)) / 2
+    area[puntos < 3] = np.nan
+
+    return {
+        "x_max": np.fmax.reduce(xm, axis=1), "x_min": np.fmin.reduce(xm, axis=1),
+        "y_max": np.fmax.reduce(ym, axis=1), "y_min": np.fmin.reduce(ym, axis=1),
+        "area": area, "puntos": puntos,
+    }
+
+
+def _shape(x, y, n, points):
+    """Normalize each card to the 0-1 box and resample it to ``points`` points."""
+    def unit(m):
+        lo = np.fmin.reduce(m, axis=1)[:, None]
+        span = np.fmax.reduce(m, axis=1)[:, None] - lo
+        return np.where(span > 0, (m - lo) / np.where(span > 0, span, 1), 0.0)
+
+    width = x.shape[1]
+    mask = np.arange(width) < n[:, None]
+    xu, yu = unit(np.where(mask, x, np.nan)), unit(np.where(mask, y, np.nan))
+    last = np.maximum(n - 1, 0)[:, None]
+    t = np.linspace(0.0, 1.0, points)[None, :] * last
+    i0 = np.minimum(np.floor(t).astype(np.int64), np.maximum(width - 1, 0))
+    i1 = np.minimum(i0 + 1, last)
+    frac = t - i0
+    forma = np.concatenate([
+        np.take_along_axis(xu, i0, 1) * (1 - frac) + np.take_along_axis(xu, i1, 1) * frac,
+        np.take_along_axis(yu, i0, 1) * (1 - frac) + np.take_along_axis(yu, i1, 1) * frac,
+    ], axis=1)
+    forma[n < 2] = np.nan
+    return forma
+
+
+def compute_features(surface_pos, surface_load, downhole_pos, downhole_load,
+                     shape_points: int = SHAPE_POINTS) -> Dict[str, np.ndarray]:
+    """
+    Features for a batch of strokes in one vectorized pass.
+
+    Args:
+        surface_pos, surface_load, downhole_pos, downhole_load: Sequences (one
+            entry per stroke) of card arrays or None.
+        shape_points: Points of the resampled shape vector (per axis).
+
+    Returns:
+        {column: array[n]} for FEATURE_COLUMNS plus "forma" (array[n, 2 * shape_points]).
+    """
+    width = max((len(c) for col in (surface_pos, surface_load, downhole_pos, downhole_load)
+                 for c in col if c is not None), default=1)
+    sx, nsx = decode_cards(surface_pos, width)
+    sy, nsy = decode_cards(surface_load, width)
+    dx, ndx = decode_cards(downhole_pos, width)
+    dy, ndy = decode_cards(downhole_load, width)
+    ns, nd = np.minimum(nsx, nsy), np.minimum(ndx, ndy)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sup = _card_stats(sx, sy, ns)
+        fon = _card_stats(dx, dy, nd)
+        carrera_fondo = fon["x_max"] - fon["x_min"]
+        rango_fondo = fon["y_max"] - fon["y_min"]
+        llenado = np.clip(fon["area"] / (carrera_fondo * rango_fondo), 0.0, 1.0)
+        llenado[~np.isfinite(llenado)] = np.nan
+
+        usar_fondo = (nd >= 2)[:, None]
+        forma = _shape(np.where(usar_fondo, dx, sx), np.where(usar_fondo, dy, sy),
+                       np.where(nd >= 2, nd, ns), shape_points)
+
+    return {
+        "puntos_superficie": sup["puntos"],
+        "puntos_fondo": fon["puntos"],
+        "carrera_superficie_in": sup["x_max"] - sup["x_min"],
+        "carrera_fondo_in": carrera_fondo,
+        "carga_max_superficie": sup["y_max"],
+        "carga_min_superficie": sup["y_min"],
+        "rango_carga_superficie": sup["y_max"] - sup["y_min"],
+        "rango_carga_fondo": rango_fondo,
+        "area_superficie": sup["area"],
+        "area_fondo": fon["area"],
+        "llenado_estimado": llenado,
+        "forma": forma,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Database
+# ---------------------------------------------------------------------------
+
+def enqueue_strokes(conn) -> int:
+    """Create a PENDIENTE stroke for every production reading with a card."""
+    from sqlalchemy import text
+
+    return conn.execute(text("""
+        INSERT INTO universal.stroke (produccion_id)
+        SELECT p.produccion_id
+        FROM stage.tbl_pozo_produccion p
+        WHERE p.surface_rod_position IS NOT NULL OR p.downhole_pump_position IS NOT NULL
+        ON CONFLICT (produccion_id) DO NOTHING
+    """)).rowcount
+
+
+def _copy_text(value) -> str:
+    if value is None or (isinstance(value, float) and not np.isfinite(value)):
+        return r"\N"
+    return str(value)
+
+
+def features_to_copy(stroke_ids, features: Dict[str, np.ndarray]) -> io.StringIO:
+    """Serialize a batch as COPY text rows (stroke_id, FEATURE_COLUMNS..., forma, version)."""
+    cols = [features[c].tolist() for c in FEATURE_COLUMNS]
+    forma = np.round(features["forma"], 6)
+    valid = np.isfinite(forma).all(axis=1).tolist()
+    buf = io.StringIO()
+    for i, stroke_id in enumerate(stroke_ids):
+        campos = [str(stroke_id)] + [_copy_text(col[i]) for col in cols]
+        campos.append("{" + ",".join(map(str, forma[i].tolist())) + "}" if valid[i] else r"\N")
+        campos.append(FEATURES_VERSION)
+        buf.write("\t".join(campos) + "\n")
+    buf.seek(0)
+    return buf
+
+
+def write_features(conn, stroke_ids, features: Dict[str, np.ndarray]) -> int:
+    """COPY one batch into a temp table and merge it into universal.stroke_features."""
+    from sqlalchemy import text
+
+    columnas = ("stroke_id",) + FEATURE_COLUMNS + ("forma", "version_extractor")
+    conn.execute(text("""
+        CREATE TEMP TABLE IF NOT EXISTS tmp_stroke_features
+        (LIKE universal.stroke_features INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+    """))
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY tmp_stroke_features ({', '.join(columnas)}) FROM STDIN",
+                           features_to_copy(stroke_ids, features), size=1 << 16)
+    finally:
+        cursor.close()
+    update = ", ".join(f"{c} = EXCLUDED.{c}" for c in columnas[1:])
+    return conn.execute(text(f"""
+        INSERT INTO universal.stroke_features ({', '.join(columnas)}, calculado_en)
+        SELECT {', '.join(columnas)}, now() FROM tmp_stroke_features
+        ON CONFLICT (stroke_id) DO UPDATE SET {update}, calculado_en = EXCLUDED.calculado_en
+    """)).rowcount
+
+
+def run_features(engine, batch_size: int = BATCH_SIZE, shape_points: int = SHAPE_POINTS,
+                 max_strokes: Optional[int] = None) -> dict:
+    """
+    Compute and store features for every pending stroke, batch by batch.
+
+    Each batch is read, computed and written in its own transaction.
+
+    Returns:
+        {strokes, lotes, segundos, seg_calculo, cartas_min}
+    """
+    from sqlalchemy import text
+
+    t0 = time.perf_counter()
+    desde, strokes, lotes, seg_calculo = 0, 0, 0, 0.0
+    while max_strokes is None or strokes < max_strokes:
+        lote = batch_size if max_strokes is None else min(batch_size, max_strokes - strokes)
+        with engine.begin() as conn:
+            rows = conn.execute(text(QUERY_BATCH),
+                                {"desde": desde, "version": FEATURES_VERSION, "lote": lote}).fetchall()
+            if not rows:
+                break
+            stroke_ids, sp, sl, dp, dl = zip(*rows)
+            tc = time.perf_counter()
+            features = compute_features(sp, sl, dp, dl, shape_points)
+            seg_calculo += time.perf_counter() - tc
+            write_features(conn, stroke_ids, features)
+        desde = stroke_ids[-1]
+        strokes += len(rows)
+        lotes += 1
+        logger.info(f"Features: batch {lotes} ({len(rows)} strokes, up to stroke_id {desde})")
+    segundos = time.perf_counter() - t0
+    return {
+        "strokes": strokes,
+        "lotes": lotes,
+        "segundos": round(segundos, 3),
+        "seg_calculo": round(seg_calculo, 3),
+        "cartas_min": round(strokes / segundos * 60) if segundos else 0,
+    }
+
+
+def synthetic_cards(n: int, points: int = 200, seed: int = 0):
+    """Random parallelogram-like cards (surface and downhole) for benchmarking."""
+    rng = np.random.default_rng(seed)
+    t = np.linspace(0, 2 * np.pi, points, endpoint=False)
+    carrera = rng.uniform(60, 170, (n, 1))
+    carga = rng.uniform(8000, 25000, (n, 1))
+    pos = carrera * (1 - np.cos(t)) / 2
+    load = carga * (0.6 + 0.4 * np.sin(t)) + rng.normal(0, 200, (n, points))
+    pos_l, load_l = pos.astype(np.float32).tolist(), load.astype(np.float32).tolist()
+    return pos_l, load_l, pos_l, load_l
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Batch dynacard features for pending universal.stroke rows")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--shape-points", type=int, default=SHAPE_POINTS)
+    parser.add_argument("--max-strokes", type=int, default=None)
+    parser.add_argument("--enqueue", action="store_true",
+                        help="first create PENDIENTE strokes for readings with cards")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="benchmark compute_features on N synthetic cards (no database)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.synthetic:
+        cards = synthetic_cards(args.synthetic)
+        t0 = time.perf_counter()
+        features = compute_features(*cards, shape_points=args.shape_points)
+        seg = time.perf_counter() - t0
+        print(f"{args.synthetic} cards in {seg:.3f}s ({args.synthetic / seg * 60:,.0f} cards/min), "
+              f"mean fill {np.nanmean(features['llenado_estimado']):.3f}")
+        return 0
+
+    from dotenv import load_dotenv
+    from src.db import get_engine
+
+    load_dotenv()
+    engine = get_engine(
+        f"postgresql://{os.getenv('DB_USER', 'audit')}:{os.getenv('DEV_DB_PASSWORD', 'audit')}"
+        f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'etl_data')}"
+    )
+    if args.enqueue:
+        with engine.begin() as conn:
+            print(f"Enqueued strokes: {enqueue_strokes(conn)}")
+    stats = run_features(engine, args.batch, args.shape_points, args.max_strokes)
+    print(f"{stats['strokes']} strokes in {stats['lotes']} batches, {stats['segundos']}s "
+          f"({stats['cartas_min']:,} cards/min; compute {stats['seg_calculo']}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
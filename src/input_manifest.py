@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Input Manifest (skip cache)
+===========================
+
+Content-hash cache for the loader inputs (referencial CSVs, SQL dumps, the
+reservas workbook), backed by control.tbl_input_manifest (V17).
+
+An entry is current when:
+- the file still has the recorded size and mtime, or its SHA-256 still
+  matches (mtime-only changes are absorbed and refreshed), and
+- every target table that had rows when the file was loaded still has rows.
+
+Loaders skip inputs that are current and record an entry after a successful
+load. The manifest lives in the control schema, which the full reset
+(init_schemas.py) does not drop: a FULL run keeps stage when nothing changed
+(init_schemas.init_pipeline). When the reset drops a schema it forget()s the
+consumers that load it, in the same transaction, so every one of their inputs
+reloads (the row check alone would skip all but the first file per table).
+INPUT_CACHE=0 disables skipping.
+
+Usage:
+    from src.input_manifest import InputManifest
+
+    manifest = InputManifest(engine, "load_referencial")
+    if manifest.current(paths):
+        return
+    load_everything()
+    manifest.record(paths, ["referencial.tbl_dq_rules", ...])
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+INPUT_CACHE = os.getenv("INPUT_CACHE", "1").strip().lower() not in ("0", "false", "no")
+
+MANIFEST_TABLE = "control.tbl_input_manifest"
+
+
+def _stat(path: str):
+    st = os.stat(path)
+    return st.st_size, datetime.fromtimestamp(st.st_mtime).replace(microsecond=0)
+
+
+def _sha256(path: str) -> str:
+    """Content-only SHA-256 (unlike pipeline_checkpoint.file_digest, the path is not mixed in)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InputManifest:
+    """Per-consumer view of control.tbl_input_manifest."""
+
+    def __init__(self, engine, consumer: str, enabled: bool = INPUT_CACHE):
+        self.engine = engine
+        self.consumer = consumer
+        self.enabled = enabled
+
+    def _available(self, conn) -> bool:
+        return conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"),
+                            {"t": MANIFEST_TABLE}).scalar()
+
+    def current(self, paths: Iterable[str]) -> bool:
+        """True if every path is unchanged since its last recorded load."""
+        if not self.enabled:
+            return False
+        paths = [os.path.abspath(p) for p in paths]
+        if not paths or not all(os.path.isfile(p) for p in paths):
+            return False
+        with self.engine.begin() as conn:
+            if not self._available(conn):
+                return False
+            rows = {r.ruta: r for r in conn.execute(text(f"""
+                SELECT ruta, sha256, tamano_bytes, mtime, tablas_destino
+                FROM {MANIFEST_TABLE}
+                WHERE consumidor = :c AND ruta = ANY(:rutas)
+            """), {"c": self.consumer, "rutas": paths})}
+            targets: Dict[str, int] = {}
+            for path in paths:
+                row = rows.get(path)
+                if row is None:
+                    return False
+                size, mtime = _stat(path)
+                if (size, mtime) != (row.tamano_bytes, row.mtime):
+                    if size != row.tamano_bytes or _sha256(path) != row.sha256:
+                        return False
+                    conn.execute(text(f"""
+                        UPDATE {MANIFEST_TABLE} SET mtime = :m
+                        WHERE consumidor = :c AND ruta = :r
+                    """), {"m": mtime, "c": self.consumer, "r": path})
+                tablas = row.tablas_destino
+                if isinstance(tablas, str):
+                    tablas = json.loads(tablas)
+                for table, rows_loaded in tablas.items():
+                    targets[table] = max(targets.get(table, 0), rows_loaded or 0)
+            for table, rows_loaded in targets.items():
+                if conn.execute(text("SELECT to_regclass(:t) IS NULL"), {"t": table}).scalar():
+                    return False
+                if rows_loaded and conn.execute(
+                        text(f"SELECT NOT EXISTS (SELECT 1 FROM {table})")).scalar():
+                    logger.info(f"Manifest: {table} is empty, reloading {self.consumer}")
+                    return False
+        return True
+
+    def forget(self, conn=None) -> int:
+        """Delete every entry of this consumer (its target schema was dropped)."""
+        if conn is None:
+            with self.engine.begin() as own:
+                return self.forget(conn=own)
+        if not self._available(conn):
+            return 0
+        return conn.execute(text(f"DELETE FROM {MANIFEST_TABLE} WHERE consumidor = :c"),
+                            {"c": self.consumer}).rowcount
+
+    def record(self, paths: Iterable[str], tables, conn=None) -> None:
+        """
+        Upsert the entries of ``paths`` after a successful load.
+
+        Args:
+            paths: Input files that were loaded.
+            tables: Target tables, either {table: rows} or a list (rows are counted).
+            conn: Open transaction to record in (atomic with the load); else a new one.
+        """
+        if conn is None:
+            with self.engine.begin() as own:
+                return self.record(paths, tables, conn=own)
+        if not self._available(conn):
+            logger.warning(f"{MANIFEST_TABLE} does not exist; skip cache not recorded")
+            return
+        if not isinstance(tables, dict):
+            tables = {t: conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar() for t in tables}
+        for path in paths:
+            path = os.path.abspath(path)
+            if not os.path.isfile(path):
+                continue
+            size, mtime = _stat(path)
+            conn.execute(text(f"""
+                INSERT INTO {MANIFEST_TABLE}
+                    (consumidor, ruta, sha256, tamano_bytes, mtime, tablas_destino, cargado_en)
+                VALUES (:c, :r, :h, :s, :m, CAST(:t AS JSONB), CURRENT_TIMESTAMP)
+                ON CONFLICT (consumidor, ruta) DO UPDATE SET
+                    sha256 = EXCLUDED.sha256, tamano_bytes = EXCLUDED.tamano_bytes,
+                    mtime = EXCLUDED.mtime, tablas_destino = EXCLUDED.tablas_destino,
+                    cargado_en = EXCLUDED.cargado_en
+            """), {"c": self.consumer, "r": path, "h": _sha256(path), "s": size, "m": mtime,
+                   "t": json.dumps(tables)})
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Landing Pivot (prepared statement)
+==================================
+
+Runs the metadata-driven EAV pivot stage.landing_scada_data →
+stage.tbl_pozo_produccion (V6.4) as a server-side prepared statement.
+
+The pivot SQL is generated in the database from referencial.tbl_var_scada_map
+and the column types of stage.tbl_pozo_produccion
+(stage.fnc_pivot_sql_compilado(), cached per map hash). This module PREPAREs
+that text once per pooled connection under a name derived from its hash and
+then only EXECUTEs it, so repeated small windows (incremental loads,
+per-minute polling) skip parse/plan. When the SCADA map changes the hash
+changes, a new statement is prepared and the stale one is deallocated.
+
+Two variants are prepared independently:
+
+    window       pivot_landing(conn, desde, hasta, unit_ids)
+    incremental  pivot_landing_incremental(conn, unit_ids) — only landing rows
+                 with idn above stage.tbl_pivot_watermark; the watermark is
+                 advanced by the same statement, so it commits or rolls back
+                 together with the pivoted readings.
+
+Both variants log every reading they insert or change into
+stage.tbl_produccion_cambios, which the runner's incremental delta (V13)
+reads so re-pivoted readings behind the reporting watermark are reprocessed.
+The statement returns the number of those readings.
+
+For one-off runs from SQL, CALL stage.sp_pivot_landing_to_produccion(...) and
+CALL stage.sp_pivot_landing_incremental(...) execute the same cached text.
+
+Usage:
+    from src.landing_pivot import pivot_landing, pivot_landing_incremental
+
+    with engine.begin() as conn:
+        filas = pivot_landing(conn, desde, hasta, unit_ids=[5, 7])
+        filas = pivot_landing_incremental(conn)
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# variant → (prepared statement prefix, parameter types)
+VARIANTS = {
+    False: ("stage_pivot_win_", "TIMESTAMP, TIMESTAMP, INT[]"),
+    True:  ("stage_pivot_inc_", "INT[]"),
+}
+
+
+def compiled_sql(conn, incremental: bool = False) -> str:
+    """Pivot SQL for the current SCADA map (compiled and cached server-side)."""
+    return conn.execute(text("SELECT stage.fnc_pivot_sql_compilado(:inc)"),
+                        {"inc": incremental}).scalar()
+
+
+def prepare_pivot(conn, incremental: bool = False) -> str:
+    """
+    Make sure the current pivot variant is prepared on this connection.
+
+    Returns:
+        Name of the prepared statement (stage_pivot_<win|inc>_<hash>).
+    """
+    prefix, param_types = VARIANTS[incremental]
+    sql = compiled_sql(conn, incremental)
+    name = prefix + hashlib.md5(sql.encode("utf-8")).hexdigest()[:16]
+    prepared = {
+        r[0] for r in conn.execute(text(
+            "SELECT name FROM pg_prepared_statements WHERE name LIKE :prefix"
+        ), {"prefix": prefix + "%"})
+    }
+    if name not in prepared:
+        for stale in prepared:
+            conn.exec_driver_sql(f"DEALLOCATE {stale}")
+        conn.exec_driver_sql(f"PREPARE {name} ({param_types}) AS {sql}")
+        logger.debug(f"Pivot prepared as {name}")
+    return name
+
+
+def pivot_landing(conn, desde: Optional[datetime] = None, hasta: Optional[datetime] = None,
+                  unit_ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Pivot landing rows with desde <= moddate < hasta into tbl_pozo_produccion.
+
+    Args:
+        conn: Open connection (the caller owns the transaction).
+        desde: Inclusive lower bound on moddate (None = unbounded).
+        hasta: Exclusive upper bound on moddate (None = unbounded).
+        unit_ids: Restrict to these unit_id/well_id values (None = all).
+
+    Returns:
+        Readings inserted or updated.
+    """
+    name = prepare_pivot(conn)
+    result = conn.execute(text(
+        f"EXECUTE {name}("
+        "COALESCE(CAST(:desde AS TIMESTAMP), '-infinity'), "
+        "COALESCE(CAST(:hasta AS TIMESTAMP), 'infinity'), "
+        "CAST(:units AS INT[]))"
+    ), {"desde": desde, "hasta": hasta,
+        "units": list(unit_ids) if unit_ids is not None else None})
+    return result.scalar()
+
+
+def pivot_landing_incremental(conn, unit_ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Pivot only landing rows newer than each unit's watermark and advance it.
+
+    Readings touched by new rows are re-pivoted from all their landing rows,
+    so a variable arriving late for an existing reading keeps the other
+    columns. Cost is proportional to the new rows, not to the landing table.
+
+    Args:
+        conn: Open connection (the caller owns the transaction).
+        unit_ids: Restrict to these unit_id/well_id values (None = all).
+
+    Returns:
+        Readings inserted or updated.
+    """
+    name = prepare_pivot(conn, incremental=True)
+    result = conn.execute(text(f"EXECUTE {name}(CAST(:units AS INT[]))"),
+                          {"units": list(unit_ids) if unit_ids is not None else None})
+    return result.scalar()
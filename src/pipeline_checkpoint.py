@@ -0,0 +1,122 @@
+"""
+Pipeline Checkpoint / Resume
+============================
+
+Persists which DAG steps of MASTER_PIPELINE_RUNNER completed successfully,
+together with a fingerprint of their inputs, so that ``--resume`` can skip
+them after a late-stage failure instead of rebuilding from ``init_schemas``.
+
+The state lives in a JSON file (not in the database): a full reset drops
+every pipeline schema, so the checkpoint must survive it.
+
+A step fingerprint combines:
+- the run base (mode + target database),
+- the step's own inputs (SQL text with its parameters, hashes of the input
+  files of a loader script, the incremental watermark delta),
+- the fingerprints of the steps it depends on.
+
+Any change upstream therefore invalidates everything downstream.
+
+Usage:
+    from src.pipeline_checkpoint import RunState, file_digest
+
+    state = RunState(Path("logs/pipeline_runs/run_state.json"))
+    fingerprints = dag.fingerprints(base="FULL|localhost:5433/etl_data")
+    skip = state.resumable(dag, fingerprints)
+    dag.run(skip=skip, on_success=lambda name: state.mark_done(name, fingerprints[name]))
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+_CHUNK = 1024 * 1024
+
+
+def file_digest(paths: Iterable) -> str:
+    """
+    SHA-256 over the names and contents of ``paths`` (missing files count as absent).
+
+    Args:
+        paths: Input files of a step.
+
+    Returns:
+        Hex digest.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        path = Path(path)
+        digest.update(str(path).encode("utf-8"))
+        if not path.is_file():
+            digest.update(b"<missing>")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RunState:
+    """JSON-backed record of completed steps and their fingerprints."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.steps: Dict[str, Dict[str, str]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.steps = json.load(f).get("steps", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Run state ilegible ({self.path}): {e}. Se ignora.")
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": datetime.now().isoformat(), "steps": self.steps}, f, indent=2)
+        os.replace(tmp, self.path)  # atomic: a crash never leaves a half-written state
+
+    def reset(self) -> None:
+        """Forget every checkpoint (start of a non-resumed run)."""
+        with self._lock:
+            self.steps = {}
+            self._save()
+
+    def mark_done(self, step_name: str, fingerprint: str) -> None:
+        """Persist a successful step immediately."""
+        with self._lock:
+            self.steps[step_name] = {
+                "fingerprint": fingerprint,
+                "completado": datetime.now().isoformat(),
+            }
+            self._save()
+
+    def is_done(self, step_name: str, fingerprint: str) -> bool:
+        entry = self.steps.get(step_name)
+        return entry is not None and entry.get("fingerprint") == fingerprint
+
+    def resumable(self, dag, fingerprints: Dict[str, str]) -> Set[str]:
+        """
+        Steps that can be skipped: completed with the same fingerprint and
+        whose dependencies are all skippable as well.
+
+        Args:
+            dag: PipelineDAG (steps in declaration order).
+            fingerprints: Output of ``dag.fingerprints()``.
+
+        Returns:
+            Names of the steps to skip.
+        """
+        skip: Set[str] = set()
+        for name in dag.steps:
+            if self.is_done(name, fingerprints[name]) and dag.dependencies[name] <= skip:
+                skip.add(name)
+        return skip
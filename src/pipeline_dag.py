@@ -0,0 +1,237 @@
+"""
+Pipeline DAG Scheduler
+======================
+
+Declares the MASTER_PIPELINE_RUNNER phases as a DAG of steps with explicit
+read/write table sets and runs independent steps concurrently on a bounded
+worker pool.
+
+Dependencies are derived from the declaration order: a step depends on every
+earlier step it conflicts with (write/write, write/read or read/write on the
+same table). A schema wildcard such as ``"stage.*"`` conflicts with every
+table of that schema. Extra ordering constraints that are not visible through
+tables can be declared with ``after``.
+
+Usage:
+    from src.pipeline_dag import PipelineDAG, PipelineStep
+
+    dag = PipelineDAG()
+    dag.add(PipelineStep("dq", run_dq,
+                         reads={"stage.tbl_pozo_produccion"},
+                         writes={"stage.tbl_pozo_scada_dq"}))
+    dag.run(max_workers=4)
+
+With ``max_workers=1`` the steps run one at a time in declaration order,
+which reproduces the legacy sequential behaviour.
+
+Passing a ``recorder`` (see src/pipeline_metrics.py) times every step and
+records its status. ``skip`` and ``on_success`` support checkpoint/resume
+(see src/pipeline_checkpoint.py).
+"""
+
+import hashlib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStepError(RuntimeError):
+    """Raised when a DAG step fails; carries the failing step name."""
+
+    def __init__(self, step_name: str, cause: BaseException):
+        super().__init__(f"Step '{step_name}' failed: {cause}")
+        self.step_name = step_name
+        self.cause = cause
+
+
+@dataclass
+class PipelineStep:
+    """
+    One unit of work of the pipeline.
+
+    Args:
+        name: Unique step identifier (e.g. "4.1_load_to_reporting").
+        action: Zero-argument callable executed by the scheduler.
+        reads: Tables read by the step ("schema.table" or "schema.*").
+        writes: Tables written by the step ("schema.table" or "schema.*").
+        description: Human readable label for logs.
+        after: Names of earlier steps that must finish first regardless
+               of table overlap.
+        fingerprint: Optional callable returning a digest of the step inputs
+                     (parameters, input files) used by checkpoint/resume.
+    """
+    name: str
+    action: Callable[[], None]
+    reads: Set[str] = field(default_factory=set)
+    writes: Set[str] = field(default_factory=set)
+    description: str = ""
+    after: Set[str] = field(default_factory=set)
+    fingerprint: Optional[Callable[[], str]] = None
+
+
+def _tables_overlap(left: Set[str], right: Set[str]) -> bool:
+    """True if any table of ``left`` matches any table of ``right``."""
+    for a in left:
+        for b in right:
+            if a == b:
+                return True
+            if a.endswith(".*") and b.startswith(a[:-1]):
+                return True
+            if b.endswith(".*") and a.startswith(b[:-1]):
+                return True
+    return False
+
+
+def steps_conflict(earlier: PipelineStep, later: PipelineStep) -> bool:
+    """True if ``later`` must wait for ``earlier`` (RAW, WAR or WAW hazard)."""
+    return (
+        _tables_overlap(earlier.writes, later.reads | later.writes)
+        or _tables_overlap(earlier.reads, later.writes)
+    )
+
+
+class PipelineDAG:
+    """Ordered collection of steps with dependencies derived from table sets."""
+
+    def __init__(self):
+        self.steps: Dict[str, PipelineStep] = {}
+        self.dependencies: Dict[str, Set[str]] = {}
+
+    def add(self, step: PipelineStep) -> PipelineStep:
+        """
+        Register a step. Dependencies are computed against previously added steps.
+
+        Args:
+            step: Step to register.
+
+        Returns:
+            The registered step.
+        """
+        if step.name in self.steps:
+            raise ValueError(f"Duplicate pipeline step: {step.name}")
+        unknown = step.after - set(self.steps)
+        if unknown:
+            raise ValueError(f"Step '{step.name}' declares unknown predecessors: {sorted(unknown)}")
+
+        deps = set(step.after)
+        for previous in self.steps.values():
+            if steps_conflict(previous, step):
+                deps.add(previous.name)
+
+        self.steps[step.name] = step
+        self.dependencies[step.name] = deps
+        return step
+
+    def levels(self) -> List[List[str]]:
+        """
+        Group steps into waves that can run concurrently.
+
+        Returns:
+            List of waves; every step of a wave only depends on earlier waves.
+        """
+        level: Dict[str, int] = {}
+        for name in self.steps:
+            deps = self.dependencies[name]
+            level[name] = 1 + max((level[d] for d in deps), default=-1)
+        waves: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for name, idx in level.items():
+            waves[idx].append(name)
+        return waves
+
+    def describe(self) -> str:
+        """Printable execution plan (one line per wave)."""
+        return "\n".join(
+            f"  Wave {i + 1}: {', '.join(wave)}" for i, wave in enumerate(self.levels())
+        )
+
+    def fingerprints(self, base: str = "") -> Dict[str, str]:
+        """
+        Input fingerprint of every step, chained through its dependencies.
+
+        Args:
+            base: Run-level context mixed into every fingerprint (mode, target DB).
+
+        Returns:
+            Step name → hex digest.
+        """
+        result: Dict[str, str] = {}
+        for name, step in self.steps.items():
+            digest = hashlib.sha256()
+            digest.update(base.encode("utf-8"))
+            digest.update(name.encode("utf-8"))
+            if step.fingerprint is not None:
+                digest.update(str(step.fingerprint()).encode("utf-8"))
+            for dep in sorted(self.dependencies[name]):
+                digest.update(result[dep].encode("utf-8"))
+            result[name] = digest.hexdigest()
+        return result
+
+    def _wrap(self, step: PipelineStep, recorder) -> Callable[[], None]:
+        if recorder is None:
+            return step.action
+
+        def instrumented():
+            with recorder.step(step.name, step.description):
+                step.action()
+        return instrumented
+
+    def run(self, max_workers: int = 4, recorder=None, skip: Optional[Iterable[str]] = None,
+            on_success: Optional[Callable[[str], None]] = None) -> List[str]:
+        """
+        Execute the DAG with at most ``max_workers`` steps in flight.
+
+        On the first failure no new steps are started; running steps are
+        allowed to finish and then a PipelineStepError is raised.
+
+        Args:
+            max_workers: Concurrency cap (should not exceed the connection pool size).
+            recorder: Optional RunRecorder; each step runs inside ``recorder.step()``.
+            skip: Steps already completed (checkpoint); treated as done without running.
+            on_success: Called with the step name right after each step succeeds.
+
+        Returns:
+            Step names in completion order.
+        """
+        max_workers = max(1, int(max_workers))
+        skip = set(skip or ())
+        pending = {name: set(deps) - skip for name, deps in self.dependencies.items()
+                   if name not in skip}
+        completed: List[str] = []
+        failure = None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline") as pool:
+            running = {}
+            while pending or running:
+                if failure is None:
+                    ready = [name for name, deps in pending.items() if not deps]
+                    for name in ready:
+                        del pending[name]
+                        logger.info(f"▶ Starting step {name}")
+                        running[pool.submit(self._wrap(self.steps[name], recorder))] = name
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException as e:  # sys.exit() inside a step lands here too
+                        logger.error(f"❌ Step {name} failed: {e}")
+                        if failure is None:
+                            failure = PipelineStepError(name, e)
+                        continue
+                    completed.append(name)
+                    logger.info(f"✅ Step {name} completed")
+                    if on_success is not None:
+                        on_success(name)
+                    for deps in pending.values():
+                        deps.discard(name)
+
+        if failure is not None:
+            raise failure
+        return completed
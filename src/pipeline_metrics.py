@@ -0,0 +1,273 @@
+"""
+Pipeline Run Instrumentation
+============================
+
+Collects per-step metrics for MASTER_PIPELINE_RUNNER:
+
+- wall time and final status of every DAG step,
+- rows inserted/updated/deleted per table (``pg_stat_xact_user_tables``
+  read inside the step transaction, so it covers everything a CALL touched),
+- server-side ``RAISE NOTICE`` messages (captured from the psycopg2
+  connection instead of being discarded),
+- optionally, ``EXPLAIN (ANALYZE, BUFFERS)`` plans of the statements executed
+  inside each CALL via ``auto_explain`` (a CALL itself cannot be EXPLAINed).
+
+Metrics are persisted to ``reporting.pipeline_run_log`` (V14) and to a JSON
+run report.
+
+Usage:
+    from src.pipeline_metrics import RunRecorder, execute_instrumented
+
+    recorder = RunRecorder(mode="FULL", explain=False)
+    dag.run(max_workers=4, recorder=recorder)        # timing + status per step
+
+    # inside a step, on the step's connection/transaction:
+    execute_instrumented(conn, "CALL reporting.sp_x();", recorder.current_step())
+
+    recorder.write_json(Path("logs/pipeline_runs"))
+    recorder.write_run_log(engine)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Engine, text
+
+logger = logging.getLogger(__name__)
+
+# Rows modified by the current transaction, per table (temp tables excluded).
+_XACT_ROWS_SQL = """
+    SELECT schemaname || '.' || relname AS tabla,
+           n_tup_ins + n_tup_upd + n_tup_del AS filas
+    FROM pg_stat_xact_user_tables
+    WHERE schemaname NOT LIKE 'pg_temp%'
+      AND n_tup_ins + n_tup_upd + n_tup_del > 0
+"""
+
+_RUN_LOG_COLUMNS = [
+    "run_id", "step_name", "modo", "descripcion", "estado", "inicio", "fin",
+    "duracion_ms", "filas_afectadas", "filas_por_tabla", "notices", "planes", "error",
+]
+_JSONB_COLUMNS = {"filas_por_tabla", "notices", "planes"}
+
+
+@dataclass
+class StepMetrics:
+    """Metrics of one pipeline step."""
+    step_name: str
+    descripcion: str = ""
+    estado: str = "RUNNING"
+    inicio: Optional[datetime] = None
+    fin: Optional[datetime] = None
+    duracion_ms: Optional[int] = None
+    filas_afectadas: Optional[int] = None
+    filas_por_tabla: Dict[str, int] = field(default_factory=dict)
+    notices: List[str] = field(default_factory=list)
+    planes: List[Any] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def add_rows(self, per_table: Dict[str, int]) -> None:
+        """Accumulate per-table row counts of one transaction."""
+        for tabla, filas in per_table.items():
+            self.filas_por_tabla[tabla] = self.filas_por_tabla.get(tabla, 0) + int(filas)
+        self.filas_afectadas = sum(self.filas_por_tabla.values())
+
+
+class RunRecorder:
+    """Thread-safe collector of StepMetrics for one pipeline run."""
+
+    def __init__(self, mode: str = "FULL", explain: bool = False, explain_min_ms: int = 100):
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.mode = mode
+        self.explain = explain
+        self.explain_min_ms = explain_min_ms
+        self.started_at = datetime.now()
+        self.steps: Dict[str, StepMetrics] = {}
+        self.carried_rows: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def current_step(self) -> Optional[StepMetrics]:
+        """Metrics of the step running in the calling thread (None outside a step)."""
+        return getattr(self._local, "step", None)
+
+    @contextmanager
+    def step(self, name: str, description: str = ""):
+        """
+        Time a step and record its final status.
+
+        Exceptions (including SystemExit) are recorded and re-raised.
+        """
+        metrics = StepMetrics(step_name=name, descripcion=description, inicio=datetime.now())
+        with self._lock:
+            self.steps[name] = metrics
+        self._local.step = metrics
+        t0 = time.perf_counter()
+        try:
+            yield metrics
+            metrics.estado = "OK"
+        except BaseException as e:
+            metrics.estado = "ERROR"
+            if metrics.error is None:
+                metrics.error = str(e) or type(e).__name__
+            raise
+        finally:
+            metrics.fin = datetime.now()
+            metrics.duracion_ms = int((time.perf_counter() - t0) * 1000)
+            self._local.step = None
+
+    def mark_skipped(self, name: str, description: str = "") -> None:
+        """Record a step skipped by --resume (already completed with the same inputs)."""
+        now = datetime.now()
+        with self._lock:
+            self.steps[name] = StepMetrics(step_name=name, descripcion=description,
+                                           estado="OMITIDO", inicio=now, fin=now, duracion_ms=0)
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for m in self.steps.values():
+            row = asdict(m)
+            row.update(run_id=self.run_id, modo=self.mode)
+            rows.append(row)
+        return rows
+
+    def report(self) -> Dict[str, Any]:
+        """Run report as a JSON-serializable dict."""
+        steps = sorted(self.steps.values(), key=lambda m: m.inicio or self.started_at)
+        return {
+            "run_id": self.run_id,
+            "modo": self.mode,
+            "explain": self.explain,
+            "inicio": self.started_at.isoformat(),
+            "fin": datetime.now().isoformat(),
+            "estado": "ERROR" if any(m.estado == "ERROR" for m in steps) else "OK",
+            "duracion_total_ms": sum(m.duracion_ms or 0 for m in steps),
+            "steps": [asdict(m) for m in steps],
+        }
+
+    def write_json(self, directory: Path) -> Path:
+        """Write ``run_<run_id>.json`` into ``directory`` and return its path."""
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"run_{self.run_id}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False, default=str)
+        return path
+
+    def carry_over(self, engine: Engine) -> None:
+        """
+        Keep the existing run log in memory before a full reset drops the
+        reporting schema; write_run_log() re-inserts it.
+        """
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(
+                    f"SELECT {', '.join(_RUN_LOG_COLUMNS)} FROM reporting.pipeline_run_log"
+                ))
+                self.carried_rows = [dict(r._mapping) for r in result]
+        except Exception:
+            self.carried_rows = []  # first run: table does not exist yet
+
+    def write_run_log(self, engine: Engine) -> None:
+        """Insert carried-over history plus this run into reporting.pipeline_run_log."""
+        values = ", ".join(
+            f"CAST(:{c} AS JSONB)" if c in _JSONB_COLUMNS else f":{c}" for c in _RUN_LOG_COLUMNS
+        )
+        stmt = text(
+            f"INSERT INTO reporting.pipeline_run_log ({', '.join(_RUN_LOG_COLUMNS)}) "
+            f"VALUES ({values}) ON CONFLICT (run_id, step_name) DO NOTHING"
+        )
+        params = []
+        for row in self.carried_rows + self._rows():
+            params.append({
+                c: (json.dumps(row.get(c), default=str) if c in _JSONB_COLUMNS else row.get(c))
+                for c in _RUN_LOG_COLUMNS
+            })
+        if not params:
+            return
+        with engine.begin() as conn:
+            conn.execute(stmt, params)
+
+
+# -----------------------------------------------------------------------------
+# Statement execution
+# -----------------------------------------------------------------------------
+
+def _split_messages(messages) -> tuple:
+    """Separate auto_explain plans (LOG ... plan:) from regular notices."""
+    notices, plans = [], []
+    for raw in messages:
+        msg = str(raw).strip()
+        if msg.startswith("LOG:") and "plan:" in msg:
+            body = msg.split("plan:", 1)[1].strip()
+            try:
+                plans.append(json.loads(body))
+            except ValueError:
+                plans.append(body)
+        else:
+            for prefix in ("NOTICE:", "WARNING:", "INFO:", "LOG:"):
+                if msg.startswith(prefix):
+                    msg = msg[len(prefix):].strip()
+                    break
+            notices.append(msg)
+    return notices, plans
+
+
+def execute_instrumented(conn, query: str, metrics: Optional[StepMetrics],
+                         explain: bool = False, explain_min_ms: int = 100):
+    """
+    Execute ``query`` on an open transaction and attach notices, row counts
+    and (optionally) plans to ``metrics``.
+
+    Args:
+        conn: SQLAlchemy connection inside ``engine.begin()``.
+        query: SQL text (typically a CALL).
+        metrics: Step to annotate; None → plain execute.
+        explain: Capture EXPLAIN (ANALYZE, BUFFERS) of nested statements via auto_explain.
+        explain_min_ms: Only plans of statements slower than this are captured.
+
+    Returns:
+        The SQLAlchemy result of ``query``.
+    """
+    if metrics is None:
+        return conn.execute(text(query))
+
+    raw = conn.connection.dbapi_connection
+    # Unbounded for this call (the psycopg2 default list keeps only 50); the
+    # connection goes back to the pool, so the original list is restored.
+    original_notices = raw.notices
+    raw.notices = deque()
+
+    if explain:
+        conn.execute(text("LOAD 'auto_explain'"))
+        for setting, value in (
+            ("auto_explain.log_min_duration", str(int(explain_min_ms))),
+            ("auto_explain.log_analyze", "on"),
+            ("auto_explain.log_buffers", "on"),
+            ("auto_explain.log_nested_statements", "on"),
+            ("auto_explain.log_format", "json"),
+            ("client_min_messages", "log"),
+        ):
+            conn.execute(text("SELECT set_config(:k, :v, true)"), {"k": setting, "v": value})
+
+    try:
+        result = conn.execute(text(query))
+        per_table = {r.tabla: r.filas for r in conn.execute(text(_XACT_ROWS_SQL))}
+        metrics.add_rows(per_table)
+        return result
+    finally:
+        notices, plans = _split_messages(raw.notices)
+        raw.notices = original_notices
+        metrics.notices.extend(notices)
+        metrics.planes.extend(plans)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Rangos Catalog
+==============
+
+Compiled catalog of the VARIABLES_PETROLERAS range modules in
+inputs_referencial/Rangos_*.py (client original, _limpio, _sincronizado...).
+
+Build step (python -m src.rangos_catalog): every Rangos_*.py is parsed with
+``ast``, without executing it. Only literals and the type names
+float/int/str/bool/tuple/list/dict are accepted (``tipo`` is stored as the
+type name, e.g. "float"). The ``# ID:<id_formato1>`` comment above an entry
+links it to tbl_maestra_variables. The entries are then validated
+(numeric Rango_Min <= Rango_Max, literal ejemplo, string descripcion/unidad)
+and written to inputs_referencial/rangos_catalog.json, together with the
+format version and the SHA-256 of each source module.
+
+Runtime: ``catalog()`` loads the JSON once per process (cached) and never
+imports the source modules or scans their text. If a source module changed
+after the last build (hash mismatch), the catalog is recompiled (AST only)
+and rewritten before it is returned. ``--check`` fails on a stale artifact.
+
+Usage:
+    from src.rangos_catalog import catalog
+
+    limpio = catalog().source("Rangos_validacion_variables_petroleras_limpio")
+    for id_formato1, nombre in limpio.ids:
+        data = limpio.variables[nombre]
+        print(id_formato1, data["Rango_Min"], data["Rango_Max"])
+
+    python -m src.rangos_catalog           # (re)build the artifact
+    python -m src.rangos_catalog --check   # exit 1 if stale or invalid
+"""
+
+import argparse
+import ast
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 1
+SOURCE_DIR = "inputs_referencial"
+SOURCE_GLOB = "Rangos_*.py"
+CATALOG_PATH = os.path.join(SOURCE_DIR, "rangos_catalog.json")
+VARIABLE_NAME = "VARIABLES_PETROLERAS"
+
+_TYPE_NAMES = {"float", "int", "str", "bool", "tuple", "list", "dict"}
+_ID_COMMENT = re.compile(r"#\s*ID:\s*(\d+)", re.I)
+
+
+class RangosCatalogError(Exception):
+    """A source module cannot be compiled, or the artifact is invalid."""
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _literal(node, where: str):
+    """ast.literal_eval plus bare type names (-> their name)."""
+    if isinstance(node, ast.Name):
+        if node.id in _TYPE_NAMES:
+            return node.id
+        raise RangosCatalogError(f"{where}: unsupported name '{node.id}' at line {node.lineno}")
+    if isinstance(node, ast.Dict):
+        return {_literal(k, where): _literal(v, where) for k, v in zip(node.keys, node.values)}
+    if isinstance(node, (ast.Tuple, ast.List)):
+        return [_literal(e, where) for e in node.elts]
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise RangosCatalogError(f"{where}: non-literal expression at line {node.lineno}") from None
+
+
+def _id_comments(source: str) -> List[Tuple[int, int]]:
+    """(line, id_formato1) of every '# ID:' comment."""
+    found = []
+    for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+        if tok.type == tokenize.COMMENT:
+            m = _ID_COMMENT.match(tok.string)
+            if m:
+                found.append((tok.start[0], int(m.group(1))))
+    return found
+
+
+def _validate(name: str, key: str, data) -> List[str]:
+    where = f"{name}:{key}"
+    if not isinstance(data, dict):
+        return [f"{where}: entry is not a dict"]
+    problems = []
+    for field in ("descripcion", "unidad"):
+        if field in data and not isinstance(data[field], str):
+            problems.append(f"{where}: {field} must be a string")
+    if "tipo" in data and data["tipo"] not in _TYPE_NAMES:
+        problems.append(f"{where}: tipo must be a type name")
+    rmin, rmax = data.get("Rango_Min"), data.get("Rango_Max")
+    for field, value in (("Rango_Min", rmin), ("Rango_Max", rmax)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            problems.append(f"{where}: {field} must be numeric or None")
+    if not problems and rmin is not None and rmax is not None and rmin > rmax:
+        problems.append(f"{where}: Rango_Min {rmin} > Rango_Max {rmax}")
+    ejemplo = data.get("ejemplo")
+    if ejemplo is not None and not isinstance(ejemplo, (int, float, str, list)):
+        problems.append(f"{where}: ejemplo must be a literal")
+    return problems
+
+
+def compile_source(path: str) -> dict:
+    """
+    Parse one Rangos_*.py module without executing it.
+
+    Returns:
+        {archivo, sha256, variables: {nombre: entry}, ids: [[id_formato1, nombre], ...]}
+        ``ids`` follows file order; a key repeated in the dict keeps its last
+        value (as Python would) but every ID link is kept.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        raise RangosCatalogError(f"{name}: {e}") from None
+
+    node = None
+    for stmt in tree.body:
+        if (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1
+                and isinstance(stmt.targets[0], ast.Name) and stmt.targets[0].id == VARIABLE_NAME):
+            node = stmt.value
+    if not isinstance(node, ast.Dict):
+        raise RangosCatalogError(f"{name}: no {VARIABLE_NAME} = {{...}} literal")
+
+    variables, keys, problems = {}, [], []
+    for k, v in zip(node.keys, node.values):
+        if not (isinstance(k, ast.Constant) and isinstance(k.value, str)):
+            raise RangosCatalogError(f"{name}: non-string key at line {v.lineno}")
+        variables[k.value] = _literal(v, name)
+        keys.append((k.lineno, k.value))
+    for key, data in variables.items():
+        problems.extend(_validate(name, key, data))
+    if problems:
+        raise RangosCatalogError("; ".join(problems))
+
+    # Each '# ID:' comment belongs to the first key that follows it
+    ids = []
+    for line, id_formato1 in _id_comments(source):
+        following = next((key for key_line, key in keys if key_line > line), None)
+        if following is not None:
+            ids.append([id_formato1, following])
+
+    return {"archivo": os.path.basename(path), "sha256": _sha256(path),
+            "variables": variables, "ids": ids}
+
+
+def source_paths(source_dir: str = SOURCE_DIR) -> List[str]:
+    return sorted(glob.glob(os.path.join(source_dir, SOURCE_GLOB)))
+
+
+def build(source_dir: str = SOURCE_DIR, out_path: Optional[str] = CATALOG_PATH) -> dict:
+    """Compile every source module into one catalog dict and write it to out_path."""
+    paths = source_paths(source_dir)
+    if not paths:
+        raise RangosCatalogError(f"no {SOURCE_GLOB} in {source_dir}")
+    data = {
+        "version": CATALOG_VERSION,
+        "fuentes": {os.path.splitext(os.path.basename(p))[0]: compile_source(p) for p in paths},
+    }
+    if out_path:
+        tmp = out_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        os.replace(tmp, out_path)
+    return data
+
+
+def stale_sources(data: dict, source_dir: str = SOURCE_DIR) -> List[str]:
+    """Source modules added, removed or changed since the catalog was built."""
+    built = {name: src["sha256"] for name, src in data.get("fuentes", {}).items()}
+    current = {os.path.splitext(os.path.basename(p))[0]: p for p in source_paths(source_dir)}
+    stale = sorted(set(built) ^ set(current))
+    stale += sorted(n for n in set(built) & set(current) if _sha256(current[n]) != built[n])
+    return stale
+
+
+# ---------------------------------------------------------------------------
+# Runtime accessor
+# ---------------------------------------------------------------------------
+
+class RangosSource:
+    """One compiled module: ``variables`` (nombre -> entry) and ``ids`` ([(id_formato1, nombre)])."""
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.sha256 = data["sha256"]
+        self.variables: Dict[str, dict] = data["variables"]
+        self.ids: List[Tuple[int, str]] = [(int(i), n) for i, n in data["ids"]]
+
+    def by_id(self) -> Dict[int, str]:
+        """id_formato1 -> nombre (first link wins)."""
+        out = {}
+        for id_formato1, nombre in self.ids:
+            out.setdefault(id_formato1, nombre)
+        return out
+
+
+class RangosCatalog:
+    def __init__(self, data: dict):
+        if data.get("version") != CATALOG_VERSION:
+            raise RangosCatalogError(f"catalog version {data.get('version')} != {CATALOG_VERSION}; rebuild it")
+        self._sources = {name: RangosSource(name, src) for name, src in data["fuentes"].items()}
+
+    def names(self) -> List[str]:
+        return sorted(self._sources)
+
+    def source(self, name: str) -> RangosSource:
+        name = os.path.splitext(os.path.basename(name))[0]
+        try:
+            return self._sources[name]
+        except KeyError:
+            raise RangosCatalogError(f"{name} is not in the catalog ({', '.join(self.names())})") from None
+
+    def variables(self, name: str) -> Dict[str, dict]:
+        return self.source(name).variables
+
+
+_cache: Dict[str, RangosCatalog] = {}
+_lock = threading.Lock()
+
+
+def catalog(path: str = CATALOG_PATH, source_dir: str = SOURCE_DIR) -> RangosCatalog:
+    """Load (once per process) the compiled catalog; recompile it if a source changed."""
+    key = os.path.abspath(path)
+    with _lock:
+        if key not in _cache:
+            data = None
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                stale = stale_sources(data, source_dir)
+                if stale or data.get("version") != CATALOG_VERSION:
+                    logger.info(f"Rangos catalog stale ({', '.join(stale) or 'version'}), recompiling")
+                    data = None
+            if data is None:
+                data = build(source_dir, path)
+            _cache[key] = RangosCatalog(data)
+        return _cache[key]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compile inputs_referencial/Rangos_*.py into rangos_catalog.json")
+    parser.add_argument("--check", action="store_true", help="only verify the artifact is current and valid")
+    parser.add_argument("--out", default=CATALOG_PATH)
+    parser.add_argument("--source-dir", default=SOURCE_DIR)
+    args = parser.parse_args()
+
+    if args.check:
+        if not os.path.exists(args.out):
+            print(f"MISSING {args.out}")
+            return 1
+        with open(args.out, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        stale = stale_sources(data, args.source_dir)
+        if stale or data.get("version") != CATALOG_VERSION:
+            print(f"STALE {', '.join(stale) or 'version'}")
+            return 1
+        RangosCatalog(data)
+        print(f"OK {args.out}")
+        return 0
+
+    data = build(args.source_dir, args.out)
+    for name, src in data["fuentes"].items():
+        print(f"{name}: {len(src['variables'])} variables, {len(src['ids'])} IDs")
+    print(f"-> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
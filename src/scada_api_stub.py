@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+SCADA API Stub
+==============
+
+Local HTTP stand-in for the Hydrog SCADA API endpoint used by
+extract_scada_api.py (POST {url}/get-latest-data-full/{unit_id}/{location_id}).
+
+Serves synthetic readings with the same JSON shape as the real API
+(unit_idn, unit_location_idn, var_idn, measure, moddate, modtime) from a
+ThreadingHTTPServer on 127.0.0.1 and an ephemeral port. Latency and a
+transient failure rate (HTTP 503) can be injected to exercise the
+extractor's concurrency cap, retries and backoff without touching the real
+API or its credentials.
+
+Usage:
+    from src.scada_api_stub import ScadaApiStub
+
+    with ScadaApiStub(latency_s=0.2, fail_rate=0.1) as stub:
+        run_extraccion(pares, base_url=stub.url)
+        print(stub.requests, stub.failures)
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# IDN served per unit (subset of inputs_referencial/07_var_scada_map.csv)
+DEFAULT_VAR_IDS = (727, 12058, 12059, 11, 692, 717, 12295, 12277, 137, 131, 140,
+                   740, 741, 772, 284, 1216, 1217, 286, 715, 716, 694, 3)
+
+_PATH = re.compile(r"^/get-latest-data-full/(\d+)/(\d+)/?$")
+
+
+class ScadaApiStub:
+    """Threaded local HTTP server mimicking get-latest-data-full."""
+
+    def __init__(self, var_ids=DEFAULT_VAR_IDS, latency_s: float = 0.05,
+                 fail_rate: float = 0.0, seed=None):
+        self.var_ids = tuple(var_ids)
+        self.latency_s = latency_s
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.failures = 0
+        self.url = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def _payload(self, unit_id: int, location_id: int) -> list:
+        now = datetime.now().replace(second=0, microsecond=0)
+        rows = []
+        for var_id in self.var_ids:
+            measure = "true" if var_id == 3 else f"{self._random.uniform(0, 1000):.3f}"
+            rows.append({
+                "unit_idn": unit_id,
+                "unit_location_idn": location_id,
+                "var_idn": var_id,
+                "measure": measure,
+                "moddate": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "modtime": now.strftime("%H:%M:%S"),
+            })
+        return rows
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                match = _PATH.match(self.path)
+                with stub._lock:
+                    stub.requests += 1
+                    fail = stub._random.random() < stub.fail_rate
+                    if fail:
+                        stub.failures += 1
+                time.sleep(stub.latency_s)
+                if not match:
+                    self.send_error(404)
+                    return
+                if fail:
+                    self.send_error(503, "stub transient failure")
+                    return
+                with stub._lock:
+                    body = json.dumps(stub._payload(int(match.group(1)), int(match.group(2))))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body.encode("utf-8"))
+
+            def log_message(self, format, *args):  # silence per-request stderr logging
+                pass
+
+        return Handler
+
+    def start(self) -> "ScadaApiStub":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="scada-api-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ScadaApiStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -10,6 +10,11 @@
 --
 -- Autor: ML Engineering Team / ITMEET GIA
 -- Fecha: 2025-11-18
+--
+-- LEGACY: reemplazado por stage.sp_pivot_landing_to_produccion()
+--   (src/sql/schema/V6.4__landing_pivot_engine.sql), que genera el pivot desde
+--   referencial.tbl_var_scada_map (inputs_referencial/07_var_scada_map.csv).
+--   Se conserva como referencia del mapeo original ID ↔ IDN.
 -- ============================================================================
 
 -- Iniciar transacción
@@ -279,16 +284,16 @@ WITH PivotedData AS (
         -- ====================================================================
         
         -- ID: 155 | IDN: 10000 | Current Inch Surface Card
-        MAX(CASE WHEN l.var_id = 10000 THEN CAST(l.measure AS TEXT) END) AS surface_rod_position,
+        stage.fnc_card_parse(MAX(CASE WHEN l.var_id = 10000 THEN CAST(l.measure AS TEXT) END)) AS surface_rod_position,
         
         -- ID: 156 | IDN: 10001 | Current Lb Surface Card
-        MAX(CASE WHEN l.var_id = 10001 THEN CAST(l.measure AS TEXT) END) AS surface_rod_load,
+        stage.fnc_card_parse(MAX(CASE WHEN l.var_id = 10001 THEN CAST(l.measure AS TEXT) END)) AS surface_rod_load,
         
         -- ID: 157 | IDN: 10002 | Current Inch Downhole Pump Card
-        MAX(CASE WHEN l.var_id = 10002 THEN CAST(l.measure AS TEXT) END) AS downhole_pump_position,
+        stage.fnc_card_parse(MAX(CASE WHEN l.var_id = 10002 THEN CAST(l.measure AS TEXT) END)) AS downhole_pump_position,
         
         -- ID: 158 | IDN: 10003 | Current Lb Downhole Pump Card
-        MAX(CASE WHEN l.var_id = 10003 THEN CAST(l.measure AS TEXT) END) AS downhole_pump_load,
+        stage.fnc_card_parse(MAX(CASE WHEN l.var_id = 10003 THEN CAST(l.measure AS TEXT) END)) AS downhole_pump_load,
 
         -- ====================================================================
         -- MISCELANEOS
@@ -198,7 +198,8 @@ COMMENT ON PROCEDURE reporting.sp_calcular_derivados_current_values IS
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.sp_calcular_derivados_horarios(
     p_fecha_inicio DATE DEFAULT NULL,
-    p_fecha_fin DATE DEFAULT NULL
+    p_fecha_fin DATE DEFAULT NULL,
+    p_well_ids INT[] DEFAULT NULL
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -223,6 +224,7 @@ BEGIN
     LEFT JOIN stage.tbl_pozo_reservas res ON dp.pozo_id = res.well_id
     WHERE fh.pozo_id = dp.pozo_id
       AND EXISTS (SELECT 1 FROM reporting.dim_tiempo dt WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND (fh.fluid_level_tvd_ft IS NULL 
            OR fh.tank_fluid_temp_f IS NULL
            OR fh.bouyant_rod_weight_lb IS NULL);
@@ -243,6 +245,7 @@ BEGIN
     FROM reporting.fact_operaciones_diarias fd
     WHERE fh.fecha_id = fd.fecha_id AND fh.pozo_id = fd.pozo_id
       AND EXISTS (SELECT 1 FROM reporting.dim_tiempo dt WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND fh.lift_efficiency_pct IS NULL;
     
     GET DIAGNOSTICS v_count = ROW_COUNT;
@@ -256,12 +259,16 @@ $$;
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.sp_calcular_promedios_diarios(
     p_fecha_inicio DATE DEFAULT NULL,
-    p_fecha_fin DATE DEFAULT NULL
+    p_fecha_fin DATE DEFAULT NULL,
+    p_well_ids INT[] DEFAULT NULL
 )
 LANGUAGE plpgsql AS $$
 DECLARE
     v_fecha_inicio DATE := COALESCE(p_fecha_inicio, CURRENT_DATE - INTERVAL '30 days');
     v_fecha_fin DATE := COALESCE(p_fecha_fin, CURRENT_DATE);
+    -- Rango semiabierto sargable sobre stage.tbl_pozo_produccion.timestamp_lectura
+    v_ts_inicio TIMESTAMP := v_fecha_inicio::TIMESTAMP;
+    v_ts_fin_excl TIMESTAMP := (v_fecha_fin + 1)::TIMESTAMP;
     v_count INT := 0;
     v_start_time TIMESTAMP := clock_timestamp();
 BEGIN
@@ -280,6 +287,7 @@ BEGIN
         FROM reporting.fact_operaciones_horarias fh
         JOIN reporting.dim_tiempo dt ON fh.fecha_id = dt.fecha_id
         WHERE dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin
+          AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
         GROUP BY fh.fecha_id, fh.pozo_id
     )
     UPDATE reporting.fact_operaciones_diarias fd SET
@@ -309,7 +317,9 @@ BEGIN
             AVG(p.potencia_actual_motor) AS avg_motor_power,
             AVG(p.fluid_flow_monitor_bpd) AS avg_fluid_flow
         FROM stage.tbl_pozo_produccion p
-        WHERE DATE(p.timestamp_lectura) BETWEEN v_fecha_inicio AND v_fecha_fin
+        WHERE p.timestamp_lectura >= v_ts_inicio
+          AND p.timestamp_lectura <  v_ts_fin_excl
+          AND (p_well_ids IS NULL OR p.well_id = ANY(p_well_ids))
         GROUP BY TO_CHAR(p.timestamp_lectura, 'YYYYMMDD')::INT, p.well_id
     )
     UPDATE reporting.fact_operaciones_diarias fd SET
@@ -340,7 +350,8 @@ $$;
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.sp_completar_fact_diarias(
     p_fecha_inicio DATE DEFAULT NULL,
-    p_fecha_fin DATE DEFAULT NULL
+    p_fecha_fin DATE DEFAULT NULL,
+    p_well_ids INT[] DEFAULT NULL
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -382,6 +393,7 @@ BEGIN
     WHERE fecha_id IN (
         SELECT fecha_id FROM reporting.dim_tiempo WHERE fecha BETWEEN v_fecha_inicio AND v_fecha_fin
     )
+    AND (p_well_ids IS NULL OR pozo_id = ANY(p_well_ids))
     AND (kpi_mtbf_hrs IS NULL OR eur_modelo_arps IS NULL);
     
     GET DIAGNOSTICS v_count = ROW_COUNT;
@@ -395,7 +407,8 @@ $$;
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.sp_reagregar_mensuales(
     p_fecha_inicio DATE DEFAULT NULL,
-    p_fecha_fin DATE DEFAULT NULL
+    p_fecha_fin DATE DEFAULT NULL,
+    p_well_ids INT[] DEFAULT NULL
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -429,6 +442,7 @@ BEGIN
         FROM reporting.fact_operaciones_diarias fd
         JOIN reporting.dim_tiempo dt ON fd.fecha_id = dt.fecha_id
         WHERE dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin
+          AND (p_well_ids IS NULL OR fd.pozo_id = ANY(p_well_ids))
         GROUP BY dt.anio_mes, fd.pozo_id
     ) agg
     LEFT JOIN stage.tbl_pozo_reservas res ON agg.pozo_id = res.well_id
@@ -481,7 +495,8 @@ $$;
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.sp_calcular_kpis_horarios(
     p_fecha_inicio DATE DEFAULT NULL,
-    p_fecha_fin DATE DEFAULT NULL
+    p_fecha_fin DATE DEFAULT NULL,
+    p_well_ids INT[] DEFAULT NULL
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -544,6 +559,7 @@ BEGIN
         kpi_uptime_pct = ROUND((fh.tiempo_operacion_min / 60.0 * 100)::NUMERIC, 2)
     WHERE EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                   WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND fh.kpi_uptime_pct IS NULL
       AND fh.tiempo_operacion_min IS NOT NULL;
 
@@ -558,6 +574,7 @@ BEGIN
         , 4)
     WHERE EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                   WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND fh.kpi_kwh_bbl IS NULL
       AND fh.produccion_fluido_bbl > 0
       AND fh.motor_power_hp IS NOT NULL
@@ -581,6 +598,7 @@ BEGIN
     WHERE fh.pozo_id = dp.pozo_id
       AND EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                   WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND fh.volumen_teorico_hora_bbl IS NULL
       AND dp.diametro_embolo_bomba_in IS NOT NULL
       AND COALESCE(fh.current_stroke_length_in, dp.longitud_carrera_nominal_unidad_in) IS NOT NULL
@@ -597,6 +615,7 @@ BEGIN
         )
     WHERE EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                   WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND fh.kpi_efic_vol_pct IS NULL
       AND fh.volumen_teorico_hora_bbl > 0
       AND fh.produccion_fluido_bbl > 0;
@@ -621,6 +640,7 @@ BEGIN
         FROM reporting.fact_operaciones_horarias fh
         WHERE EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                       WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+          AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
           AND fh.kpi_mtbf_hrs IS NULL
     )
     UPDATE reporting.fact_operaciones_horarias fh SET
@@ -661,6 +681,7 @@ BEGIN
     WHERE fh.pozo_id = dp.pozo_id
       AND EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                   WHERE dt.fecha_id = fh.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+      AND (p_well_ids IS NULL OR fh.pozo_id = ANY(p_well_ids))
       AND (fh.kpi_mtbf_target IS NULL OR fh.kpi_uptime_target IS NULL 
            OR fh.kpi_kwh_bbl_target IS NULL OR fh.kpi_vol_eff_target IS NULL
            OR fh.kpi_lift_eff_target IS NULL OR fh.kpi_ai_accuracy_target IS NULL);
@@ -686,6 +707,7 @@ BEGIN
         FROM reporting.fact_operaciones_horarias fh2
         WHERE EXISTS (SELECT 1 FROM reporting.dim_tiempo dt 
                       WHERE dt.fecha_id = fh2.fecha_id AND dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin)
+          AND (p_well_ids IS NULL OR fh2.pozo_id = ANY(p_well_ids))
           AND (fh2.kpi_mtbf_variance_pct IS NULL OR fh2.kpi_uptime_variance_pct IS NULL
                OR fh2.kpi_kwh_bbl_variance_pct IS NULL OR fh2.kpi_vol_eff_variance_pct IS NULL
                OR fh2.kpi_lift_eff_variance_pct IS NULL)
@@ -757,7 +779,8 @@ CREATE OR REPLACE PROCEDURE reporting.sp_calcular_derivados_completos(
     p_fecha_fin DATE DEFAULT NULL,
     p_incluir_current_values BOOLEAN DEFAULT TRUE,
     p_incluir_promedios_diarios BOOLEAN DEFAULT TRUE,
-    p_incluir_kpis_business BOOLEAN DEFAULT TRUE
+    p_incluir_kpis_business BOOLEAN DEFAULT TRUE,
+    p_well_ids INT[] DEFAULT NULL          -- NULL = todos los pozos (modo incremental: solo afectados)
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -772,20 +795,20 @@ BEGIN
     END IF;
     
     -- Derivados horarios (fluid_level, buoyant_rod, tank_temp, lift_eff)
-    CALL reporting.sp_calcular_derivados_horarios(p_fecha_inicio, p_fecha_fin);
+    CALL reporting.sp_calcular_derivados_horarios(p_fecha_inicio, p_fecha_fin, p_well_ids);
     
     -- KPIs horarios + semáforos (MTBF, Uptime, kWh/bbl, Vol Eff, AI Accuracy, Lift Eff)
-    CALL reporting.sp_calcular_kpis_horarios(p_fecha_inicio, p_fecha_fin);
+    CALL reporting.sp_calcular_kpis_horarios(p_fecha_inicio, p_fecha_fin, p_well_ids);
     
     IF p_incluir_promedios_diarios THEN
-        CALL reporting.sp_calcular_promedios_diarios(p_fecha_inicio, p_fecha_fin);
+        CALL reporting.sp_calcular_promedios_diarios(p_fecha_inicio, p_fecha_fin, p_well_ids);
     END IF;
     
     -- Completar diarias (MTBF, EUR)
-    CALL reporting.sp_completar_fact_diarias(p_fecha_inicio, p_fecha_fin);
+    CALL reporting.sp_completar_fact_diarias(p_fecha_inicio, p_fecha_fin, p_well_ids);
     
     -- Re-agregar mensuales desde diarias actualizadas
-    CALL reporting.sp_reagregar_mensuales(p_fecha_inicio, p_fecha_fin);
+    CALL reporting.sp_reagregar_mensuales(p_fecha_inicio, p_fecha_fin, p_well_ids);
     
     IF p_incluir_kpis_business THEN
         CALL reporting.sp_calcular_kpis_business(COALESCE(p_fecha_fin, CURRENT_DATE));
@@ -1,7 +1,7 @@
 -- =============================================================================
 -- V10__universal_to_reporting_bridge.sql
--- VERSION: 1.0.0
--- FECHA:   2026-02-16
+-- VERSION: 2.2.0
+-- FECHA:   2026-10-18
 -- =============================================================================
 --
 -- DESCRIPCIÓN:
@@ -39,13 +39,22 @@
 --   • reporting schema V4  (dataset_current_values,
 --                           fact_operaciones_horarias, fact_operaciones_mensuales)
 --   • referencial.fnc_evaluar_variable()  (V7 — clasificación semáforo)
+--   • reporting.bridge_cambios            (V22 — change log por fuente)
 --
--- INVOCACIÓN:
---   Se deben llamar DESPUÉS de que los módulos ML/Python escriban en universal.
---   Ejemplo en MASTER_PIPELINE_RUNNER.py (futuro):
+-- INVOCACIÓN (INCREMENTAL):
+--   Los triggers de V22 registran en reporting.bridge_cambios cada cambio de
+--   universal (stroke COMPLETADO, diagnóstico, validación, IPR, ARPS), las
+--   horas nuevas de fact_operaciones_horarias y los meses nuevos o con Np
+--   cambiado de fact_operaciones_mensuales. Cada SP consume (DELETE ...
+--   RETURNING) los cambios de su fuente y recalcula solo los pozos y horas
+--   afectados; sin cambios no hace nada. Se puede invocar
+--   cada pocos minutos mientras ML escribe resultados:
 --     CALL reporting.sp_sync_cdi_to_reporting();
 --     CALL reporting.sp_sync_ipr_to_reporting();
 --     CALL reporting.sp_sync_arps_to_reporting();
+--   p_completo => TRUE recalcula todos los pozos (tras un full reset o una
+--   recarga de facts), igual que la versión 1.0.0:
+--     CALL reporting.sp_sync_cdi_to_reporting(p_completo => TRUE);
 --
 -- COLUMNAS REPORTING DESTINO (ya existen en el DDL actual):
 --   dataset_current_values:
@@ -59,132 +68,235 @@
 -- =============================================================================
 
 
+
+-- =============================================================================
+-- FUNCIÓN AUXILIAR: AI ACCURACY DE UN STROKE
+-- =============================================================================
+-- Top-1 del diagnóstico ML del stroke comparado con la validación experta más
+-- reciente: 1.0 si coincide el patrón, 0.0 si difiere, score ML como proxy
+-- si no hay validación. NULL si el stroke no tiene diagnósticos.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION reporting.fnc_cdi_accuracy(p_stroke_id BIGINT)
+RETURNS NUMERIC
+LANGUAGE sql STABLE AS $$
+    SELECT CASE
+               WHEN ve.patron_id IS NULL       THEN td.score
+               WHEN ve.patron_id = td.patron_id THEN 1.0
+               ELSE 0.0
+           END
+    FROM (
+        SELECT patron_id, score
+        FROM universal.diagnostico
+        WHERE stroke_id = p_stroke_id
+        ORDER BY score DESC
+        LIMIT 1
+    ) td
+    LEFT JOIN LATERAL (
+        SELECT patron_id
+        FROM universal.validacion_experta
+        WHERE stroke_id = p_stroke_id
+        ORDER BY updated_at DESC
+        LIMIT 1
+    ) ve ON true;
+$$;
+
+
 -- =============================================================================
 -- SP 1: CDI → REPORTING
 -- =============================================================================
--- Sincroniza el diagnóstico más reciente de cada pozo desde el subsistema CDI
--- (patron → stroke → diagnostico) hacia las tablas de reporting.
+-- Sincroniza los diagnósticos CDI (patron → stroke → diagnostico) de los
+-- strokes registrados en bridge_cambios (fuente 'CDI') hacia reporting.
 --
 -- Lógica:
---   1. Para cada pozo, toma el stroke más reciente con estado 'COMPLETADO'
---   2. Del ese stroke, toma el diagnóstico con mayor score (top-1 patrón)
---   3. Calcula ai_accuracy_pct comparando score ML vs validación experta
---      (si existe validación) o usa score directo como confidence
---   4. Actualiza dataset_current_values con el resultado + semáforo
---   5. Actualiza dataset_latest_dynacard con el patrón detectado
---   6. Actualiza fact_operaciones_horarias con el accuracy de la hora
+--   0. Consume los cambios CDI: pozos y strokes afectados, y rangos de horas
+--      nuevas de fact_operaciones_horarias (filas con hasta)
+--   1. dataset_current_values: por pozo con strokes cambiados, el stroke
+--      COMPLETADO más reciente → accuracy + semáforo
+--   2. fact_operaciones_horarias: por hora afectada (hora de cada stroke
+--      cambiado u hora nueva con strokes COMPLETADO), el stroke COMPLETADO
+--      más reciente de esa hora → accuracy
 -- =============================================================================
 
-CREATE OR REPLACE PROCEDURE reporting.sp_sync_cdi_to_reporting()
+CREATE OR REPLACE PROCEDURE reporting.sp_sync_cdi_to_reporting(p_completo BOOLEAN DEFAULT FALSE)
 LANGUAGE plpgsql AS $$
 DECLARE
-    v_eval RECORD;
+    v_wells   INT[];
+    v_strokes BIGINT[];
+    v_h_wells INT[];
+    v_h_desde TIMESTAMPTZ[];
+    v_h_hasta TIMESTAMPTZ[];
+    v_pozos   INT := 0;
+    v_horas   INT := 0;
 BEGIN
     -- ─────────────────────────────────────────────────────────────
-    -- PASO 1: Obtener diagnóstico top-1 más reciente por pozo
+    -- PASO 0: Consumir cambios (pozos + strokes, rangos de horas nuevas)
     -- ─────────────────────────────────────────────────────────────
-    -- CTE que reúne: well_id, timestamp, patrón ganador, score, 
-    -- y opcionalmente la validación experta para calcular accuracy
-    WITH latest_stroke AS (
-        SELECT DISTINCT ON (pp.well_id)
-            pp.well_id,
-            pp.timestamp_lectura,
-            s.stroke_id,
-            s.estado
+    WITH c AS (
+        DELETE FROM reporting.bridge_cambios
+        WHERE fuente = 'CDI'
+        RETURNING cambio_id, well_id, stroke_id, desde, hasta
+    )
+    SELECT array_agg(DISTINCT well_id)   FILTER (WHERE stroke_id IS NOT NULL),
+           array_agg(DISTINCT stroke_id) FILTER (WHERE stroke_id IS NOT NULL),
+           array_agg(well_id ORDER BY cambio_id) FILTER (WHERE hasta IS NOT NULL),
+           array_agg(desde   ORDER BY cambio_id) FILTER (WHERE hasta IS NOT NULL),
+           array_agg(hasta   ORDER BY cambio_id) FILTER (WHERE hasta IS NOT NULL)
+    INTO v_wells, v_strokes, v_h_wells, v_h_desde, v_h_hasta
+    FROM c;
+
+    IF p_completo THEN
+        SELECT array_agg(DISTINCT pp.well_id), array_agg(s.stroke_id)
+        INTO v_wells, v_strokes
         FROM universal.stroke s
         JOIN stage.tbl_pozo_produccion pp ON pp.produccion_id = s.produccion_id
-        WHERE s.estado = 'COMPLETADO'
-        ORDER BY pp.well_id, pp.timestamp_lectura DESC
-    ),
-    top_diagnostico AS (
-        SELECT DISTINCT ON (ls.well_id)
-            ls.well_id,
-            ls.timestamp_lectura,
-            ls.stroke_id,
-            d.patron_id,
-            p.nombre       AS pattern_name,
-            p.criticidad   AS pattern_criticality,
-            d.score        AS ml_score
-        FROM latest_stroke ls
-        JOIN universal.diagnostico d ON d.stroke_id = ls.stroke_id
-        JOIN universal.patron p      ON p.patron_id = d.patron_id
-        ORDER BY ls.well_id, d.score DESC
-    ),
-    with_validation AS (
-        SELECT
-            td.*,
-            -- Si hay validación experta, accuracy = 1.0 si coincide patrón, 
-            -- 0.0 si difiere. Si no hay validación, usar ml_score como proxy.
-            COALESCE(
-                CASE WHEN ve.patron_id = td.patron_id THEN 1.0 ELSE 0.0 END,
-                td.ml_score::NUMERIC
-            ) AS ai_accuracy_pct
-        FROM top_diagnostico td
-        LEFT JOIN LATERAL (
-            SELECT patron_id
-            FROM universal.validacion_experta
-            WHERE stroke_id = td.stroke_id
-            ORDER BY updated_at DESC
-            LIMIT 1
-        ) ve ON true
-    )
+        WHERE s.estado = 'COMPLETADO';
+    END IF;
+
+    IF v_wells IS NULL AND v_h_wells IS NULL THEN
+        RAISE NOTICE '[CDI→REPORTING] Sin cambios.';
+        RETURN;
+    END IF;
 
     -- ─────────────────────────────────────────────────────────────
-    -- PASO 2: Actualizar dataset_current_values
+    -- PASO 1: dataset_current_values (stroke más reciente por pozo)
     -- ─────────────────────────────────────────────────────────────
+    -- Recorre uq_scada_timestamp_pozo (well_id, timestamp_lectura) hacia
+    -- atrás hasta el primer stroke COMPLETADO de cada pozo afectado.
+    WITH latest_stroke AS (
+        SELECT w.well_id, ls.stroke_id
+        FROM unnest(v_wells) AS w(well_id)
+        CROSS JOIN LATERAL (
+            SELECT s.stroke_id
+            FROM stage.tbl_pozo_produccion pp
+            JOIN universal.stroke s ON s.produccion_id = pp.produccion_id
+            WHERE pp.well_id = w.well_id
+              AND s.estado = 'COMPLETADO'
+            ORDER BY pp.timestamp_lectura DESC
+            LIMIT 1
+        ) ls
+    ),
+    evaluado AS (
+        SELECT
+            dcv.well_id,
+            a.ai_accuracy_pct,
+            ev.status_color,
+            ev.status_level,
+            ev.status_label,
+            ev.severity_label
+        FROM latest_stroke ls
+        CROSS JOIN LATERAL (SELECT reporting.fnc_cdi_accuracy(ls.stroke_id) AS ai_accuracy_pct) a
+        JOIN reporting.dataset_current_values dcv ON dcv.well_id = ls.well_id
+        CROSS JOIN LATERAL referencial.fnc_evaluar_variable(
+            'ai_accuracy',
+            a.ai_accuracy_pct * 100,
+            dcv.ai_accuracy_target,
+            NULL::NUMERIC,            -- sin baseline
+            'HIGHER_BETTER'
+        ) ev
+        WHERE a.ai_accuracy_pct IS NOT NULL
+    )
     UPDATE reporting.dataset_current_values dcv
     SET
-        ai_accuracy_act            = wv.ai_accuracy_pct * 100,
-        ai_accuracy_variance_pct   = CASE 
-            WHEN dcv.ai_accuracy_target > 0 
-            THEN ((wv.ai_accuracy_pct * 100) - dcv.ai_accuracy_target) / dcv.ai_accuracy_target * 100
-            ELSE 0 
+        ai_accuracy_act            = e.ai_accuracy_pct * 100,
+        ai_accuracy_variance_pct   = CASE
+            WHEN dcv.ai_accuracy_target > 0
+            THEN ((e.ai_accuracy_pct * 100) - dcv.ai_accuracy_target) / dcv.ai_accuracy_target * 100
+            ELSE 0
         END,
-        ai_accuracy_status_color   = ev.color_hex,
-        ai_accuracy_status_level   = ev.status_nivel,
-        ai_accuracy_status_label   = ev.status_label,
-        ai_accuracy_severity_label = ev.severity_label
-    FROM with_validation wv
-    CROSS JOIN LATERAL referencial.fnc_evaluar_variable(
-        'AI_ACCURACY'::TEXT,
-        wv.ai_accuracy_pct * 100,
-        dcv.ai_accuracy_target,
-        NULL::NUMERIC,            -- sin baseline
-        'HIGHER_BETTER'::TEXT
-    ) ev
-    WHERE dcv.well_id = wv.well_id;
+        ai_accuracy_status_color   = e.status_color,
+        ai_accuracy_status_level   = e.status_level,
+        ai_accuracy_status_label   = e.status_label,
+        ai_accuracy_severity_label = e.severity_label
+    FROM evaluado e
+    WHERE dcv.well_id = e.well_id;
+
+    GET DIAGNOSTICS v_pozos = ROW_COUNT;
 
     -- ─────────────────────────────────────────────────────────────
-    -- PASO 3: Actualizar fact_operaciones_horarias (fila correspondiente)
+    -- PASO 2: fact_operaciones_horarias (solo horas afectadas)
     -- ─────────────────────────────────────────────────────────────
+    -- El join por PK (fecha_id, hora_id, pozo_id) poda las particiones.
+    -- Horas de los strokes cambiados + horas nuevas con strokes COMPLETADO
+    -- (cargadas por el pipeline después de que su stroke se completó).
+    WITH horas AS (
+        SELECT pp.well_id, DATE_TRUNC('hour', pp.timestamp_lectura) AS fecha_hora
+        FROM universal.stroke s
+        JOIN stage.tbl_pozo_produccion pp ON pp.produccion_id = s.produccion_id
+        WHERE s.stroke_id = ANY(v_strokes)
+        UNION
+        SELECT pp.well_id, DATE_TRUNC('hour', pp.timestamp_lectura)
+        FROM unnest(v_h_wells, v_h_desde, v_h_hasta) AS r(well_id, desde, hasta)
+        JOIN stage.tbl_pozo_produccion pp
+          ON pp.well_id = r.well_id
+         AND pp.timestamp_lectura >= r.desde
+         AND pp.timestamp_lectura <  r.hasta + INTERVAL '1 hour'
+        JOIN universal.stroke s ON s.produccion_id = pp.produccion_id
+        WHERE s.estado = 'COMPLETADO'
+    ),
+    stroke_hora AS (
+        SELECT h.well_id, h.fecha_hora, ls.stroke_id
+        FROM horas h
+        CROSS JOIN LATERAL (
+            SELECT s.stroke_id
+            FROM stage.tbl_pozo_produccion pp
+            JOIN universal.stroke s ON s.produccion_id = pp.produccion_id
+            WHERE pp.well_id = h.well_id
+              AND pp.timestamp_lectura >= h.fecha_hora
+              AND pp.timestamp_lectura <  h.fecha_hora + INTERVAL '1 hour'
+              AND s.estado = 'COMPLETADO'
+            ORDER BY pp.timestamp_lectura DESC
+            LIMIT 1
+        ) ls
+    ),
+    evaluado AS (
+        SELECT
+            fh.fecha_id,
+            fh.hora_id,
+            fh.pozo_id,
+            a.ai_accuracy_pct,
+            ev.status_color,
+            ev.status_level,
+            ev.severity_label
+        FROM stroke_hora sh
+        CROSS JOIN LATERAL (SELECT reporting.fnc_cdi_accuracy(sh.stroke_id) AS ai_accuracy_pct) a
+        JOIN reporting.fact_operaciones_horarias fh
+          ON fh.fecha_id = TO_CHAR(sh.fecha_hora, 'YYYYMMDD')::INT
+         AND fh.hora_id  = EXTRACT(HOUR FROM sh.fecha_hora)::INT
+         AND fh.pozo_id  = sh.well_id
+        CROSS JOIN LATERAL referencial.fnc_evaluar_variable(
+            'ai_accuracy',
+            a.ai_accuracy_pct * 100,
+            fh.kpi_ai_accuracy_target,
+            fh.kpi_ai_accuracy_baseline,
+            'HIGHER_BETTER'
+        ) ev
+        WHERE a.ai_accuracy_pct IS NOT NULL
+    )
     UPDATE reporting.fact_operaciones_horarias fh
     SET
-        kpi_ai_accuracy_pct          = wv.ai_accuracy_pct * 100,
-        kpi_ai_accuracy_variance_pct = CASE 
-            WHEN fh.kpi_ai_accuracy_target > 0 
-            THEN ((wv.ai_accuracy_pct * 100) - fh.kpi_ai_accuracy_target) / fh.kpi_ai_accuracy_target * 100
-            ELSE 0 
+        kpi_ai_accuracy_pct          = e.ai_accuracy_pct * 100,
+        kpi_ai_accuracy_variance_pct = CASE
+            WHEN fh.kpi_ai_accuracy_target > 0
+            THEN ((e.ai_accuracy_pct * 100) - fh.kpi_ai_accuracy_target) / fh.kpi_ai_accuracy_target * 100
+            ELSE 0
         END,
-        kpi_ai_accuracy_status_color   = ev.color_hex,
-        kpi_ai_accuracy_status_level   = ev.status_nivel,
-        kpi_ai_accuracy_severity_label = ev.severity_label
-    FROM with_validation wv
-    CROSS JOIN LATERAL referencial.fnc_evaluar_variable(
-        'AI_ACCURACY'::TEXT,
-        wv.ai_accuracy_pct * 100,
-        fh.kpi_ai_accuracy_target,
-        fh.kpi_ai_accuracy_baseline,
-        'HIGHER_BETTER'::TEXT
-    ) ev
-    WHERE fh.well_id = wv.well_id
-      AND fh.timestamp_lectura = wv.timestamp_lectura;
-
-    RAISE NOTICE '[CDI→REPORTING] Sincronización completada.';
+        kpi_ai_accuracy_status_color   = e.status_color,
+        kpi_ai_accuracy_status_level   = e.status_level,
+        kpi_ai_accuracy_severity_label = e.severity_label
+    FROM evaluado e
+    WHERE fh.fecha_id = e.fecha_id
+      AND fh.hora_id  = e.hora_id
+      AND fh.pozo_id  = e.pozo_id;
+
+    GET DIAGNOSTICS v_horas = ROW_COUNT;
+
+    RAISE NOTICE '[CDI→REPORTING] Sincronización completada: % pozos, % horas.', v_pozos, v_horas;
 END;
 $$;
 
-COMMENT ON PROCEDURE reporting.sp_sync_cdi_to_reporting() IS
-'Sincroniza diagnósticos CDI (dynacards) desde universal.stroke/diagnostico/patron hacia reporting.dataset_current_values y fact_operaciones_horarias.';
+COMMENT ON PROCEDURE reporting.sp_sync_cdi_to_reporting(BOOLEAN) IS
+'Sincroniza diagnósticos CDI (dynacards) de los strokes en bridge_cambios hacia reporting.dataset_current_values y fact_operaciones_horarias, y accuracy en las horas nuevas de fact_operaciones_horarias. p_completo => TRUE recalcula todos los pozos.';
 
 
 -- =============================================================================
@@ -217,32 +329,83 @@ COMMENT ON PROCEDURE reporting.sp_sync_cdi_to_reporting() IS
 --   Rule 3 (5min): Reporting ETL        → CALL sp_sync_ipr_to_reporting()
 --
 -- Lógica:
---   PASO 1: Qmax desde ipr_resultados (curva más reciente por pozo)
+--   PASO 0: Consume los cambios IPR: pozos afectados y, por pozo, la
+--           fecha_calculo más antigua de las curvas cambiadas; rangos de
+--           horas nuevas de fact_operaciones_horarias (filas con hasta).
+--           Sin ninguno de los dos, termina.
+--   PASO 1: Qmax desde ipr_resultados (curva más reciente por pozo afectado)
 --   PASO 2: Eficiencia — prefiere ipr_puntos_operacion (DIA-1h, más frecuente),
 --           fallback a cálculo produccion_fluido_bpd_act / qmax
---   PASO 3: fact_operaciones_horarias — ipr_qmax_teorico incremental
+--   PASO 3: fact_operaciones_horarias — ipr_qmax_teorico en las horas
+--           posteriores a la curva cambiada + rangos de horas nuevas
 -- =============================================================================
 
-CREATE OR REPLACE PROCEDURE reporting.sp_sync_ipr_to_reporting()
+CREATE OR REPLACE PROCEDURE reporting.sp_sync_ipr_to_reporting(p_completo BOOLEAN DEFAULT FALSE)
 LANGUAGE plpgsql AS $$
+DECLARE
+    v_wells   INT[];
+    v_desde   TIMESTAMPTZ[];
+    v_h_wells INT[];
+    v_h_desde TIMESTAMPTZ[];
+    v_h_hasta TIMESTAMPTZ[];
+    v_horas   INT := 0;
 BEGIN
     -- ─────────────────────────────────────────────────────────────
-    -- PASO 1: dataset_current_values — Qmax desde curva más reciente
+    -- PASO 0: Consumir cambios (pozo + primera fecha_calculo cambiada,
+    --         rangos de horas nuevas)
     -- ─────────────────────────────────────────────────────────────
-    WITH latest_ipr AS (
-        SELECT DISTINCT ON (well_id)
-            well_id,
-            qmax,
-            punto_operacion_bpd,
-            fecha_calculo
-        FROM universal.ipr_resultados
-        ORDER BY well_id, fecha_calculo DESC
+    -- desde es NULL si el pozo solo cambió en ipr_puntos_operacion
+    -- (no afecta ipr_qmax_teorico).
+    WITH c AS (
+        DELETE FROM reporting.bridge_cambios
+        WHERE fuente = 'IPR'
+        RETURNING cambio_id, well_id, desde, hasta
+    ),
+    curvas AS (
+        SELECT well_id, MIN(desde) AS desde FROM c WHERE hasta IS NULL GROUP BY well_id
     )
+    SELECT (SELECT array_agg(well_id ORDER BY well_id) FROM curvas),
+           (SELECT array_agg(desde ORDER BY well_id) FROM curvas),
+           array_agg(c.well_id ORDER BY c.cambio_id) FILTER (WHERE c.hasta IS NOT NULL),
+           array_agg(c.desde   ORDER BY c.cambio_id) FILTER (WHERE c.hasta IS NOT NULL),
+           array_agg(c.hasta   ORDER BY c.cambio_id) FILTER (WHERE c.hasta IS NOT NULL)
+    INTO v_wells, v_desde, v_h_wells, v_h_desde, v_h_hasta
+    FROM c;
+
+    IF p_completo THEN
+        SELECT array_agg(well_id ORDER BY well_id), array_agg(desde ORDER BY well_id)
+        INTO v_wells, v_desde
+        FROM (
+            SELECT well_id, MIN(fecha_calculo) AS desde
+            FROM (
+                SELECT well_id, fecha_calculo FROM universal.ipr_resultados
+                UNION ALL
+                SELECT well_id, NULL FROM universal.ipr_puntos_operacion
+            ) u
+            GROUP BY well_id
+        ) x;
+    END IF;
+
+    IF v_wells IS NULL AND v_h_wells IS NULL THEN
+        RAISE NOTICE '[IPR→REPORTING] Sin cambios.';
+        RETURN;
+    END IF;
+
+    -- ─────────────────────────────────────────────────────────────
+    -- PASO 1: dataset_current_values — Qmax desde curva más reciente
+    -- ─────────────────────────────────────────────────────────────
     UPDATE reporting.dataset_current_values dcv
     SET
         ipr_qmax_bpd = li.qmax
-    FROM latest_ipr li
-    WHERE dcv.well_id = li.well_id;
+    FROM unnest(v_wells) AS w(well_id)
+    CROSS JOIN LATERAL (
+        SELECT qmax
+        FROM universal.ipr_resultados
+        WHERE well_id = w.well_id
+        ORDER BY fecha_calculo DESC
+        LIMIT 1
+    ) li
+    WHERE dcv.well_id = w.well_id;
 
     -- ─────────────────────────────────────────────────────────────
     -- PASO 1b: dataset_current_values — pwf_psi_act enriquecido
@@ -252,19 +415,18 @@ BEGIN
     --   Así pwf_psi_act NO depende de ipr_resultados directamente,
     --   pero se enriquece con el valor CALC si está disponible.
     -- ─────────────────────────────────────────────────────────────
-    WITH latest_op_pwf AS (
-        SELECT DISTINCT ON (well_id)
-            well_id,
-            pwf_calculado,
-            fecha_calculo
-        FROM universal.ipr_puntos_operacion
-        ORDER BY well_id, fecha_calculo DESC
-    )
     UPDATE reporting.dataset_current_values dcv
     SET
         pwf_psi_act = lop.pwf_calculado
-    FROM latest_op_pwf lop
-    WHERE dcv.well_id = lop.well_id
+    FROM unnest(v_wells) AS w(well_id)
+    CROSS JOIN LATERAL (
+        SELECT pwf_calculado
+        FROM universal.ipr_puntos_operacion
+        WHERE well_id = w.well_id
+        ORDER BY fecha_calculo DESC
+        LIMIT 1
+    ) lop
+    WHERE dcv.well_id = w.well_id
       AND lop.pwf_calculado IS NOT NULL;
 
     -- ─────────────────────────────────────────────────────────────
@@ -276,14 +438,6 @@ BEGIN
     --   reporting como produccion_fluido_bpd_act — no se duplica,
     --   pero la eficiencia ya viene pre-calculada por el servicio.
     -- ─────────────────────────────────────────────────────────────
-    WITH latest_op AS (
-        SELECT DISTINCT ON (well_id)
-            well_id,
-            eficiencia,
-            fecha_calculo
-        FROM universal.ipr_puntos_operacion
-        ORDER BY well_id, fecha_calculo DESC
-    )
     UPDATE reporting.dataset_current_values dcv
     SET
         ipr_eficiencia_flujo_pct = COALESCE(
@@ -296,8 +450,15 @@ BEGIN
                 ELSE dcv.ipr_eficiencia_flujo_pct
             END
         )
-    FROM latest_op lop
-    WHERE dcv.well_id = lop.well_id;
+    FROM unnest(v_wells) AS w(well_id)
+    CROSS JOIN LATERAL (
+        SELECT eficiencia
+        FROM universal.ipr_puntos_operacion
+        WHERE well_id = w.well_id
+        ORDER BY fecha_calculo DESC
+        LIMIT 1
+    ) lop
+    WHERE dcv.well_id = w.well_id;
 
     -- ─────────────────────────────────────────────────────────────
     -- PASO 2b: Pozos SIN punto de operación — fallback solo curva
@@ -309,7 +470,8 @@ BEGIN
             THEN LEAST((dcv.produccion_fluido_bpd_act / dcv.ipr_qmax_bpd) * 100, 100)
             ELSE dcv.ipr_eficiencia_flujo_pct
         END
-    WHERE dcv.ipr_eficiencia_flujo_pct IS NULL
+    WHERE dcv.well_id = ANY(v_wells)
+      AND dcv.ipr_eficiencia_flujo_pct IS NULL
       AND dcv.ipr_qmax_bpd IS NOT NULL
       AND NOT EXISTS (
           SELECT 1 FROM universal.ipr_puntos_operacion op
@@ -319,32 +481,48 @@ BEGIN
     -- ─────────────────────────────────────────────────────────────
     -- PASO 3: fact_operaciones_horarias — ipr_qmax_teorico
     -- ─────────────────────────────────────────────────────────────
-    -- Actualiza TODAS las filas horarias del pozo con el Qmax vigente
-    -- al momento de cada lectura, usando el IPR calculado más cercano
-    -- anterior o igual al timestamp de la fila horaria.
+    -- Qmax vigente al momento de cada hora: el IPR calculado más cercano
+    -- anterior o igual a fecha_hora. Horas candidatas:
+    --   a) pozos afectados, desde la primera curva cambiada en adelante
+    --   b) horas nuevas cargadas por el pipeline (rangos registrados por el
+    --      trigger de V22), vía idx_hora_pozo_fechahora
     UPDATE reporting.fact_operaciones_horarias fh
-    SET ipr_qmax_teorico = sub.qmax
+    SET ipr_qmax_teorico = q.qmax
     FROM (
-        SELECT DISTINCT ON (fh2.pozo_id, fh2.fecha_hora)
-            fh2.pozo_id,
-            fh2.fecha_hora,
-            ipr.qmax
-        FROM reporting.fact_operaciones_horarias fh2
-        JOIN universal.ipr_resultados ipr 
-            ON ipr.well_id = fh2.pozo_id
-           AND ipr.fecha_calculo <= fh2.fecha_hora
-        WHERE fh2.ipr_qmax_teorico IS NULL  -- solo filas sin valor (incremental)
-        ORDER BY fh2.pozo_id, fh2.fecha_hora, ipr.fecha_calculo DESC
-    ) sub
-    WHERE fh.pozo_id = sub.pozo_id
-      AND fh.fecha_hora = sub.fecha_hora;
-
-    RAISE NOTICE '[IPR→REPORTING] Sincronización completada (curvas + puntos operación).';
+        SELECT fh2.fecha_id, fh2.hora_id, fh2.pozo_id, fh2.fecha_hora
+        FROM unnest(v_wells, v_desde) AS a(well_id, desde)
+        JOIN reporting.fact_operaciones_horarias fh2
+          ON fh2.pozo_id = a.well_id
+         AND fh2.fecha_hora >= a.desde
+        UNION
+        SELECT fh2.fecha_id, fh2.hora_id, fh2.pozo_id, fh2.fecha_hora
+        FROM unnest(v_h_wells, v_h_desde, v_h_hasta) AS r(well_id, desde, hasta)
+        JOIN reporting.fact_operaciones_horarias fh2
+          ON fh2.pozo_id = r.well_id
+         AND fh2.fecha_hora BETWEEN r.desde AND r.hasta
+    ) c
+    CROSS JOIN LATERAL (
+        SELECT ipr.qmax
+        FROM universal.ipr_resultados ipr
+        WHERE ipr.well_id = c.pozo_id
+          AND ipr.fecha_calculo <= c.fecha_hora
+        ORDER BY ipr.fecha_calculo DESC
+        LIMIT 1
+    ) q
+    WHERE fh.fecha_id = c.fecha_id
+      AND fh.hora_id  = c.hora_id
+      AND fh.pozo_id  = c.pozo_id
+      AND fh.ipr_qmax_teorico IS DISTINCT FROM q.qmax::DECIMAL(10,2);
+
+    GET DIAGNOSTICS v_horas = ROW_COUNT;
+
+    RAISE NOTICE '[IPR→REPORTING] Sincronización completada (curvas + puntos operación): % pozos, % horas.',
+        COALESCE(array_length(v_wells, 1), 0), v_horas;
 END;
 $$;
 
-COMMENT ON PROCEDURE reporting.sp_sync_ipr_to_reporting() IS
-'Sincroniza IPR hacia reporting: Qmax desde ipr_resultados (DIA-24h/EVD), eficiencia desde ipr_puntos_operacion (DIA-1h, prioridad) o fallback produccion_bpd/qmax. También actualiza fact_operaciones_horarias.';
+COMMENT ON PROCEDURE reporting.sp_sync_ipr_to_reporting(BOOLEAN) IS
+'Sincroniza IPR de los pozos en bridge_cambios hacia reporting: Qmax desde ipr_resultados (DIA-24h/EVD), eficiencia desde ipr_puntos_operacion (DIA-1h, prioridad) o fallback produccion_bpd/qmax, e ipr_qmax_teorico en las horas afectadas de fact_operaciones_horarias. p_completo => TRUE recalcula todos los pozos.';
 
 
 -- =============================================================================
@@ -360,34 +538,57 @@ COMMENT ON PROCEDURE reporting.sp_sync_ipr_to_reporting() IS
 --   Rule (mensual): Declinación Service → universal.arps_resultados_declinacion
 --     → CALL sp_sync_arps_to_reporting() (refresca RR en mensuales)
 --
--- Prioridad: eur_p50 > eur_total
+-- Prioridad: eur_p50 > eur_total. Solo pozos registrados en bridge_cambios:
+-- ARPS cambiado, o meses nuevos / Np cambiado por sp_load_to_reporting (V22).
+-- Sin cambios no hace nada.
 -- =============================================================================
 
-CREATE OR REPLACE PROCEDURE reporting.sp_sync_arps_to_reporting()
+CREATE OR REPLACE PROCEDURE reporting.sp_sync_arps_to_reporting(p_completo BOOLEAN DEFAULT FALSE)
 LANGUAGE plpgsql AS $$
+DECLARE
+    v_wells INT[];
+    v_filas INT := 0;
 BEGIN
+    WITH c AS (
+        DELETE FROM reporting.bridge_cambios
+        WHERE fuente = 'ARPS'
+        RETURNING well_id
+    )
+    SELECT array_agg(DISTINCT well_id) INTO v_wells FROM c;
+
+    IF p_completo THEN
+        SELECT array_agg(DISTINCT well_id) INTO v_wells
+        FROM universal.arps_resultados_declinacion;
+    END IF;
+
+    IF v_wells IS NULL THEN
+        RAISE NOTICE '[ARPS→REPORTING] Sin cambios.';
+        RETURN;
+    END IF;
+
     -- ─────────────────────────────────────────────────────────────
     -- fact_operaciones_mensuales — remanent_reserves_bbl
     -- ─────────────────────────────────────────────────────────────
-    WITH latest_arps AS (
-        SELECT DISTINCT ON (well_id)
-            well_id,
-            eur_total,
-            eur_p50,
-            fecha_analisis
-        FROM universal.arps_resultados_declinacion
-        ORDER BY well_id, fecha_analisis DESC
-    )
     UPDATE reporting.fact_operaciones_mensuales fom
     SET
         remanent_reserves_bbl = COALESCE(la.eur_p50, la.eur_total)
                                 - COALESCE(fom.produccion_petroleo_acumulada_bbl, 0)
-    FROM latest_arps la
-    WHERE fom.pozo_id = la.well_id;
+    FROM unnest(v_wells) AS w(well_id)
+    CROSS JOIN LATERAL (
+        SELECT eur_total, eur_p50
+        FROM universal.arps_resultados_declinacion
+        WHERE well_id = w.well_id
+        ORDER BY fecha_analisis DESC
+        LIMIT 1
+    ) la
+    WHERE fom.pozo_id = w.well_id;
+
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
 
-    RAISE NOTICE '[ARPS→REPORTING] Sincronización completada (fact_mensuales).';
+    RAISE NOTICE '[ARPS→REPORTING] Sincronización completada (fact_mensuales): % pozos, % meses.',
+        COALESCE(array_length(v_wells, 1), 0), v_filas;
 END;
 $$;
 
-COMMENT ON PROCEDURE reporting.sp_sync_arps_to_reporting() IS
-'Sincroniza ARPS hacia reporting: remanent_reserves_bbl = ARPS(eur_p50|eur_total) - Np en fact_mensuales. Invocado mensualmente por EventBridge.';
+COMMENT ON PROCEDURE reporting.sp_sync_arps_to_reporting(BOOLEAN) IS
+'Sincroniza ARPS de los pozos en bridge_cambios (ARPS cambiado o meses nuevos / Np cambiado) hacia reporting: remanent_reserves_bbl = ARPS(eur_p50|eur_total) - Np en fact_mensuales. p_completo => TRUE recalcula todos los pozos.';
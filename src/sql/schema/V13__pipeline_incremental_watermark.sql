@@ -0,0 +1,180 @@
+-- =============================================================================
+-- V13__pipeline_incremental_watermark.sql
+-- VERSION: 1.1.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Soporte para el modo INCREMENTAL de MASTER_PIPELINE_RUNNER.py.
+--   En lugar de DROP SCHEMA + recálculo de 10 años (LOOKBACK_DAYS), el runner
+--   mantiene por pozo el último stage.tbl_pozo_produccion.timestamp_lectura
+--   ya procesado y solo recalcula los pozos/fechas con lecturas nuevas o
+--   re-pivoteadas (stage.tbl_produccion_cambios, V6.4).
+--
+--   1. reporting.pipeline_watermark           — high-water mark por pozo
+--   2. reporting.fnc_detectar_delta_incremental() — pozos + ventana afectada
+--   3. reporting.sp_avanzar_watermark()       — avanza la marca al terminar
+--
+-- FLUJO:
+--   runner --incremental
+--     → fnc_detectar_delta_incremental()        (well_id, fecha_min, fecha_max, ts_max, cambio_max)
+--     → DQ / sp_load_to_reporting / derivados / poblar_kpi_business
+--          con (fecha_min, fecha_max, p_well_ids)
+--     → sp_avanzar_watermark(well_ids, ts_max, cambio_max)  (solo si todo terminó OK)
+--
+--   El delta de un pozo = lecturas con timestamp_lectura > watermark + claves
+--   registradas por el pivot en stage.tbl_produccion_cambios. Las segundas
+--   cubren las filas de landing tardías (solape del EL, V16) y las variables
+--   tardías de lecturas ya existentes (pivot incremental por idn), que quedan
+--   en o por debajo del watermark y, sin el registro, nunca llegarían a DQ,
+--   sp_load_to_reporting ni a los KPIs.
+--
+-- PERFORMANCE NOTE:
+--   La detección hace un range scan por pozo sobre uq_scada_timestamp_pozo
+--   (well_id, timestamp_lectura) y sobre idx_produccion_cambios_pozo vía
+--   LATERAL; costo ∝ lecturas nuevas + claves cambiadas.
+--
+-- NOTA: un full reset (init_schemas.py) elimina la tabla; el runner completo
+--   la vuelve a sembrar con el MAX por pozo al final de la corrida.
+-- =============================================================================
+
+
+-- =============================================================================
+-- 1. TABLA: HIGH-WATER MARK POR POZO
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS reporting.pipeline_watermark (
+    well_id INT PRIMARY KEY,                              -- stage.tbl_pozo_maestra.well_id
+    ultimo_timestamp_lectura TIMESTAMP NOT NULL,          -- MAX(timestamp_lectura) ya procesado
+    ultima_ejecucion TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE reporting.pipeline_watermark IS
+'High-water mark por pozo de stage.tbl_pozo_produccion.timestamp_lectura procesado por el pipeline.
+Lo lee fnc_detectar_delta_incremental() y lo avanza sp_avanzar_watermark().';
+
+
+-- =============================================================================
+-- 2. FUNCIÓN: DETECTAR DELTA (lecturas posteriores al watermark + re-pivoteadas)
+-- =============================================================================
+-- ts_max no retrocede: un pozo con solo claves re-pivoteadas devuelve su
+-- watermark actual. cambio_max es el último cambio_id del pozo en
+-- tbl_produccion_cambios (NULL si no tiene): sp_avanzar_watermark borra hasta
+-- ahí, así las claves registradas durante la corrida quedan para la siguiente.
+-- El tipo de retorno cambió en 1.1.0: CREATE OR REPLACE no lo admite.
+DROP FUNCTION IF EXISTS reporting.fnc_detectar_delta_incremental();
+
+CREATE OR REPLACE FUNCTION reporting.fnc_detectar_delta_incremental()
+RETURNS TABLE (
+    well_id   INT,
+    fecha_min DATE,
+    fecha_max DATE,
+    ts_max    TIMESTAMP,
+    num_lecturas BIGINT,
+    cambio_max BIGINT
+)
+LANGUAGE sql STABLE AS $$
+    SELECT
+        m.well_id,
+        LEAST(d.ts_min, c.ts_min)::DATE,
+        GREATEST(d.ts_max, c.ts_max)::DATE,
+        COALESCE(d.ts_max, w.ultimo_timestamp_lectura),
+        d.num_lecturas + c.num_lecturas,
+        c.cambio_max
+    FROM stage.tbl_pozo_maestra m
+    LEFT JOIN reporting.pipeline_watermark w ON w.well_id = m.well_id
+    CROSS JOIN LATERAL (
+        SELECT
+            MIN(p.timestamp_lectura) AS ts_min,
+            MAX(p.timestamp_lectura) AS ts_max,
+            COUNT(*)                 AS num_lecturas
+        FROM stage.tbl_pozo_produccion p
+        WHERE p.well_id = m.well_id
+          AND p.timestamp_lectura > COALESCE(w.ultimo_timestamp_lectura, '-infinity'::TIMESTAMP)
+    ) d
+    CROSS JOIN LATERAL (
+        -- Las claves posteriores al watermark ya están en d
+        SELECT
+            MIN(k.timestamp_lectura) FILTER (WHERE k.ya_procesada) AS ts_min,
+            MAX(k.timestamp_lectura) FILTER (WHERE k.ya_procesada) AS ts_max,
+            COUNT(DISTINCT k.timestamp_lectura) FILTER (WHERE k.ya_procesada) AS num_lecturas,
+            MAX(k.cambio_id)                                       AS cambio_max
+        FROM (
+            SELECT pc.cambio_id, pc.timestamp_lectura,
+                   pc.timestamp_lectura <= w.ultimo_timestamp_lectura AS ya_procesada
+            FROM stage.tbl_produccion_cambios pc
+            WHERE pc.well_id = m.well_id
+        ) k
+    ) c
+    WHERE d.ts_max IS NOT NULL OR c.cambio_max IS NOT NULL
+    ORDER BY m.well_id;
+$$;
+
+COMMENT ON FUNCTION reporting.fnc_detectar_delta_incremental IS
+'Devuelve los pozos con lecturas nuevas (timestamp_lectura > watermark) o re-pivoteadas (stage.tbl_produccion_cambios) y su ventana de fechas.
+ts_max y cambio_max se deben pasar luego a sp_avanzar_watermark() para no saltar lecturas llegadas durante la corrida.';
+
+
+-- =============================================================================
+-- 3. SP: AVANZAR WATERMARK
+-- =============================================================================
+-- p_well_ids/p_hasta NULL → todos los pozos al MAX actual (usado tras full reset).
+-- GREATEST evita retroceder la marca si dos corridas se solapan.
+-- Borra las claves de stage.tbl_produccion_cambios consumidas: hasta
+-- p_cambio_hasta por pozo, o todas en la corrida FULL (lo recalculó todo).
+-- 1.1.0 agregó p_cambio_hasta: se elimina la firma anterior para que los
+-- CALL posicionales no queden ambiguos.
+DROP PROCEDURE IF EXISTS reporting.sp_avanzar_watermark(INT[], TIMESTAMP[]);
+
+CREATE OR REPLACE PROCEDURE reporting.sp_avanzar_watermark(
+    p_well_ids     INT[] DEFAULT NULL,
+    p_hasta        TIMESTAMP[] DEFAULT NULL,
+    p_cambio_hasta BIGINT[] DEFAULT NULL
+)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_count INT := 0;
+BEGIN
+    IF p_well_ids IS NULL THEN
+        INSERT INTO reporting.pipeline_watermark (well_id, ultimo_timestamp_lectura)
+        SELECT p.well_id, MAX(p.timestamp_lectura)
+        FROM stage.tbl_pozo_produccion p
+        GROUP BY p.well_id
+        ON CONFLICT (well_id) DO UPDATE SET
+            ultimo_timestamp_lectura = GREATEST(reporting.pipeline_watermark.ultimo_timestamp_lectura,
+                                                EXCLUDED.ultimo_timestamp_lectura),
+            ultima_ejecucion = CURRENT_TIMESTAMP;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+
+        DELETE FROM stage.tbl_produccion_cambios;
+    ELSE
+        IF array_length(p_well_ids, 1) IS DISTINCT FROM array_length(p_hasta, 1) THEN
+            RAISE EXCEPTION '[V13] p_well_ids y p_hasta deben tener el mismo largo';
+        END IF;
+        IF p_cambio_hasta IS NOT NULL
+           AND array_length(p_well_ids, 1) IS DISTINCT FROM array_length(p_cambio_hasta, 1) THEN
+            RAISE EXCEPTION '[V13] p_well_ids y p_cambio_hasta deben tener el mismo largo';
+        END IF;
+
+        INSERT INTO reporting.pipeline_watermark (well_id, ultimo_timestamp_lectura)
+        SELECT u.well_id, u.hasta
+        FROM unnest(p_well_ids, p_hasta) AS u(well_id, hasta)
+        ON CONFLICT (well_id) DO UPDATE SET
+            ultimo_timestamp_lectura = GREATEST(reporting.pipeline_watermark.ultimo_timestamp_lectura,
+                                                EXCLUDED.ultimo_timestamp_lectura),
+            ultima_ejecucion = CURRENT_TIMESTAMP;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+
+        DELETE FROM stage.tbl_produccion_cambios pc
+        USING unnest(p_well_ids, p_cambio_hasta) AS u(well_id, cambio_hasta)
+        WHERE pc.well_id = u.well_id
+          AND pc.cambio_id <= u.cambio_hasta;
+    END IF;
+
+    RAISE NOTICE '[V13] Watermark avanzado para % pozos', v_count;
+END;
+$$;
+
+COMMENT ON PROCEDURE reporting.sp_avanzar_watermark IS
+'Avanza reporting.pipeline_watermark. Sin argumentos: todos los pozos al MAX actual (fin de full run).
+Con arrays paralelos (well_ids, ts_max, cambio_max): solo los pozos procesados en modo incremental, y borra sus claves re-pivoteadas ya consumidas.
+ORDEN EN PIPELINE: último paso, solo si todos los anteriores terminaron OK.';
@@ -0,0 +1,73 @@
+-- =============================================================================
+-- V14__pipeline_run_log.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Instrumentación del MASTER_PIPELINE_RUNNER.py (src/pipeline_metrics.py).
+--   Una fila por (corrida, paso) con duración, filas afectadas por tabla,
+--   RAISE NOTICE del servidor y, con --explain, los planes
+--   EXPLAIN (ANALYZE, BUFFERS) capturados vía auto_explain.
+--
+--   1. reporting.pipeline_run_log         — métricas por paso
+--   2. reporting.vw_pipeline_step_trend   — duración vs. media de las 5 corridas previas
+--
+-- NOTA: el full reset (init_schemas.py) hace DROP SCHEMA reporting; el runner
+--   lee el histórico antes del reset y lo re-inserta al final de la corrida.
+--   Copia durable adicional: logs/pipeline_runs/run_<run_id>.json
+-- =============================================================================
+
+
+-- =============================================================================
+-- 1. TABLA: MÉTRICAS POR PASO
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS reporting.pipeline_run_log (
+    run_id          VARCHAR(40)  NOT NULL,          -- YYYYMMDD_HHMMSS_ffffff
+    step_name       VARCHAR(100) NOT NULL,          -- p.ej. 4.1_load_to_reporting
+    modo            VARCHAR(20),                    -- FULL / INCREMENTAL
+    descripcion     TEXT,
+    estado          VARCHAR(20)  NOT NULL,          -- OK / ERROR / OMITIDO (--resume)
+    inicio          TIMESTAMP,
+    fin             TIMESTAMP,
+    duracion_ms     BIGINT,
+    filas_afectadas BIGINT,                         -- Σ ins+upd+del (pg_stat_xact_user_tables)
+    filas_por_tabla JSONB,                          -- {"schema.tabla": filas}
+    notices         JSONB,                          -- RAISE NOTICE del paso
+    planes          JSONB,                          -- auto_explain (solo --explain)
+    error           TEXT,
+    PRIMARY KEY (run_id, step_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pipeline_run_log_step
+    ON reporting.pipeline_run_log (step_name, inicio DESC);
+
+COMMENT ON TABLE reporting.pipeline_run_log IS
+'Métricas por paso de cada corrida de MASTER_PIPELINE_RUNNER.py (duración, filas, notices, planes).';
+
+
+-- =============================================================================
+-- 2. VISTA: TENDENCIA POR PASO (detección de regresiones)
+-- =============================================================================
+CREATE OR REPLACE VIEW reporting.vw_pipeline_step_trend AS
+SELECT
+    l.run_id,
+    l.step_name,
+    l.modo,
+    l.estado,
+    l.inicio,
+    l.duracion_ms,
+    l.filas_afectadas,
+    AVG(l.duracion_ms) OVER w_prev                      AS duracion_media_prev_ms,
+    ROUND(l.duracion_ms::NUMERIC
+          / NULLIF(AVG(l.duracion_ms) OVER w_prev, 0), 2) AS ratio_vs_media
+FROM reporting.pipeline_run_log l
+WHERE l.estado <> 'OMITIDO'
+WINDOW w_prev AS (
+    PARTITION BY l.step_name, l.modo
+    ORDER BY l.inicio
+    ROWS BETWEEN 5 PRECEDING AND 1 PRECEDING
+);
+
+COMMENT ON VIEW reporting.vw_pipeline_step_trend IS
+'Duración de cada paso frente a la media de sus 5 corridas previas (mismo modo). ratio_vs_media > 1.5 ≈ regresión.';
@@ -0,0 +1,34 @@
+-- =============================================================================
+-- V15__reporting_backfill_progress.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Progreso del backfill paralelo de reporting.sp_load_to_reporting
+--   (backfill_reporting.py). El rango se divide en chunks alineados a mes o
+--   a partición anual de fact_operaciones_horarias; cada chunk corre en su
+--   propia transacción y conexión. Una fila por chunk permite reanudar el
+--   backfill: los chunks en estado OK se omiten.
+--
+-- ESTADOS: PENDIENTE → EN_CURSO → OK | ERROR
+--   Un EN_CURSO que quedó de un proceso caído se reintenta al reanudar.
+--   El estado OK se escribe en la misma transacción que el CALL del chunk.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS reporting.backfill_progress (
+    backfill_id  TEXT         NOT NULL,             -- p.ej. 2016-01-01_2026-10-18_month
+    chunk_inicio DATE         NOT NULL,
+    chunk_fin    DATE         NOT NULL,
+    estado       VARCHAR(20)  NOT NULL DEFAULT 'PENDIENTE',
+    intentos     INT          NOT NULL DEFAULT 0,
+    inicio       TIMESTAMP,
+    fin          TIMESTAMP,
+    duracion_ms  BIGINT,
+    error        TEXT,
+    PRIMARY KEY (backfill_id, chunk_inicio),
+    CONSTRAINT chk_backfill_estado CHECK (estado IN ('PENDIENTE', 'EN_CURSO', 'OK', 'ERROR'))
+);
+
+COMMENT ON TABLE reporting.backfill_progress IS
+'Chunks del backfill paralelo de sp_load_to_reporting (backfill_reporting.py). estado=OK → el chunk se omite al reanudar.';
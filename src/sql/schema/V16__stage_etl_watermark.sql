@@ -0,0 +1,41 @@
+-- =============================================================================
+-- V16__stage_etl_watermark.sql
+-- VERSION: 1.1.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Watermark persistente del EL RAW → stage.landing_scada_data
+--   (src/elt_process.run_extraction_load). Una fila por (fuente, unit_id,
+--   location_id) con el último datatime de RAW ya cargado.
+--
+-- FLUJO:
+--   1. Al iniciar, el job lee los watermarks de la fuente.
+--   2. Extrae de RAW solo datatime > watermark − ventana de solape
+--      (ETL_OVERLAP_MINUTES) por unidad/locación; el solape re-lee filas que
+--      llegaron tarde con datatime antiguo.
+--   3. COPY a una tabla temporal → INSERT en landing con el idn de RAW en
+--      raw_idn, ON CONFLICT (raw_idn) DO NOTHING (las filas re-leídas por el
+--      solape no se duplican). landing.idn lo asigna siempre la identidad,
+--      igual que para la API (extract_scada_api.py) y los dumps.
+--   4. El watermark se avanza (GREATEST) en la misma transacción que el
+--      INSERT en landing: o se confirman ambos o ninguno.
+--
+-- NOTA: vive en stage; el full reset (init_schemas.py) lo elimina junto con
+--   landing_scada_data, de modo que el siguiente EL vuelve a cargar desde
+--   ETL_WATERMARK_INICIAL.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS stage.etl_watermark (
+    fuente             TEXT      NOT NULL,             -- p.ej. scada_raw_table
+    unit_id            INT       NOT NULL,
+    location_id        INT       NOT NULL DEFAULT 0,   -- 0 = sin locación (NULL en RAW)
+    ultimo_datatime    TIMESTAMP NOT NULL,             -- MAX(datatime) de RAW ya cargado
+    ultimo_idn         BIGINT,                         -- MAX(idn) de RAW ya cargado (informativo)
+    filas_ultima_carga BIGINT    NOT NULL DEFAULT 0,   -- filas extraídas en la última corrida
+    actualizado_en     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (fuente, unit_id, location_id)
+);
+
+COMMENT ON TABLE stage.etl_watermark IS
+'Último datatime de RAW cargado en landing_scada_data por (fuente, unit_id, location_id). Lo lee y avanza src/elt_process.py en la misma transacción que la carga.';
@@ -0,0 +1,47 @@
+-- =============================================================================
+-- V17__control_input_manifest.sql
+-- VERSION: 1.2.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Manifiesto de archivos de entrada ya cargados (src/input_manifest.py).
+--   Una fila por (consumidor, ruta) con el SHA-256 del contenido, tamaño,
+--   mtime y las tablas destino con sus filas al momento de la carga.
+--
+-- FLUJO:
+--   1. load_referencial.main() / ingest_real_telemetry.execute_sql_file()
+--      consultan el manifiesto antes de leer sus archivos; init_schemas
+--      registra sus SCHEMA_FILES (consumidor init_schemas).
+--   2. Tamaño + mtime iguales → vigente sin leer el archivo; si difieren se
+--      recalcula el SHA-256 (un checkout que solo toca el mtime no recarga).
+--   3. Además, cada tabla destino que tenía filas debe seguir teniéndolas
+--      (EXISTS): un TRUNCATE manual invalida la entrada.
+--   4. Vigente → se omite la carga. Si no, se carga y se registra la entrada
+--      (los dumps, en la misma transacción que su COPY).
+--   5. Corrida FULL: init_schemas.init_pipeline() conserva stage si ningún
+--      SCHEMA_FILE ni archivo de la ingesta cambió (sin DROP ni recarga).
+--
+-- NOTA: vive en el schema control, que el full reset (init_schemas.py) no
+--   elimina. Cuando el reset elimina stage o referencial borra, en la misma
+--   transacción, las entradas de sus consumidores (ingest_real_telemetry,
+--   load_referencial): el chequeo del paso 3 solo mira si la tabla tiene
+--   filas y, con varios archivos por tabla, omitiría todos menos el primero.
+--   INPUT_CACHE=0 fuerza la recarga sin reset.
+-- =============================================================================
+
+CREATE SCHEMA IF NOT EXISTS control;
+
+CREATE TABLE IF NOT EXISTS control.tbl_input_manifest (
+    consumidor     TEXT      NOT NULL,             -- init_schemas / load_referencial / ingest_real_telemetry
+    ruta           TEXT      NOT NULL,             -- ruta absoluta del archivo
+    sha256         TEXT      NOT NULL,
+    tamano_bytes   BIGINT    NOT NULL,
+    mtime          TIMESTAMP NOT NULL,
+    tablas_destino JSONB     NOT NULL DEFAULT '{}'::JSONB,  -- {"schema.tabla": filas}
+    cargado_en     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (consumidor, ruta)
+);
+
+COMMENT ON TABLE control.tbl_input_manifest IS
+'Hash, tamaño y mtime de cada archivo de entrada cargado y las tablas que pobló. load_referencial e ingest_real_telemetry omiten los archivos sin cambios; init_schemas conserva stage si nada cambió. Sobrevive al full reset.';
@@ -0,0 +1,133 @@
+-- =============================================================================
+-- V18__dynacard_native_arrays.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Cartas dinagráficas (surface_rod_position / surface_rod_load /
+--   downhole_pump_position / downhole_pump_load, IDs 155-158) como REAL[]
+--   en stage.tbl_pozo_produccion y reporting.dataset_current_values, en vez
+--   de TEXT separado por comas ('[1.9,4.6,...]').
+--
+-- FLUJO:
+--   1. stage.fnc_card_parse(TEXT) → REAL[]: convierte el formato legado
+--      ('[a,b,...]', '{a,b,...}' o 'a,b,...') con un único cast de arreglo.
+--      Carta vacía → NULL; carta con un elemento no numérico → NULL.
+--   2. Ingesta: el pivot (V6.4, categoría 'A') y los dumps
+--      (src/sql_dump_stream.py) escriben el arreglo directamente.
+--   3. stage.fnc_card_stats(posición, carga): posición máx/mín, carga
+--      pico/mínima, área (fórmula del polígono) y puntos, sobre los arreglos.
+--      reporting.vw_card_stats_current expone las estadísticas de la carta
+--      actual de cada pozo.
+--   4. Conversión: en una base creada antes de V18 (columnas TEXT) el bloque
+--      DO final hace ALTER COLUMN ... TYPE REAL[] USING fnc_card_parse(col).
+--      En un full reset V4 ya crea las columnas REAL[] y el bloque no hace nada.
+--
+-- NOTA: REAL (float4) alcanza para las cartas (pulgadas / libras con 1-2
+--   decimales) y ocupa 4 bytes por punto más la cabecera del arreglo; TOAST
+--   comprime las cartas largas.
+-- =============================================================================
+
+
+-- =============================================================================
+-- 1. PARSEO DEL FORMATO LEGADO
+-- =============================================================================
+CREATE OR REPLACE FUNCTION stage.fnc_card_parse(p_txt TEXT)
+RETURNS REAL[]
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE
+               WHEN v ~ '^[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?(\s*,\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?)*$'
+               THEN CAST('{' || v || '}' AS REAL[])
+           END
+    FROM (SELECT btrim(p_txt, E'[]{} \t\r\n') AS v) s;
+$$;
+
+COMMENT ON FUNCTION stage.fnc_card_parse(TEXT) IS
+'Carta dinagráfica en TEXT legado (''[a,b,...]'' / ''{...}'' / ''a,b,...'') → REAL[]. Una validación y un cast por carta; vacía o mal formada → NULL.';
+
+
+-- =============================================================================
+-- 2. ESTADÍSTICAS DE CARTA
+-- =============================================================================
+-- Área = |Σ (x_i·y_{i+1} − x_{i+1}·y_i)| / 2 sobre el polígono cerrado
+-- (in·lb). Los puntos se emparejan por posición; si los arreglos tienen
+-- distinto largo se usan los primeros min(n_pos, n_carga) puntos.
+CREATE OR REPLACE FUNCTION stage.fnc_card_stats(
+    p_posicion REAL[],
+    p_carga    REAL[],
+    OUT posicion_max REAL,
+    OUT posicion_min REAL,
+    OUT carga_max    REAL,
+    OUT carga_min    REAL,
+    OUT area         DOUBLE PRECISION,
+    OUT puntos       INT
+)
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    WITH pts AS (
+        SELECT x, y,
+               COALESCE(LEAD(x) OVER w, FIRST_VALUE(x) OVER w) AS x_sig,
+               COALESCE(LEAD(y) OVER w, FIRST_VALUE(y) OVER w) AS y_sig
+        FROM unnest(p_posicion, p_carga) WITH ORDINALITY AS u(x, y, i)
+        WHERE x IS NOT NULL AND y IS NOT NULL
+        WINDOW w AS (ORDER BY i)
+    )
+    SELECT MAX(x), MIN(x), MAX(y), MIN(y),
+           CASE WHEN COUNT(*) >= 3
+                THEN ABS(SUM(x::DOUBLE PRECISION * y_sig - x_sig::DOUBLE PRECISION * y)) / 2
+           END,
+           COUNT(*)::INT
+    FROM pts;
+$$;
+
+COMMENT ON FUNCTION stage.fnc_card_stats(REAL[], REAL[]) IS
+'Posición máx/mín, carga pico/mínima, área (polígono cerrado, in·lb) y puntos de una carta dinagráfica REAL[].';
+
+
+-- =============================================================================
+-- 3. CONVERSIÓN DE COLUMNAS TEXT LEGADAS
+-- =============================================================================
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT c.table_schema, c.table_name, c.column_name
+        FROM information_schema.columns c
+        WHERE (c.table_schema, c.table_name) IN (('stage', 'tbl_pozo_produccion'),
+                                                 ('reporting', 'dataset_current_values'))
+          AND c.column_name IN ('surface_rod_position', 'surface_rod_load',
+                                'downhole_pump_position', 'downhole_pump_load')
+          AND c.data_type = 'text'
+    LOOP
+        EXECUTE format('ALTER TABLE %I.%I ALTER COLUMN %I TYPE REAL[] USING stage.fnc_card_parse(%I)',
+                       r.table_schema, r.table_name, r.column_name, r.column_name);
+        RAISE NOTICE 'V18: %.%.% TEXT → REAL[]', r.table_schema, r.table_name, r.column_name;
+    END LOOP;
+END $$;
+
+
+-- =============================================================================
+-- 4. ESTADÍSTICAS DE LA CARTA ACTUAL POR POZO
+-- =============================================================================
+CREATE OR REPLACE VIEW reporting.vw_card_stats_current AS
+SELECT cv.well_id,
+       cv.ultima_actualizacion,
+       sup.posicion_max AS superficie_posicion_max,
+       sup.posicion_min AS superficie_posicion_min,
+       sup.carga_max    AS superficie_carga_max,
+       sup.carga_min    AS superficie_carga_min,
+       sup.area         AS superficie_area,
+       sup.puntos       AS superficie_puntos,
+       fon.posicion_max AS fondo_posicion_max,
+       fon.posicion_min AS fondo_posicion_min,
+       fon.carga_max    AS fondo_carga_max,
+       fon.carga_min    AS fondo_carga_min,
+       fon.area         AS fondo_area,
+       fon.puntos       AS fondo_puntos
+FROM reporting.dataset_current_values cv
+CROSS JOIN LATERAL stage.fnc_card_stats(cv.surface_rod_position, cv.surface_rod_load) sup
+CROSS JOIN LATERAL stage.fnc_card_stats(cv.downhole_pump_position, cv.downhole_pump_load) fon;
+
+COMMENT ON VIEW reporting.vw_card_stats_current IS
+'Estadísticas de las cartas de superficie y fondo actuales (dataset_current_values), calculadas sobre REAL[] con stage.fnc_card_stats.';
@@ -0,0 +1,49 @@
+-- =============================================================================
+-- V19__universal_stroke_features.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Features de carta dinagráfica por stroke (universal.stroke 1:1), calculadas
+--   en lote por src/dynacard_features.py (NumPy) para el clasificador CDI.
+--
+-- FLUJO:
+--   1. encolar: INSERT INTO universal.stroke (produccion_id) para cada registro
+--      de stage.tbl_pozo_produccion con carta (ON CONFLICT DO NOTHING).
+--   2. El extractor lee en lotes los strokes PENDIENTE sin features (o con
+--      otra version_extractor), decodifica las cuatro cartas REAL[] (V18) a
+--      matrices NumPy y calcula todas las features en una pasada vectorizada.
+--   3. COPY del lote a una tabla temporal → INSERT ... ON CONFLICT (stroke_id)
+--      DO UPDATE en universal.stroke_features.
+--
+-- NOTA: el extractor no cambia universal.stroke.estado; el ciclo
+--   PENDIENTE → EN_PROCESO → COMPLETADO es del diagnóstico CDI.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS universal.stroke_features (
+    stroke_id              BIGINT      PRIMARY KEY,        -- FK → universal.stroke (1:1)
+    puntos_superficie      INT,                            -- puntos válidos de la carta de superficie
+    puntos_fondo           INT,                            -- puntos válidos de la carta de fondo
+    carrera_superficie_in  REAL,                           -- MAX − MIN posición superficie (in)
+    carrera_fondo_in       REAL,                           -- MAX − MIN posición fondo (in)
+    carga_max_superficie   REAL,                           -- carga pico superficie (lb)
+    carga_min_superficie   REAL,                           -- carga mínima superficie (lb)
+    rango_carga_superficie REAL,                           -- carga pico − mínima superficie (lb)
+    rango_carga_fondo      REAL,                           -- carga pico − mínima fondo (lb)
+    area_superficie        REAL,                           -- área del polígono cerrado (in·lb)
+    area_fondo             REAL,                           -- área del polígono cerrado (in·lb)
+    llenado_estimado       REAL,                           -- área fondo / (carrera × rango carga), 0-1
+    forma                  REAL[],                         -- carta fondo (o superficie) normalizada 0-1
+                                                           -- y remuestreada: [x_0..x_n-1, y_0..y_n-1]
+    version_extractor      TEXT        NOT NULL,           -- versión del cálculo (recalcula si cambia)
+    calculado_en           TIMESTAMPTZ NOT NULL DEFAULT now(),
+
+    CONSTRAINT fk_stroke_features_stroke
+        FOREIGN KEY (stroke_id)
+        REFERENCES universal.stroke (stroke_id)
+        ON DELETE CASCADE
+);
+
+COMMENT ON TABLE universal.stroke_features IS
+'Features de carta dinagráfica por stroke (carrera, rango de carga, área, llenado estimado, forma remuestreada). Las escribe src/dynacard_features.py en lote vía COPY.';
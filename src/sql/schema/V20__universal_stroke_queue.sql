@@ -0,0 +1,134 @@
+-- =============================================================================
+-- V20__universal_stroke_queue.sql
+-- VERSION: 1.1.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Cola de trabajo CDI sobre universal.stroke para N workers concurrentes
+--   (src/stroke_queue.py): reclamar lote, heartbeat, completar y fallar, sin
+--   que dos workers procesen el mismo stroke.
+--
+-- FLUJO:
+--   1. fnc_stroke_reclamar(worker, lote, version): toma los PENDIENTE más
+--      antiguos que ya tienen features de esa version_extractor (V19) con
+--      FOR UPDATE SKIP LOCKED (los que otro worker está reclamando se saltan,
+--      sin esperar) y los pasa a EN_PROCESO con worker, reclamado_en,
+--      heartbeat_en e intentos + 1. Usa el índice parcial de pendientes.
+--   2. fnc_stroke_heartbeat(worker, ids): renueva heartbeat_en de los strokes
+--      que el worker sigue teniendo; devuelve cuántos conserva.
+--   3. fnc_stroke_completar(worker, ids): EN_PROCESO → COMPLETADO, solo si el
+--      stroke sigue asignado a ese worker.
+--   4. fnc_stroke_fallar(worker, ids, error, max_intentos): vuelve a PENDIENTE
+--      (reintento) o pasa a ERROR si ya agotó max_intentos.
+--   5. fnc_stroke_liberar_vencidos(visibilidad, max_intentos): los EN_PROCESO
+--      sin heartbeat dentro de la visibilidad (worker caído o colgado) vuelven
+--      a PENDIENTE o pasan a ERROR. Cada worker lo llama antes de reclamar.
+--
+-- NOTA: un worker cuyo stroke fue liberado por vencimiento ya no puede
+--   completarlo (el stroke tiene otro worker o volvió a PENDIENTE): completar
+--   devuelve menos filas que ids y el resultado se descarta.
+--   Un stroke sin features queda en la cola hasta que src/dynacard_features.py
+--   las calcule (el extractor solo lee PENDIENTE): reclamarlo antes lo dejaría
+--   sin features para siempre.
+-- =============================================================================
+
+ALTER TABLE universal.stroke
+    ADD COLUMN IF NOT EXISTS worker        TEXT,                     -- worker que lo tiene / lo completó
+    ADD COLUMN IF NOT EXISTS reclamado_en  TIMESTAMPTZ,              -- último claim
+    ADD COLUMN IF NOT EXISTS heartbeat_en  TIMESTAMPTZ,              -- último heartbeat (visibilidad)
+    ADD COLUMN IF NOT EXISTS intentos      INT NOT NULL DEFAULT 0,   -- claims realizados
+    ADD COLUMN IF NOT EXISTS ultimo_error  TEXT,
+    ADD COLUMN IF NOT EXISTS completado_en TIMESTAMPTZ;
+
+-- Solo las filas de la cola: el índice no crece con el histórico COMPLETADO
+CREATE INDEX IF NOT EXISTS idx_stroke_pendiente
+    ON universal.stroke (stroke_id) WHERE estado = 'PENDIENTE';
+CREATE INDEX IF NOT EXISTS idx_stroke_en_proceso
+    ON universal.stroke (heartbeat_en) WHERE estado = 'EN_PROCESO';
+
+
+DROP FUNCTION IF EXISTS universal.fnc_stroke_reclamar(TEXT, INT);
+
+CREATE OR REPLACE FUNCTION universal.fnc_stroke_reclamar(p_worker TEXT, p_lote INT, p_version TEXT)
+RETURNS TABLE (stroke_id BIGINT, produccion_id INT, intentos INT)
+LANGUAGE sql VOLATILE AS $$
+    WITH lote AS (
+        SELECT s.stroke_id
+        FROM universal.stroke s
+        JOIN universal.stroke_features f
+          ON f.stroke_id = s.stroke_id AND f.version_extractor = p_version
+        WHERE s.estado = 'PENDIENTE'
+        ORDER BY s.stroke_id
+        LIMIT p_lote
+        FOR UPDATE OF s SKIP LOCKED
+    )
+    UPDATE universal.stroke s
+    SET estado = 'EN_PROCESO', worker = p_worker,
+        reclamado_en = now(), heartbeat_en = now(), intentos = s.intentos + 1
+    FROM lote
+    WHERE s.stroke_id = lote.stroke_id
+    RETURNING s.stroke_id, s.produccion_id, s.intentos;
+$$;
+
+
+CREATE OR REPLACE FUNCTION universal.fnc_stroke_heartbeat(p_worker TEXT, p_ids BIGINT[])
+RETURNS INT
+LANGUAGE sql VOLATILE AS $$
+    WITH h AS (
+        UPDATE universal.stroke s
+        SET heartbeat_en = now()
+        WHERE s.stroke_id = ANY(p_ids) AND s.estado = 'EN_PROCESO' AND s.worker = p_worker
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM h;
+$$;
+
+
+CREATE OR REPLACE FUNCTION universal.fnc_stroke_completar(p_worker TEXT, p_ids BIGINT[])
+RETURNS INT
+LANGUAGE sql VOLATILE AS $$
+    WITH c AS (
+        UPDATE universal.stroke s
+        SET estado = 'COMPLETADO', completado_en = now(), ultimo_error = NULL
+        WHERE s.stroke_id = ANY(p_ids) AND s.estado = 'EN_PROCESO' AND s.worker = p_worker
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM c;
+$$;
+
+
+CREATE OR REPLACE FUNCTION universal.fnc_stroke_fallar(
+    p_worker TEXT, p_ids BIGINT[], p_error TEXT, p_max_intentos INT DEFAULT 3)
+RETURNS INT
+LANGUAGE sql VOLATILE AS $$
+    WITH f AS (
+        UPDATE universal.stroke s
+        SET estado = CASE WHEN s.intentos >= p_max_intentos THEN 'ERROR' ELSE 'PENDIENTE' END,
+            worker = NULL, ultimo_error = p_error
+        WHERE s.stroke_id = ANY(p_ids) AND s.estado = 'EN_PROCESO' AND s.worker = p_worker
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM f;
+$$;
+
+
+CREATE OR REPLACE FUNCTION universal.fnc_stroke_liberar_vencidos(
+    p_visibilidad INTERVAL, p_max_intentos INT DEFAULT 3)
+RETURNS INT
+LANGUAGE sql VOLATILE AS $$
+    WITH v AS (
+        UPDATE universal.stroke s
+        SET estado = CASE WHEN s.intentos >= p_max_intentos THEN 'ERROR' ELSE 'PENDIENTE' END,
+            ultimo_error = format('visibility timeout (worker %s)', s.worker),
+            worker = NULL
+        WHERE s.estado = 'EN_PROCESO' AND s.heartbeat_en < now() - p_visibilidad
+        RETURNING 1
+    )
+    SELECT COUNT(*)::INT FROM v;
+$$;
+
+COMMENT ON FUNCTION universal.fnc_stroke_reclamar(TEXT, INT, TEXT) IS
+'Reclama hasta p_lote strokes PENDIENTE con features p_version (FOR UPDATE SKIP LOCKED) para p_worker y los pasa a EN_PROCESO.';
+COMMENT ON FUNCTION universal.fnc_stroke_liberar_vencidos(INTERVAL, INT) IS
+'Devuelve a PENDIENTE (o ERROR tras p_max_intentos) los EN_PROCESO sin heartbeat dentro de p_visibilidad.';
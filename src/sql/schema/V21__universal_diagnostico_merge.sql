@@ -0,0 +1,39 @@
+-- =============================================================================
+-- V21__universal_diagnostico_merge.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Claves naturales para la escritura en lote de resultados CDI
+--   (src/diagnostic_writer.py):
+--     universal.diagnostico        → (stroke_id, patron_id)
+--     universal.validacion_experta → (stroke_id, experto)
+--
+-- FLUJO:
+--   1. El writer hace COPY del lote a una tabla temporal.
+--   2. Diagnósticos: INSERT ... ON CONFLICT (stroke_id, patron_id) DO UPDATE
+--      y se borran los patrones del stroke que ya no están en el nuevo top-K.
+--   3. Validaciones: una fila por experto y stroke; una corrección actualiza
+--      patron_id / comentario / updated_at.
+--   4. En la misma transacción, los strokes del lote pasan a COMPLETADO.
+--
+-- NOTA: antes de crear los índices únicos se eliminan los duplicados
+--   existentes, conservando la fila más reciente (mayor id).
+-- =============================================================================
+
+DELETE FROM universal.diagnostico d
+USING universal.diagnostico n
+WHERE n.stroke_id = d.stroke_id AND n.patron_id = d.patron_id
+  AND n.diagnostico_id > d.diagnostico_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_diagnostico_stroke_patron
+    ON universal.diagnostico (stroke_id, patron_id);
+
+DELETE FROM universal.validacion_experta v
+USING universal.validacion_experta n
+WHERE n.stroke_id = v.stroke_id AND n.experto = v.experto
+  AND n.validacion_id > v.validacion_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_validacion_stroke_experto
+    ON universal.validacion_experta (stroke_id, experto);
@@ -0,0 +1,277 @@
+-- =============================================================================
+-- V22__universal_reporting_change_log.sql
+-- VERSION: 1.2.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Change log del puente universal → reporting (V10). Los triggers de las
+--   tablas de resultados ML registran qué pozos (y, para CDI, qué strokes)
+--   cambiaron, y los triggers de fact_operaciones_horarias / _mensuales las
+--   horas y meses que cargó el pipeline; sp_sync_cdi/ipr/arps_to_reporting() consumen solo esos
+--   cambios en lugar de recalcular DISTINCT ON (well_id) sobre todo universal.
+--
+-- FLUJO:
+--   1. Triggers por sentencia (tablas de transición, un INSERT por COPY o
+--      lote, no por fila) escriben en reporting.bridge_cambios:
+--        CDI  ← diagnostico / validacion_experta de un stroke ya COMPLETADO
+--               (well_id + stroke_id)
+--        IPR  ← ipr_resultados (well_id + MIN(fecha_calculo) en desde),
+--               ipr_puntos_operacion (well_id)
+--        ARPS ← arps_resultados_declinacion (well_id)
+--   2. El paso de un stroke a COMPLETADO se registra con triggers por fila
+--      (AFTER INSERT / AFTER UPDATE OF estado con WHEN): claims, heartbeats
+--      y demás cambios de estado de la cola (V20) no disparan nada.
+--   3. Horas nuevas de fact_operaciones_horarias (sp_load_to_reporting):
+--      por pozo, el rango [desde, hasta] de fecha_hora insertado, como fila
+--      CDI si el rango tiene strokes COMPLETADO y como fila IPR si el pozo
+--      tiene una curva anterior a hasta. Los upserts de horas existentes no
+--      tocan las columnas del puente y no se registran.
+--   4. Meses nuevos o con produccion_petroleo_acumulada_bbl cambiada en
+--      fact_operaciones_mensuales (sp_load_to_reporting): fila ARPS del pozo
+--      si tiene resultados de declinación, para recalcular
+--      remanent_reserves_bbl (= EUR - Np). El UPDATE del propio SP ARPS no
+--      cambia Np y no se registra.
+--   5. Cada SP hace DELETE ... RETURNING de su fuente y recalcula los pozos
+--      y horas afectados en la misma transacción.
+--
+-- NOTA: los cambios de transacciones aún no confirmadas no son visibles para
+--   el DELETE y quedan para la siguiente llamada: no se pierden filas aunque
+--   los writers confirmen fuera de orden (a diferencia de un watermark por id).
+--   Un rango de horas nuevas puede incluir horas ya sincronizadas (p. ej. un
+--   backfill con huecos); recalcularlas no cambia su valor.
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS reporting.bridge_cambios (
+    cambio_id     BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    fuente        TEXT        NOT NULL CHECK (fuente IN ('CDI', 'IPR', 'ARPS')),
+    well_id       INT         NOT NULL,
+    stroke_id     BIGINT,                               -- CDI: stroke cuyo resultado cambió
+    desde         TIMESTAMPTZ,                          -- IPR: fecha_calculo más antigua cambiada;
+                                                        -- horas nuevas: primera fecha_hora
+    hasta         TIMESTAMPTZ,                          -- horas nuevas: última fecha_hora
+    registrado_en TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_bridge_cambios_fuente
+    ON reporting.bridge_cambios (fuente);
+
+ALTER TABLE reporting.bridge_cambios
+    ADD COLUMN IF NOT EXISTS hasta TIMESTAMPTZ;
+
+COMMENT ON TABLE reporting.bridge_cambios IS
+'Cambios de universal (y horas nuevas de fact_operaciones_horarias, con hasta) pendientes de sincronizar a reporting, por fuente (CDI / IPR / ARPS). Los escriben los triggers de V22 y los consumen los SPs de V10.';
+
+-- Horas de un pozo desde una fecha o dentro de un rango (IPR paso 3)
+CREATE INDEX IF NOT EXISTS idx_hora_pozo_fechahora
+    ON reporting.fact_operaciones_horarias (pozo_id, fecha_hora);
+-- Reemplazado por el registro de horas nuevas (ya no hay scan de NULL)
+DROP INDEX IF EXISTS reporting.idx_hora_sin_qmax;
+
+
+-- =============================================================================
+-- TRIGGER FUNCTION: registrar cambios por sentencia
+-- =============================================================================
+-- Las tablas de transición se llaman nuevas / viejas en todos los triggers;
+-- v_filas elige cuáles existen según TG_OP.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION reporting.fnc_bridge_registrar_cambios()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_filas TEXT := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT * FROM nuevas'
+        WHEN 'DELETE' THEN 'SELECT * FROM viejas'
+        ELSE 'SELECT * FROM nuevas UNION ALL SELECT * FROM viejas'
+    END;
+BEGIN
+    IF TG_TABLE_NAME IN ('diagnostico', 'validacion_experta') THEN
+        -- Strokes aún no COMPLETADO se registran al completarse
+        EXECUTE format($q$
+            INSERT INTO reporting.bridge_cambios (fuente, well_id, stroke_id)
+            SELECT DISTINCT 'CDI', pp.well_id, s.stroke_id
+            FROM (%s) f
+            JOIN universal.stroke s ON s.stroke_id = f.stroke_id AND s.estado = 'COMPLETADO'
+            JOIN stage.tbl_pozo_produccion pp ON pp.produccion_id = s.produccion_id
+        $q$, v_filas);
+
+    ELSIF TG_TABLE_NAME = 'ipr_resultados' THEN
+        EXECUTE format($q$
+            INSERT INTO reporting.bridge_cambios (fuente, well_id, desde)
+            SELECT 'IPR', f.well_id, MIN(f.fecha_calculo)
+            FROM (%s) f
+            GROUP BY f.well_id
+        $q$, v_filas);
+
+    ELSE
+        -- ipr_puntos_operacion → IPR, arps_resultados_declinacion → ARPS
+        EXECUTE format($q$
+            INSERT INTO reporting.bridge_cambios (fuente, well_id)
+            SELECT DISTINCT %L, f.well_id
+            FROM (%s) f
+        $q$, TG_ARGV[0], v_filas);
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+
+-- =============================================================================
+-- TRIGGER FUNCTION: stroke que pasa a COMPLETADO (por fila)
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION reporting.fnc_bridge_registrar_stroke()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO reporting.bridge_cambios (fuente, well_id, stroke_id)
+    SELECT 'CDI', pp.well_id, NEW.stroke_id
+    FROM stage.tbl_pozo_produccion pp
+    WHERE pp.produccion_id = NEW.produccion_id;
+    RETURN NULL;
+END;
+$$;
+
+
+-- =============================================================================
+-- TRIGGER FUNCTION: horas nuevas de fact_operaciones_horarias
+-- =============================================================================
+-- Un rango por pozo y sentencia; solo para pozos con datos del puente en él.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION reporting.fnc_bridge_registrar_horas()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    WITH r AS (
+        SELECT pozo_id, MIN(fecha_hora) AS desde, MAX(fecha_hora) AS hasta
+        FROM nuevas
+        GROUP BY pozo_id
+    )
+    INSERT INTO reporting.bridge_cambios (fuente, well_id, desde, hasta)
+    SELECT 'CDI', r.pozo_id, r.desde, r.hasta
+    FROM r
+    WHERE EXISTS (
+        SELECT 1
+        FROM stage.tbl_pozo_produccion pp
+        JOIN universal.stroke s ON s.produccion_id = pp.produccion_id
+        WHERE pp.well_id = r.pozo_id
+          AND pp.timestamp_lectura >= r.desde
+          AND pp.timestamp_lectura <  r.hasta + INTERVAL '1 hour'
+          AND s.estado = 'COMPLETADO'
+    )
+    UNION ALL
+    SELECT 'IPR', r.pozo_id, r.desde, r.hasta
+    FROM r
+    WHERE EXISTS (
+        SELECT 1 FROM universal.ipr_resultados ipr
+        WHERE ipr.well_id = r.pozo_id AND ipr.fecha_calculo <= r.hasta
+    );
+    RETURN NULL;
+END;
+$$;
+
+
+-- =============================================================================
+-- TRIGGER FUNCTION: meses nuevos o con Np cambiado (fact_operaciones_mensuales)
+-- =============================================================================
+-- UPDATE OF columna no admite tablas de transición: el UPDATE compara viejas
+-- y nuevas por (anio_mes, pozo_id).
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION reporting.fnc_bridge_registrar_meses()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO reporting.bridge_cambios (fuente, well_id)
+        SELECT DISTINCT 'ARPS', n.pozo_id
+        FROM nuevas n
+        WHERE EXISTS (SELECT 1 FROM universal.arps_resultados_declinacion a
+                      WHERE a.well_id = n.pozo_id);
+    ELSE
+        INSERT INTO reporting.bridge_cambios (fuente, well_id)
+        SELECT DISTINCT 'ARPS', n.pozo_id
+        FROM nuevas n
+        JOIN viejas o ON o.anio_mes = n.anio_mes AND o.pozo_id = n.pozo_id
+        WHERE n.produccion_petroleo_acumulada_bbl IS DISTINCT FROM o.produccion_petroleo_acumulada_bbl
+          AND EXISTS (SELECT 1 FROM universal.arps_resultados_declinacion a
+                      WHERE a.well_id = n.pozo_id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+
+-- =============================================================================
+-- TRIGGERS (uno por evento: las tablas de transición no admiten varios)
+-- =============================================================================
+
+DO $$
+DECLARE
+    r RECORD;
+    v_evento TEXT;
+BEGIN
+    FOR r IN
+        SELECT * FROM (VALUES
+            ('diagnostico',                 'CDI',  ARRAY['INSERT', 'UPDATE', 'DELETE']),
+            ('validacion_experta',          'CDI',  ARRAY['INSERT', 'UPDATE', 'DELETE']),
+            ('ipr_resultados',              'IPR',  ARRAY['INSERT', 'UPDATE', 'DELETE']),
+            ('ipr_puntos_operacion',        'IPR',  ARRAY['INSERT', 'UPDATE', 'DELETE']),
+            ('arps_resultados_declinacion', 'ARPS', ARRAY['INSERT', 'UPDATE', 'DELETE'])
+        ) AS t(tabla, fuente, eventos)
+    LOOP
+        FOREACH v_evento IN ARRAY r.eventos LOOP
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER trg_bridge_%s_%s
+                     AFTER %s ON universal.%I
+                     REFERENCING %s
+                     FOR EACH STATEMENT
+                     EXECUTE FUNCTION reporting.fnc_bridge_registrar_cambios(%L)',
+                r.tabla, lower(v_evento), v_evento, r.tabla,
+                CASE v_evento
+                    WHEN 'INSERT' THEN 'NEW TABLE AS nuevas'
+                    WHEN 'DELETE' THEN 'OLD TABLE AS viejas'
+                    ELSE 'OLD TABLE AS viejas NEW TABLE AS nuevas'
+                END,
+                r.fuente);
+        END LOOP;
+    END LOOP;
+END;
+$$;
+
+-- Los triggers por sentencia de la versión 1.0.0 disparaban en cada claim
+DROP TRIGGER IF EXISTS trg_bridge_stroke_insert ON universal.stroke;
+DROP TRIGGER IF EXISTS trg_bridge_stroke_update ON universal.stroke;
+
+CREATE OR REPLACE TRIGGER trg_bridge_stroke_completado_ins
+    AFTER INSERT ON universal.stroke
+    FOR EACH ROW
+    WHEN (NEW.estado = 'COMPLETADO')
+    EXECUTE FUNCTION reporting.fnc_bridge_registrar_stroke();
+
+CREATE OR REPLACE TRIGGER trg_bridge_stroke_completado_upd
+    AFTER UPDATE OF estado ON universal.stroke
+    FOR EACH ROW
+    WHEN (NEW.estado = 'COMPLETADO' AND OLD.estado IS DISTINCT FROM 'COMPLETADO')
+    EXECUTE FUNCTION reporting.fnc_bridge_registrar_stroke();
+
+CREATE OR REPLACE TRIGGER trg_bridge_horas_insert
+    AFTER INSERT ON reporting.fact_operaciones_horarias
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION reporting.fnc_bridge_registrar_horas();
+
+CREATE OR REPLACE TRIGGER trg_bridge_meses_insert
+    AFTER INSERT ON reporting.fact_operaciones_mensuales
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION reporting.fnc_bridge_registrar_meses();
+
+CREATE OR REPLACE TRIGGER trg_bridge_meses_update
+    AFTER UPDATE ON reporting.fact_operaciones_mensuales
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION reporting.fnc_bridge_registrar_meses();
@@ -0,0 +1,61 @@
+-- =============================================================================
+-- V4.1__referencial_vistas_stage.sql
+-- VERSION: 1.0.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Vistas de referencial que leen tablas de stage. Antes estaban en
+--   V4__referencial_schema_redesign.sql (sección 4.2).
+--
+-- FLUJO:
+--   1. init_schemas.init_pipeline() puede conservar referencial (REFERENCIAL_MODO
+--      = merge) y recrear stage; el DROP SCHEMA stage CASCADE elimina estas
+--      vistas.
+--   2. Este archivo corre siempre después de V4 stage y V4 referencial y las
+--      vuelve a crear (CREATE OR REPLACE).
+--
+-- NOTA: referencial.vw_limites_pozo_pivot_v4 la consumen V7 y V8
+--   (aplicar_evaluacion_universal).
+-- =============================================================================
+
+-- VISTA PIVOTEADA DE LÍMITES (V4) - [MOVIDA DESDE V6 PARA DISPONIBILIDAD INMEDIATA]
+CREATE OR REPLACE VIEW referencial.vw_limites_pozo_pivot_v4 AS
+WITH DistinctWells AS (
+    SELECT well_id as pozo_id FROM stage.tbl_pozo_maestra
+    UNION
+    SELECT DISTINCT pozo_id FROM referencial.tbl_limites_pozo WHERE activo IS NOT FALSE
+),
+VariablesToPivot AS (
+    -- ID Formato 1: 54 (WHP), 55 (CASING), 127 (SPM), 48 (FILL), 121 (ROAD LOAD)
+    SELECT variable_id, id_formato1 FROM referencial.tbl_maestra_variables 
+    WHERE id_formato1 IN (54, 55, 127, 48, 121)
+)
+SELECT 
+    dw.pozo_id,
+    -- WHP (ID: 54)
+    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.min_critical, l_def.min_critical) END) as whp_min_crit,
+    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as whp_min_warn,
+    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as whp_max_warn,
+    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.max_critical, l_def.max_critical) END) as whp_max_crit,
+    -- CASING (ID: 55)
+    MAX(CASE WHEN v.id_formato1 = 55 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as casing_max_warn,
+    -- SPM (ID: 127) - Target and Tolerance
+    MAX(CASE WHEN v.id_formato1 = 127 THEN COALESCE(l_spec.target_value, l_def.target_value) END) as spm_target,
+    MAX(CASE WHEN v.id_formato1 = 127 THEN COALESCE(l_spec.tolerancia_variacion_pct, l_def.tolerancia_variacion_pct) END) as spm_tol,
+    -- FILL (ID: 48) - Limits and Target
+    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.min_critical, l_def.min_critical) END) as fill_min_crit,
+    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as fill_min_warn,
+    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as fill_max_warn,
+    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.max_critical, l_def.max_critical) END) as fill_max_crit,
+    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.target_value, l_def.target_value) END) as fill_target_val,
+    -- ROAD LOAD (ID: 121) - [NEW]
+    MAX(CASE WHEN v.id_formato1 = 121 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as rl_min_warn,
+    MAX(CASE WHEN v.id_formato1 = 121 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as rl_max_warn
+FROM DistinctWells dw
+CROSS JOIN VariablesToPivot v
+LEFT JOIN referencial.tbl_limites_pozo l_spec 
+    ON l_spec.variable_id = v.variable_id AND l_spec.pozo_id = dw.pozo_id AND l_spec.activo IS NOT FALSE
+LEFT JOIN referencial.tbl_limites_pozo l_def 
+    ON l_def.variable_id = v.variable_id AND l_def.pozo_id = 1 AND l_def.activo IS NOT FALSE -- Fallback to Template
+GROUP BY dw.pozo_id;
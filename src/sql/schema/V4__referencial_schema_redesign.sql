@@ -58,7 +58,8 @@ CREATE TABLE referencial.tbl_maestra_variables (
     
     -- Metadatos para Dashboard (Alineado a hoja_validacion.csv)
     panel_id INTEGER REFERENCES referencial.tbl_ref_paneles_bi(panel_id),
-    ident_dashboard_element VARCHAR(50) -- Número o identificador del elemento en el panel
+    ident_dashboard_element VARCHAR(50), -- Número o identificador del elemento en el panel
+    activo BOOLEAN NOT NULL DEFAULT TRUE -- FALSE = baja lógica (ya no está en Variables_ID_stage.csv); variable_id estable
 );
 
 -- 2.5 Mapa SCADA → Formato1 → Stage (Integrado desde referencial_master.sql)
@@ -66,7 +67,8 @@ CREATE TABLE referencial.tbl_var_scada_map (
     var_id_scada INT PRIMARY KEY,
     id_formato1 INT NOT NULL,
     columna_stage VARCHAR(100) NOT NULL, -- Alineado con nombre_tecnico idealmente
-    comentario TEXT
+    comentario TEXT,
+    activo BOOLEAN NOT NULL DEFAULT TRUE -- FALSE = baja lógica (ya no está en 07_var_scada_map.csv)
 );
 
 -- =============================================================================
@@ -107,7 +109,8 @@ CREATE TABLE referencial.tbl_dq_rules (
     valor_max DECIMAL(12, 4),
     latencia_max_segundos INTEGER DEFAULT 300,
     severidad VARCHAR(20) DEFAULT 'WARNING',
-    origen_regla VARCHAR(100) DEFAULT 'Excel Matriz Calidad'
+    origen_regla VARCHAR(100) DEFAULT 'Excel Matriz Calidad',
+    activo BOOLEAN NOT NULL DEFAULT TRUE -- FALSE = baja lógica (ya no está en 02_reglas_calidad.csv); regla_id estable
 );
 
 -- 3.3 Reglas de Consistencia (Física)
@@ -212,49 +215,12 @@ SELECT
 FROM referencial.tbl_maestra_variables mv
 LEFT JOIN referencial.tbl_var_scada_map vsm
        ON vsm.id_formato1 = mv.id_formato1
+      AND vsm.activo
 LEFT JOIN referencial.tbl_ref_unidades u
        ON u.unidad_id = mv.unidad_id;
 
--- 4.2 VISTA PIVOTEADA DE LÍMITES (V4) - [MOVIDA DESDE V6 PARA DISPONIBILIDAD INMEDIATA]
-CREATE OR REPLACE VIEW referencial.vw_limites_pozo_pivot_v4 AS
-WITH DistinctWells AS (
-    SELECT well_id as pozo_id FROM stage.tbl_pozo_maestra
-    UNION
-    SELECT DISTINCT pozo_id FROM referencial.tbl_limites_pozo
-),
-VariablesToPivot AS (
-    -- ID Formato 1: 54 (WHP), 55 (CASING), 127 (SPM), 48 (FILL), 121 (ROAD LOAD)
-    SELECT variable_id, id_formato1 FROM referencial.tbl_maestra_variables 
-    WHERE id_formato1 IN (54, 55, 127, 48, 121)
-)
-SELECT 
-    dw.pozo_id,
-    -- WHP (ID: 54)
-    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.min_critical, l_def.min_critical) END) as whp_min_crit,
-    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as whp_min_warn,
-    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as whp_max_warn,
-    MAX(CASE WHEN v.id_formato1 = 54 THEN COALESCE(l_spec.max_critical, l_def.max_critical) END) as whp_max_crit,
-    -- CASING (ID: 55)
-    MAX(CASE WHEN v.id_formato1 = 55 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as casing_max_warn,
-    -- SPM (ID: 127) - Target and Tolerance
-    MAX(CASE WHEN v.id_formato1 = 127 THEN COALESCE(l_spec.target_value, l_def.target_value) END) as spm_target,
-    MAX(CASE WHEN v.id_formato1 = 127 THEN COALESCE(l_spec.tolerancia_variacion_pct, l_def.tolerancia_variacion_pct) END) as spm_tol,
-    -- FILL (ID: 48) - Limits and Target
-    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.min_critical, l_def.min_critical) END) as fill_min_crit,
-    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as fill_min_warn,
-    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as fill_max_warn,
-    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.max_critical, l_def.max_critical) END) as fill_max_crit,
-    MAX(CASE WHEN v.id_formato1 = 48 THEN COALESCE(l_spec.target_value, l_def.target_value) END) as fill_target_val,
-    -- ROAD LOAD (ID: 121) - [NEW]
-    MAX(CASE WHEN v.id_formato1 = 121 THEN COALESCE(l_spec.min_warning, l_def.min_warning) END) as rl_min_warn,
-    MAX(CASE WHEN v.id_formato1 = 121 THEN COALESCE(l_spec.max_warning, l_def.max_warning) END) as rl_max_warn
-FROM DistinctWells dw
-CROSS JOIN VariablesToPivot v
-LEFT JOIN referencial.tbl_limites_pozo l_spec 
-    ON l_spec.variable_id = v.variable_id AND l_spec.pozo_id = dw.pozo_id
-LEFT JOIN referencial.tbl_limites_pozo l_def 
-    ON l_def.variable_id = v.variable_id AND l_def.pozo_id = 1 -- Fallback to Template
-GROUP BY dw.pozo_id;
+-- 4.2 VISTA PIVOTEADA DE LÍMITES (V4) → V4.1__referencial_vistas_stage.sql
+--     (lee stage.tbl_pozo_maestra: se recrea aunque referencial se conserve)
 
 -- =============================================================================
 -- 5. MOTOR LÓGICO BASE (FUNCIONES DE ESTANDARIZACIÓN)
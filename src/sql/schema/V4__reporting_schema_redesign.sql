@@ -508,11 +508,11 @@ CREATE TABLE IF NOT EXISTS reporting.dataset_current_values (
     inclinacion_cilindro_x_act DECIMAL(5,2),
     inclinacion_cilindro_y_act DECIMAL(5,2),
 
-    -- [V4 CARTA] Coordenadas última carta dinagráfica (directo desde stage)
-    surface_rod_position TEXT,          -- ID:155 Current Inch Surface Card
-    surface_rod_load TEXT,              -- ID:156 Current Lb Surface Card
-    downhole_pump_position TEXT,        -- ID:157 Current Inch Downhole Pump Card
-    downhole_pump_load TEXT,            -- ID:158 Current Lb Downhole Pump Card
+    -- [V4 CARTA] Coordenadas última carta dinagráfica (directo desde stage, REAL[] — V18)
+    surface_rod_position REAL[],        -- ID:155 Current Inch Surface Card
+    surface_rod_load REAL[],            -- ID:156 Current Lb Surface Card
+    downhole_pump_position REAL[],      -- ID:157 Current Inch Downhole Pump Card
+    downhole_pump_load REAL[],          -- ID:158 Current Lb Downhole Pump Card
 
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
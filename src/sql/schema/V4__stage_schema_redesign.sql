@@ -51,7 +51,8 @@ CREATE SCHEMA stage;
 -- var_id corresponde al IDN nativo del controlador SCADA.
 -- moddate = timestamp original de la lectura en campo.
 CREATE TABLE stage.landing_scada_data (
-    idn INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, -- Autoincremental (API REST)
+    idn INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, -- Autoincremental: único origen del idn (orden de llegada → pivot V6.4)
+    raw_idn BIGINT,     -- idn en scada_raw_table (src/elt_process.py, dedup del solape); NULL para API y dumps
     unit_id INT,        -- Mapea a well_id vía tbl_pozo_maestra
     location_id INT,    -- ID de locación SCADA
     var_id INT,         -- IDN de variable SCADA (ver referencial.tbl_var_scada_map)
@@ -60,6 +61,10 @@ CREATE TABLE stage.landing_scada_data (
     modtime TIME        -- Hora de modificación (redundante con moddate, legacy API)
 );
 CREATE INDEX idx_landing_scada_data ON stage.landing_scada_data (unit_id, moddate);
+-- Pivot incremental (V6.4): filas nuevas por unit_id (idn > watermark)
+CREATE INDEX idx_landing_scada_unit_idn ON stage.landing_scada_data (unit_id, idn);
+-- EL RAW (V16): las filas re-leídas por el solape chocan aquí (ON CONFLICT DO NOTHING)
+CREATE UNIQUE INDEX uq_landing_scada_raw_idn ON stage.landing_scada_data (raw_idn);
 
 -- =====================================================
 -- 2. MAESTRA DE POZOS (datos estáticos por pozo)
@@ -245,11 +250,11 @@ CREATE TABLE stage.tbl_pozo_produccion (
     tiempo_parada_poc_medidor_acum DECIMAL,                -- ID: 126 | Gauge POC Down Time Accum
     spm_promedio_diario_medidor DECIMAL,                   -- ID: 127 | Daily Gauge Avg SPM
 
-    -- Tarjetas de Dinamómetro (arrays serializados)
-    surface_rod_position TEXT,                              -- ID: 155 | Current Inch Surface Card
-    surface_rod_load TEXT,                                  -- ID: 156 | Current Lb Surface Card
-    downhole_pump_position TEXT,                            -- ID: 157 | Current Inch Downhole Pump Card
-    downhole_pump_load TEXT,                                -- ID: 158 | Current Lb Downhole Pump Card
+    -- Tarjetas de Dinamómetro (REAL[]; TEXT legado → stage.fnc_card_parse, V18)
+    surface_rod_position REAL[],                            -- ID: 155 | Current Inch Surface Card
+    surface_rod_load REAL[],                                -- ID: 156 | Current Lb Surface Card
+    downhole_pump_position REAL[],                          -- ID: 157 | Current Inch Downhole Pump Card
+    downhole_pump_load REAL[],                              -- ID: 158 | Current Lb Downhole Pump Card
 
     -- Misceláneos
     nivel_fluido_dinamico DECIMAL,                         -- ID: 59  | Fluid Level TVD, ft
@@ -258,6 +263,10 @@ CREATE TABLE stage.tbl_pozo_produccion (
     CONSTRAINT uq_scada_timestamp_pozo UNIQUE (well_id, timestamp_lectura)
 );
 
+-- Ventanas por fecha sobre todos los pozos (sp_load_to_reporting, DQ, promedios V9):
+-- uq_scada_timestamp_pozo empieza por well_id y solo sirve con filtro de pozo.
+CREATE INDEX idx_pozo_produccion_ts ON stage.tbl_pozo_produccion (timestamp_lectura, well_id);
+
 -- =====================================================
 -- 5. DATA QUALITY LOG — Modelo Genérico Normalizado
 -- =====================================================
@@ -271,11 +280,24 @@ CREATE TABLE stage.tbl_pozo_scada_dq (
     produccion_id BIGINT NOT NULL,                         -- FK a tbl_pozo_produccion
     timestamp_lectura TIMESTAMP NOT NULL,                  -- Copia de produccion.timestamp_lectura
     variable_id INT,                                       -- ID formato1 de la variable evaluada
-    regla_id INT,                                          -- ID de la regla DQ aplicada
+    regla_id INT NOT NULL,                                 -- ID de la regla DQ aplicada
     valor_observado DECIMAL,                               -- Valor real de la variable
     valor_esperado_min DECIMAL,                            -- Umbral inferior de la regla
     valor_esperado_max DECIMAL,                            -- Umbral superior de la regla
     resultado_dq VARCHAR(20) DEFAULT 'FAIL',               -- PASS | FAIL | WARNING
     mensaje_error TEXT,                                    -- Descripción del fallo
-    CONSTRAINT fk_scada_dq FOREIGN KEY (produccion_id) REFERENCES stage.tbl_pozo_produccion (produccion_id) ON DELETE CASCADE
+    CONSTRAINT fk_scada_dq FOREIGN KEY (produccion_id) REFERENCES stage.tbl_pozo_produccion (produccion_id) ON DELETE CASCADE,
+    -- 1 resultado por lectura y regla: re-ejecutar una ventana actualiza, no duplica
+    CONSTRAINT uq_scada_dq_produccion_regla UNIQUE (produccion_id, regla_id)
+);
+
+-- Estado de validación DQ por lectura: qué versión del set de reglas (rules_hash,
+-- ver stage.fnc_dq_sql_compilado en V6.2) la validó y con qué valores (row_hash).
+-- El motor DQ solo re-evalúa lecturas nuevas, modificadas o validadas con otras reglas.
+CREATE TABLE stage.tbl_dq_validacion_estado (
+    produccion_id BIGINT PRIMARY KEY,                      -- FK a tbl_pozo_produccion
+    rules_hash TEXT NOT NULL,                              -- versión del set de reglas aplicado
+    row_hash TEXT NOT NULL,                                -- md5 de las columnas evaluadas
+    validado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_dq_estado_produccion FOREIGN KEY (produccion_id) REFERENCES stage.tbl_pozo_produccion (produccion_id) ON DELETE CASCADE
 );
\ No newline at end of file
@@ -11,18 +11,35 @@
 -- 1. PROCEDIMIENTO PRINCIPAL DE REPORTING HISTÓRICO
 -- ============================================================
 
+-- Firmas anteriores (sin p_well_ids / p_actualizar_dimensiones): CREATE OR REPLACE
+-- no las reemplaza sino que crea otra sobrecarga, y CALL con 2-5 argumentos
+-- quedaría ambiguo.
+DROP PROCEDURE IF EXISTS reporting.sp_load_to_reporting(DATE, DATE, BOOLEAN, BOOLEAN, BOOLEAN);
+DROP PROCEDURE IF EXISTS reporting.sp_load_to_reporting(DATE, DATE, BOOLEAN, BOOLEAN, BOOLEAN, INT[]);
+
 CREATE OR REPLACE PROCEDURE reporting.sp_load_to_reporting(
     p_fecha_inicio DATE,
     p_fecha_fin DATE,
     p_procesar_horario BOOLEAN DEFAULT TRUE,
     p_procesar_diario  BOOLEAN DEFAULT TRUE,
-    p_procesar_mensual BOOLEAN DEFAULT TRUE
+    p_procesar_mensual BOOLEAN DEFAULT TRUE,
+    p_well_ids INT[] DEFAULT NULL,         -- NULL = todos los pozos (modo incremental: solo afectados)
+    p_actualizar_dimensiones BOOLEAN DEFAULT TRUE  -- FALSE = chunks de backfill_reporting.py (dims ya pobladas)
 )
 LANGUAGE plpgsql
 AS $$
 DECLARE
     v_fecha_inicio DATE := COALESCE(p_fecha_inicio, CURRENT_DATE);
     v_fecha_fin    DATE := COALESCE(p_fecha_fin,    CURRENT_DATE);
+    -- Rango semiabierto [inicio, fin + 1 día) sobre timestamp_lectura SIN envolver
+    -- la columna en DATE(): sargable → index range scan en
+    -- idx_pozo_produccion_ts / uq_scada_timestamp_pozo (well_id, timestamp_lectura).
+    v_ts_inicio    TIMESTAMP := v_fecha_inicio::TIMESTAMP;
+    v_ts_fin_excl  TIMESTAMP := (v_fecha_fin + 1)::TIMESTAMP;
+    -- Ventana mensual alineada a meses completos: un refresh incremental de 1 día
+    -- debe re-agregar el mes entero, no sobrescribirlo con el parcial del día.
+    v_mes_inicio   DATE := DATE_TRUNC('month', COALESCE(p_fecha_inicio, CURRENT_DATE))::DATE;
+    v_mes_fin      DATE := (DATE_TRUNC('month', COALESCE(p_fecha_fin, CURRENT_DATE)) + INTERVAL '1 month - 1 day')::DATE;
     -- Zero-Hardcode: constantes parametrizadas desde tbl_config_kpi
     v_pump_displacement DECIMAL := 0.000971;  -- bbl/stroke
     v_vol_eff_cap       DECIMAL := 150.00;    -- % techo
@@ -43,66 +60,71 @@ BEGIN
     ------------------------------------------------------------------------
     -- 1) DIMENSIONES BÁSICAS
     ------------------------------------------------------------------------
-    PERFORM reporting.poblar_dim_tiempo(
-        (v_fecha_inicio - INTERVAL '1 year')::DATE,
-        (v_fecha_fin   + INTERVAL '1 year')::DATE
-    );
-
-    PERFORM reporting.poblar_dim_hora();
-
-    ------------------------------------------------------------------------
-    -- 2) DIMENSIÓN POZO (ENRIQUECIDA DESDE STAGE.TBL_POZO_MAESTRA)
-    ------------------------------------------------------------------------
-    INSERT INTO reporting.dim_pozo (
-        pozo_id,
-        nombre_pozo,
-        cliente,
-        pais,
-        region,
-        campo,
-        api_number,
-        coordenadas_pozo,
-        tipo_pozo,
-        tipo_levantamiento,
-        profundidad_completacion_ft,
-        diametro_embolo_bomba_in,
-        longitud_carrera_nominal_unidad_in, -- [V4] Renamed
-        potencia_nominal_motor_hp,
-        nombre_yacimiento
-    )
-    SELECT
-        m.well_id,
-        m.nombre_pozo,
-        m.cliente,
-        m.pais,
-        m.region,
-        m.campo,
-        m.api_number,
-        m.coordenadas_pozo,
-        m.tipo_pozo,
-        m.tipo_levantamiento,
-        m.profundidad_completacion,
-        m.diametro_embolo_bomba,
-        m.longitud_carrera_nominal_unidad_in,
-        m.potencia_nominal_motor,
-        m.nombre_yacimiento
-    FROM stage.tbl_pozo_maestra m
-    ON CONFLICT (pozo_id) DO UPDATE SET
-        nombre_pozo               = EXCLUDED.nombre_pozo,
-        cliente                   = EXCLUDED.cliente,
-        pais                      = EXCLUDED.pais,
-        region                    = EXCLUDED.region,
-        campo                     = EXCLUDED.campo,
-        api_number                = EXCLUDED.api_number,
-        coordenadas_pozo          = EXCLUDED.coordenadas_pozo,
-        tipo_pozo                 = EXCLUDED.tipo_pozo,
-        tipo_levantamiento        = EXCLUDED.tipo_levantamiento,
-        profundidad_completacion_ft = EXCLUDED.profundidad_completacion_ft,
-        diametro_embolo_bomba_in  = EXCLUDED.diametro_embolo_bomba_in,
-        longitud_carrera_nominal_unidad_in = EXCLUDED.longitud_carrera_nominal_unidad_in, -- [V4]
-        potencia_nominal_motor_hp = EXCLUDED.potencia_nominal_motor_hp,
-        nombre_yacimiento         = EXCLUDED.nombre_yacimiento,
-        fecha_ultima_actualizacion = CURRENT_TIMESTAMP;
+    -- El backfill paralelo las puebla una sola vez y llama a los chunks con
+    -- p_actualizar_dimensiones = FALSE: el upsert de dim_pozo bloquea las
+    -- filas de todos los pozos hasta el COMMIT y serializaría los chunks.
+    IF p_actualizar_dimensiones THEN
+        PERFORM reporting.poblar_dim_tiempo(
+            (v_fecha_inicio - INTERVAL '1 year')::DATE,
+            (v_fecha_fin   + INTERVAL '1 year')::DATE
+        );
+
+        PERFORM reporting.poblar_dim_hora();
+
+        ------------------------------------------------------------------------
+        -- 2) DIMENSIÓN POZO (ENRIQUECIDA DESDE STAGE.TBL_POZO_MAESTRA)
+        ------------------------------------------------------------------------
+        INSERT INTO reporting.dim_pozo (
+            pozo_id,
+            nombre_pozo,
+            cliente,
+            pais,
+            region,
+            campo,
+            api_number,
+            coordenadas_pozo,
+            tipo_pozo,
+            tipo_levantamiento,
+            profundidad_completacion_ft,
+            diametro_embolo_bomba_in,
+            longitud_carrera_nominal_unidad_in, -- [V4] Renamed
+            potencia_nominal_motor_hp,
+            nombre_yacimiento
+        )
+        SELECT
+            m.well_id,
+            m.nombre_pozo,
+            m.cliente,
+            m.pais,
+            m.region,
+            m.campo,
+            m.api_number,
+            m.coordenadas_pozo,
+            m.tipo_pozo,
+            m.tipo_levantamiento,
+            m.profundidad_completacion,
+            m.diametro_embolo_bomba,
+            m.longitud_carrera_nominal_unidad_in,
+            m.potencia_nominal_motor,
+            m.nombre_yacimiento
+        FROM stage.tbl_pozo_maestra m
+        ON CONFLICT (pozo_id) DO UPDATE SET
+            nombre_pozo               = EXCLUDED.nombre_pozo,
+            cliente                   = EXCLUDED.cliente,
+            pais                      = EXCLUDED.pais,
+            region                    = EXCLUDED.region,
+            campo                     = EXCLUDED.campo,
+            api_number                = EXCLUDED.api_number,
+            coordenadas_pozo          = EXCLUDED.coordenadas_pozo,
+            tipo_pozo                 = EXCLUDED.tipo_pozo,
+            tipo_levantamiento        = EXCLUDED.tipo_levantamiento,
+            profundidad_completacion_ft = EXCLUDED.profundidad_completacion_ft,
+            diametro_embolo_bomba_in  = EXCLUDED.diametro_embolo_bomba_in,
+            longitud_carrera_nominal_unidad_in = EXCLUDED.longitud_carrera_nominal_unidad_in, -- [V4]
+            potencia_nominal_motor_hp = EXCLUDED.potencia_nominal_motor_hp,
+            nombre_yacimiento         = EXCLUDED.nombre_yacimiento,
+            fecha_ultima_actualizacion = CURRENT_TIMESTAMP;
+    END IF;
 
     ------------------------------------------------------------------------
     -- 3) CAPA HORARIA AVANZADA (STAGE → FACT_OPERACIONES_HORARIAS)
@@ -147,7 +169,9 @@ BEGIN
                 -- Calidad
                 COUNT(*)                          AS num_registros
             FROM stage.tbl_pozo_produccion p
-            WHERE DATE(p.timestamp_lectura) BETWEEN v_fecha_inicio AND v_fecha_fin
+            WHERE p.timestamp_lectura >= v_ts_inicio
+              AND p.timestamp_lectura <  v_ts_fin_excl
+              AND (p_well_ids IS NULL OR p.well_id = ANY(p_well_ids))
             GROUP BY
                 p.well_id,
                 DATE(p.timestamp_lectura),
@@ -352,7 +376,9 @@ BEGIN
                 COUNT(*)                          AS num_registros,
                 COUNT(p.pip)                      AS registros_validos
             FROM stage.tbl_pozo_produccion p
-            WHERE DATE(p.timestamp_lectura) BETWEEN v_fecha_inicio AND v_fecha_fin
+            WHERE p.timestamp_lectura >= v_ts_inicio
+              AND p.timestamp_lectura <  v_ts_fin_excl
+              AND (p_well_ids IS NULL OR p.well_id = ANY(p_well_ids))
             GROUP BY p.well_id, DATE(p.timestamp_lectura)
         ),
         estado_fin_dia AS (
@@ -361,7 +387,9 @@ BEGIN
                 DATE(timestamp_lectura) as fecha,
                 estado_motor
             FROM stage.tbl_pozo_produccion
-            WHERE DATE(timestamp_lectura) BETWEEN v_fecha_inicio AND v_fecha_fin
+            WHERE timestamp_lectura >= v_ts_inicio
+              AND timestamp_lectura <  v_ts_fin_excl
+              AND (p_well_ids IS NULL OR well_id = ANY(p_well_ids))
             ORDER BY well_id, DATE(timestamp_lectura), timestamp_lectura DESC
         ),
         parametros_diseno AS (
@@ -604,8 +632,9 @@ BEGIN
             FROM reporting.fact_operaciones_diarias f
             JOIN reporting.dim_tiempo dt
                 ON f.fecha_id = dt.fecha_id
-            WHERE dt.fecha BETWEEN v_fecha_inicio AND v_fecha_fin
+            WHERE dt.fecha BETWEEN v_mes_inicio AND v_mes_fin
               AND f.periodo_comparacion = 'DIARIO'
+              AND (p_well_ids IS NULL OR f.pozo_id = ANY(p_well_ids))
             GROUP BY dt.anio_mes, f.pozo_id
         )
         INSERT INTO reporting.fact_operaciones_mensuales (
@@ -702,7 +731,7 @@ BEGIN
             kpi_kwh_bbl_mes             = EXCLUDED.kpi_kwh_bbl_mes,
             fecha_ultima_carga          = CURRENT_TIMESTAMP;
 
-        RAISE NOTICE 'Procesamiento mensual completado para rango: % a %', v_fecha_inicio, v_fecha_fin;
+        RAISE NOTICE 'Procesamiento mensual completado para rango: % a %', v_mes_inicio, v_mes_fin;
     END IF;
 
 END;
@@ -4,13 +4,178 @@
 -- Migrado de V5 para independencia del stack legacy.
 -- Valida reglas definidas en referencial.tbl_dq_rules contra stage.tbl_pozo_produccion
 -- Fix: valor_max NULL-safe + sp_execute_consistency_validation
+-- Single-pass: todas las reglas en un solo scan (LATERAL VALUES, SQL cacheado por hash de reglas)
 --------------------------------------------------------------------------------
 */
 
+-- =============================================================================
+-- DQ COMPILADO (single-pass + incremental)
+-- Todas las reglas activas se evalúan en UN scan de la ventana: la sentencia
+-- generada despivota las columnas de las reglas con CROSS JOIN LATERAL (VALUES ...)
+-- (una fila por regla y lectura). El SQL se genera una vez por versión del set de
+-- reglas (hash) y se guarda en stage.tbl_dq_sql_cache; los parámetros de ventana y
+-- pozo van por USING, así el texto no cambia entre corridas.
+--
+-- Incremental: stage.tbl_dq_validacion_estado guarda por produccion_id el
+-- rules_hash y el md5 de las columnas evaluadas. Solo se validan lecturas nuevas,
+-- con valores cambiados o validadas con otra versión de reglas; los resultados se
+-- upsertean por (produccion_id, regla_id) y se borran los de reglas que ya no aplican.
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS stage.tbl_dq_sql_cache (
+    rules_hash   TEXT PRIMARY KEY,                     -- md5 del set de reglas + columnas resueltas
+    sql_text     TEXT NOT NULL,                        -- INSERT ... SELECT compilado
+    num_reglas   INT  NOT NULL,
+    compilado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE stage.tbl_dq_sql_cache IS
+'SQL compilado del motor DQ single-pass por versión (hash) del set de reglas. Se regenera al cambiar tbl_dq_rules / SCADA map.';
+
+
+-- Reglas evaluables: columna real (SCADA map → nombre_tecnico) existente y numérica en stage
+CREATE OR REPLACE FUNCTION stage.fnc_dq_reglas_activas()
+RETURNS TABLE (
+    regla_id    INT,
+    variable_id INT,
+    columna     TEXT,
+    valor_min   DECIMAL,
+    valor_max   DECIMAL
+)
+LANGUAGE sql STABLE AS $$
+    SELECT r.regla_id, r.variable_id,
+           COALESCE(vsm.columna_stage, v.nombre_tecnico)::TEXT,
+           r.valor_min, r.valor_max
+    FROM referencial.tbl_dq_rules r
+    JOIN referencial.tbl_maestra_variables v ON r.variable_id = v.variable_id AND v.activo
+    LEFT JOIN referencial.tbl_var_scada_map vsm ON vsm.id_formato1 = v.id_formato1 AND vsm.activo
+    JOIN information_schema.columns c
+      ON c.table_schema = 'stage'
+     AND c.table_name = 'tbl_pozo_produccion'
+     AND c.column_name = COALESCE(vsm.columna_stage, v.nombre_tecnico)
+     AND c.data_type IN ('numeric', 'integer', 'decimal', 'double precision', 'real', 'bigint', 'smallint')
+    WHERE r.activo
+    ORDER BY r.regla_id;
+$$;
+
+
+-- Devuelve (y cachea) el INSERT single-pass para el set de reglas vigente.
+-- Parámetros de la sentencia: $1 ts_inicio, $2 ts_fin (exclusivo), $3 well_id (NULL = todos),
+--                             $4 forzar (TRUE = re-validar toda la ventana)
+CREATE OR REPLACE FUNCTION stage.fnc_dq_sql_compilado()
+RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_hash   TEXT;
+    v_sql    TEXT;
+    v_values TEXT;
+    v_cols   TEXT;
+    v_n      INT;
+BEGIN
+    -- El prefijo versiona también la forma de la sentencia generada
+    SELECT md5('dq-v2;' || COALESCE(string_agg(
+               format('%s|%s|%s|%s|%s', regla_id, variable_id, columna, valor_min, valor_max),
+               ';' ORDER BY regla_id), '')),
+           COUNT(*),
+           string_agg(
+               format('(%s::INT, %s::INT, c.%I::DECIMAL, %L::DECIMAL, %L::DECIMAL)',
+                      regla_id, variable_id, columna, valor_min, valor_max),
+               E',\n        ' ORDER BY regla_id)
+    INTO v_hash, v_n, v_values
+    FROM stage.fnc_dq_reglas_activas();
+
+    SELECT string_agg(format('p.%I', columna), ', ' ORDER BY columna)
+    INTO v_cols
+    FROM (SELECT DISTINCT columna FROM stage.fnc_dq_reglas_activas()) d;
+
+    SELECT sql_text INTO v_sql FROM stage.tbl_dq_sql_cache WHERE rules_hash = v_hash;
+    IF v_sql IS NOT NULL THEN
+        RETURN v_sql;
+    END IF;
+
+    IF v_n = 0 THEN
+        v_sql := 'SELECT 1 WHERE FALSE';  -- sin reglas evaluables: no-op
+    ELSE
+        v_sql := 'WITH candidatos AS MATERIALIZED (
+    SELECT x.*
+    FROM (
+        SELECT p.produccion_id, p.timestamp_lectura, ' || v_cols || ',
+               md5(ROW(' || v_cols || ')::TEXT) AS row_hash
+        FROM stage.tbl_pozo_produccion p
+        WHERE p.timestamp_lectura >= $1
+          AND p.timestamp_lectura <  $2
+          AND ($3::INT IS NULL OR p.well_id = $3)
+    ) x
+    LEFT JOIN stage.tbl_dq_validacion_estado e ON e.produccion_id = x.produccion_id
+    WHERE $4
+       OR e.produccion_id IS NULL
+       OR e.rules_hash <> ' || quote_literal(v_hash) || '
+       OR e.row_hash <> x.row_hash
+),
+evaluados AS (
+    SELECT c.produccion_id, c.timestamp_lectura, r.*
+    FROM candidatos c
+    CROSS JOIN LATERAL (VALUES
+        ' || v_values || '
+    ) AS r(regla_id, variable_id, valor, vmin, vmax)
+    WHERE r.valor IS NOT NULL
+),
+obsoletos AS (
+    DELETE FROM stage.tbl_pozo_scada_dq d
+    USING candidatos c
+    WHERE d.produccion_id = c.produccion_id
+      AND NOT EXISTS (SELECT 1 FROM evaluados ev
+                      WHERE ev.produccion_id = d.produccion_id AND ev.regla_id = d.regla_id)
+),
+marcados AS (
+    INSERT INTO stage.tbl_dq_validacion_estado (produccion_id, rules_hash, row_hash, validado_en)
+    SELECT produccion_id, ' || quote_literal(v_hash) || ', row_hash, CURRENT_TIMESTAMP
+    FROM candidatos
+    ON CONFLICT (produccion_id) DO UPDATE SET
+        rules_hash  = EXCLUDED.rules_hash,
+        row_hash    = EXCLUDED.row_hash,
+        validado_en = EXCLUDED.validado_en
+)
+INSERT INTO stage.tbl_pozo_scada_dq (
+    produccion_id, timestamp_lectura, variable_id, regla_id,
+    valor_observado, valor_esperado_min, valor_esperado_max, resultado_dq
+)
+SELECT
+    ev.produccion_id, ev.timestamp_lectura, ev.variable_id, ev.regla_id,
+    ev.valor, ev.vmin, ev.vmax,
+    CASE
+        WHEN ev.vmin IS NOT NULL AND ev.valor < ev.vmin THEN ''FAIL''
+        WHEN ev.vmax IS NOT NULL AND ev.valor > ev.vmax THEN ''FAIL''
+        ELSE ''PASS''
+    END
+FROM evaluados ev
+ON CONFLICT (produccion_id, regla_id) DO UPDATE SET
+    timestamp_lectura  = EXCLUDED.timestamp_lectura,
+    variable_id        = EXCLUDED.variable_id,
+    valor_observado    = EXCLUDED.valor_observado,
+    valor_esperado_min = EXCLUDED.valor_esperado_min,
+    valor_esperado_max = EXCLUDED.valor_esperado_max,
+    resultado_dq       = EXCLUDED.resultado_dq,
+    mensaje_error      = NULL';
+    END IF;
+
+    -- Una sola entrada vigente: las versiones anteriores ya no se usan
+    DELETE FROM stage.tbl_dq_sql_cache WHERE rules_hash <> v_hash;
+    INSERT INTO stage.tbl_dq_sql_cache (rules_hash, sql_text, num_reglas)
+    VALUES (v_hash, v_sql, v_n)
+    ON CONFLICT (rules_hash) DO NOTHING;
+
+    RAISE NOTICE '[DQ] SQL single-pass recompilado (% reglas, hash %)', v_n, left(v_hash, 8);
+    RETURN v_sql;
+END;
+$$;
+
+
 CREATE OR REPLACE PROCEDURE stage.sp_execute_dq_validation(
     p_fecha_inicio DATE,
     p_fecha_fin DATE,
-    p_well_id INT DEFAULT NULL
+    p_well_id INT DEFAULT NULL,
+    p_compilado BOOLEAN DEFAULT TRUE,      -- FALSE = motor legacy (una sentencia/scan por regla)
+    p_forzar BOOLEAN DEFAULT FALSE         -- TRUE = re-validar toda la ventana (ignora tbl_dq_validacion_estado)
 )
 LANGUAGE plpgsql
 AS $$
@@ -19,9 +184,18 @@ DECLARE
     v_sql_check TEXT;
     v_column_exists BOOLEAN;
     v_col_name TEXT;          -- columna real en stage (traducida vía SCADA map)
+    v_count BIGINT := 0;
 BEGIN
     RAISE NOTICE 'Iniciando Motor de Calidad de Datos (DQ) V6.2 + SCADA Map...';
 
+    IF p_compilado THEN
+        EXECUTE stage.fnc_dq_sql_compilado()
+        USING p_fecha_inicio::TIMESTAMP, (p_fecha_fin + 1)::TIMESTAMP, p_well_id, p_forzar;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+        RAISE NOTICE 'Validación DQ completada (single-pass incremental): % resultados nuevos/actualizados.', v_count;
+        RETURN;
+    END IF;
+
     FOR v_rule IN 
         SELECT 
             r.regla_id, r.variable_id, r.valor_min, r.valor_max,
@@ -29,8 +203,9 @@ BEGIN
             -- Traducción: preferir columna_stage del SCADA map, fallback a nombre_tecnico
             COALESCE(vsm.columna_stage, v.nombre_tecnico) AS columna_stage_real
         FROM referencial.tbl_dq_rules r
-        JOIN referencial.tbl_maestra_variables v ON r.variable_id = v.variable_id
-        LEFT JOIN referencial.tbl_var_scada_map vsm ON vsm.id_formato1 = v.id_formato1
+        JOIN referencial.tbl_maestra_variables v ON r.variable_id = v.variable_id AND v.activo
+        LEFT JOIN referencial.tbl_var_scada_map vsm ON vsm.id_formato1 = v.id_formato1 AND vsm.activo
+        WHERE r.activo
     LOOP
         v_col_name := v_rule.columna_stage_real;
 
@@ -69,7 +244,8 @@ BEGIN
                     ELSE %L 
                 END
              FROM stage.tbl_pozo_produccion
-             WHERE timestamp_lectura::DATE BETWEEN %L::DATE AND %L::DATE
+             WHERE timestamp_lectura >= %L::TIMESTAMP
+               AND timestamp_lectura <  %L::TIMESTAMP
                AND (%I::DECIMAL IS NOT NULL)',
              v_rule.variable_id, v_rule.regla_id, v_col_name,
              v_rule.valor_min, v_rule.valor_max,
@@ -78,7 +254,8 @@ BEGIN
              -- max check
              v_rule.valor_max, v_col_name, v_rule.valor_max, 'FAIL',
              'PASS',
-             p_fecha_inicio::TEXT, p_fecha_fin::TEXT,
+             -- rango semiabierto [inicio, fin + 1 día): sargable (sin ::DATE sobre la columna)
+             p_fecha_inicio::TIMESTAMP::TEXT, (p_fecha_fin + 1)::TIMESTAMP::TEXT,
              v_col_name
         );
 
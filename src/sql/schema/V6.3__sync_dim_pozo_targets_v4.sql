@@ -70,23 +70,23 @@ BEGIN
         -- SPM target: variable_id=111 (spm_promedio_diario_medidor, target=1.80)
         pump_spm_target = COALESCE(dp.pump_spm_target,
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = dp.pozo_id AND lim.variable_id = 111),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = dp.pozo_id AND lim.variable_id = 111),
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = 1 AND lim.variable_id = 111),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = 1 AND lim.variable_id = 111),
             1.80
         ),
         -- Pump Fill target: variable_id=50 (llenado_bomba_minimo, target=80)
         pump_fill_monitor_target = COALESCE(dp.pump_fill_monitor_target,
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = dp.pozo_id AND lim.variable_id = 50),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = dp.pozo_id AND lim.variable_id = 50),
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = 1 AND lim.variable_id = 50),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = 1 AND lim.variable_id = 50),
             80.00
         ),
         -- Pump Stroke Length target: variable_id=52 o desde maestra
         pump_stroke_length_target = COALESCE(dp.pump_stroke_length_target,
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = dp.pozo_id AND lim.variable_id = 52),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = dp.pozo_id AND lim.variable_id = 52),
             (SELECT m.longitud_carrera_nominal_unidad_in 
              FROM stage.tbl_pozo_maestra m WHERE m.well_id = dp.pozo_id),
             360.00
@@ -112,9 +112,9 @@ BEGIN
         kpi_kwh_bbl_baseline = COALESCE(dp.kpi_kwh_bbl_baseline, 12.000),
         kpi_kwh_bbl_target   = COALESCE(dp.kpi_kwh_bbl_target,
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = dp.pozo_id AND lim.variable_id = 49),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = dp.pozo_id AND lim.variable_id = 49),
             (SELECT lim.target_value FROM referencial.tbl_limites_pozo lim 
-             WHERE lim.pozo_id = 1 AND lim.variable_id = 49),
+             WHERE lim.activo IS NOT FALSE AND lim.pozo_id = 1 AND lim.variable_id = 49),
             10.000
         ),
 
@@ -0,0 +1,348 @@
+-- =============================================================================
+-- V6.4__landing_pivot_engine.sql
+-- VERSION: 1.1.0
+-- FECHA:   2026-10-18
+-- =============================================================================
+--
+-- DESCRIPCIÓN:
+--   Pivot EAV stage.landing_scada_data → stage.tbl_pozo_produccion generado a
+--   partir de metadatos. Reemplaza los ~70 MAX(CASE WHEN l.var_id = N ...)
+--   escritos a mano en src/sql/process/V1__stage_to_stage.sql.
+--
+--   Fuente de verdad: referencial.tbl_var_scada_map (var_id_scada → columna_stage,
+--   cargado por load_referencial.py desde inputs_referencial/07_var_scada_map.csv)
+--   + tipos reales de las columnas de stage.tbl_pozo_produccion (pg_attribute).
+--   Agregar una variable SCADA = agregar una fila al mapa; no se edita SQL.
+--
+--   La sentencia generada lee cada fila de landing una sola vez: un GROUP BY
+--   (unit_id, moddate) con un agregado FILTER (WHERE l.var_id = N) por columna.
+--   timestamp_lectura = moddate (timestamp real de la lectura en campo).
+--
+--   1. stage.tbl_pivot_sql_cache            — SQL compilado por versión (hash) del mapa
+--   2. stage.tbl_pivot_watermark            — último idn de landing pivotado por unit_id
+--      stage.tbl_produccion_cambios         — claves (well_id, timestamp_lectura) que el pivot
+--                                             insertó o cambió (delta del runner, V13)
+--   3. stage.fnc_pivot_columnas()           — columnas pivotables (mapa ∩ columnas reales)
+--   4. stage.fnc_pivot_sql_compilado()      — genera / cachea el INSERT ... SELECT
+--   5. stage.sp_pivot_landing_to_produccion — pivot de una ventana de moddate
+--   6. stage.sp_pivot_landing_incremental   — pivot solo de filas nuevas (watermark)
+--
+--   Variantes de la sentencia (el texto no cambia entre corridas;
+--   src/landing_pivot.py las registra como prepared statements por conexión):
+--     ventana     $1 moddate desde, $2 moddate hasta (exclusivo), $3 unit_ids INT[]
+--     incremental $1 unit_ids INT[]  (NULL = todos)
+--
+-- INCREMENTAL (refresco por minuto / por SPM):
+--   Filas nuevas = landing.idn > watermark del unit_id (range scan sobre
+--   idx_landing_scada_unit_idn). Se re-pivotean las claves (unit_id, moddate)
+--   que esas filas tocan, leyendo todas sus filas vía idx_landing_scada_data:
+--   una variable que llega tarde para una lectura ya pivoteada no borra las
+--   demás columnas. El watermark avanza en la misma sentencia (misma
+--   transacción) que el INSERT. No se re-escanea el resto de landing.
+--   Supone idn asignado en orden de commit (un solo writer por unit_id: API/dumps).
+--
+-- CLAVES CAMBIADAS:
+--   Ambas variantes registran en stage.tbl_produccion_cambios cada lectura que
+--   insertan o cambian (RETURNING del upsert; las que no cambian no vuelven).
+--   Una fila de landing tardía o una variable tardía re-pivotea lecturas con
+--   timestamp_lectura ya procesado por reporting: el delta incremental (V13)
+--   las toma de aquí, no solo de timestamp_lectura > watermark.
+--   sp_avanzar_watermark (V13) borra las claves consumidas.
+-- =============================================================================
+
+
+-- =============================================================================
+-- 1. CACHE DEL SQL COMPILADO
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS stage.tbl_pivot_sql_cache (
+    map_hash      TEXT PRIMARY KEY,                    -- md5 de variante + mapa resuelto (columna|tipo|var_ids)
+    variante      TEXT NOT NULL,                       -- ventana | incremental
+    sql_text      TEXT NOT NULL,                       -- INSERT ... SELECT ... GROUP BY compilado
+    num_columnas  INT  NOT NULL,
+    compilado_en  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE stage.tbl_pivot_sql_cache IS
+'SQL compilado del pivot landing → tbl_pozo_produccion por variante y versión (hash) de tbl_var_scada_map + tipos de columna.';
+
+
+-- =============================================================================
+-- 2. WATERMARK DEL PIVOT INCREMENTAL
+-- =============================================================================
+CREATE TABLE IF NOT EXISTS stage.tbl_pivot_watermark (
+    unit_id         INT PRIMARY KEY,                   -- landing_scada_data.unit_id (= well_id)
+    ultimo_idn      BIGINT    NOT NULL,                -- MAX(idn) de landing ya pivotado
+    ultimo_moddate  TIMESTAMP,                         -- MAX(moddate) de esas filas (informativo)
+    actualizado_en  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE stage.tbl_pivot_watermark IS
+'Último landing_scada_data.idn pivotado por unit_id. Lo avanza sp_pivot_landing_incremental() en la misma transacción que el INSERT.';
+
+CREATE TABLE IF NOT EXISTS stage.tbl_produccion_cambios (
+    cambio_id         BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    well_id           INT       NOT NULL,
+    timestamp_lectura TIMESTAMP NOT NULL,
+    registrado_en     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_produccion_cambios_pozo
+    ON stage.tbl_produccion_cambios (well_id, timestamp_lectura);
+
+COMMENT ON TABLE stage.tbl_produccion_cambios IS
+'Lecturas de tbl_pozo_produccion insertadas o cambiadas por el pivot (una fila por lectura y pivot). Las lee reporting.fnc_detectar_delta_incremental() y las borra sp_avanzar_watermark().';
+
+
+-- =============================================================================
+-- 3. COLUMNAS PIVOTABLES
+-- =============================================================================
+-- Una fila por columna destino. Varios IDN pueden alimentar la misma columna
+-- (var_ids). Las entradas del mapa sin columna real en stage se ignoran.
+CREATE OR REPLACE FUNCTION stage.fnc_pivot_columnas()
+RETURNS TABLE (
+    columna   TEXT,
+    tipo      TEXT,        -- format_type(): numeric, numeric(10,2), integer, boolean, text...
+    categoria "char",      -- pg_type.typcategory: N numérico, B booleano, A arreglo, S texto...
+    var_ids   INT[]
+)
+LANGUAGE sql STABLE AS $$
+    SELECT a.attname::TEXT,
+           format_type(a.atttypid, a.atttypmod),
+           t.typcategory,
+           array_agg(m.var_id_scada ORDER BY m.var_id_scada)
+    FROM referencial.tbl_var_scada_map m
+    JOIN pg_attribute a
+      ON a.attrelid = 'stage.tbl_pozo_produccion'::regclass
+     AND a.attname = m.columna_stage
+     AND a.attnum > 0
+     AND NOT a.attisdropped
+    JOIN pg_type t ON t.oid = a.atttypid
+    WHERE m.activo
+      AND a.attname NOT IN ('produccion_id', 'well_id', 'timestamp_lectura')
+    GROUP BY a.attnum, a.attname, a.atttypid, a.atttypmod, t.typcategory
+    ORDER BY a.attnum;
+$$;
+
+
+-- =============================================================================
+-- 4. GENERADOR + CACHE
+-- =============================================================================
+-- Agregado por categoría de tipo:
+--   B (boolean) → BOOL_OR(CAST(measure AS BOOLEAN))
+--   N (numérico) → CAST(MAX(CAST(measure AS NUMERIC)) AS <tipo>)   ('12.0' → INT ok)
+--   A (arreglo)  → stage.fnc_card_parse(MAX(measure))              (tarjetas dinamómetro REAL[], V18)
+--   resto        → CAST(MAX(measure) AS <tipo>)
+CREATE OR REPLACE FUNCTION stage.fnc_pivot_sql_compilado(p_incremental BOOLEAN DEFAULT FALSE)
+RETURNS TEXT
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_hash     TEXT;
+    v_sql      TEXT;
+    v_n        INT;
+    v_cols     TEXT;
+    v_aggs     TEXT;
+    v_set      TEXT;
+    v_p_cols   TEXT;
+    v_ex_cols  TEXT;
+    v_var_ids  INT[];
+    v_ignoradas TEXT;
+    v_variante TEXT := CASE WHEN p_incremental THEN 'incremental' ELSE 'ventana' END;
+    v_origen   TEXT;
+BEGIN
+    SELECT md5('pivot-v2;' || v_variante || ';' || COALESCE(string_agg(
+               format('%s|%s|%s', columna, tipo, var_ids), ';' ORDER BY columna), '')),
+           COUNT(*)
+    INTO v_hash, v_n
+    FROM stage.fnc_pivot_columnas();
+
+    SELECT sql_text INTO v_sql FROM stage.tbl_pivot_sql_cache WHERE map_hash = v_hash;
+    IF v_sql IS NOT NULL THEN
+        RETURN v_sql;
+    END IF;
+
+    IF v_n = 0 THEN
+        v_sql := 'SELECT 0::BIGINT';  -- mapa vacío: no-op
+    ELSE
+        SELECT
+            string_agg(format('%I', c.columna), E',\n    ' ORDER BY c.ord),
+            string_agg(
+                CASE c.categoria
+                    WHEN 'B' THEN format('BOOL_OR(CAST(l.measure AS BOOLEAN)) FILTER (WHERE %s)', c.filtro)
+                    WHEN 'N' THEN format('CAST(MAX(CAST(l.measure AS NUMERIC)) FILTER (WHERE %s) AS %s)', c.filtro, c.tipo)
+                    WHEN 'A' THEN format('stage.fnc_card_parse(MAX(l.measure) FILTER (WHERE %s))', c.filtro)
+                    ELSE          format('CAST(MAX(l.measure) FILTER (WHERE %s) AS %s)', c.filtro, c.tipo)
+                END || format(' AS %I', c.columna),
+                E',\n    ' ORDER BY c.ord),
+            string_agg(format('%1$I = EXCLUDED.%1$I', c.columna), E',\n    ' ORDER BY c.ord),
+            string_agg(format('p.%I', c.columna), ', ' ORDER BY c.ord),
+            string_agg(format('EXCLUDED.%I', c.columna), ', ' ORDER BY c.ord)
+        INTO v_cols, v_aggs, v_set, v_p_cols, v_ex_cols
+        FROM (
+            SELECT f.columna, f.tipo, f.categoria, ROW_NUMBER() OVER () AS ord,
+                   CASE WHEN cardinality(f.var_ids) = 1
+                        THEN format('l.var_id = %s', f.var_ids[1])
+                        ELSE format('l.var_id IN (%s)', array_to_string(f.var_ids, ', '))
+                   END AS filtro
+            FROM stage.fnc_pivot_columnas() f
+        ) c;
+
+        SELECT array_agg(DISTINCT v ORDER BY v) INTO v_var_ids
+        FROM stage.fnc_pivot_columnas() f, unnest(f.var_ids) v;
+
+        IF p_incremental THEN
+            -- delta: filas nuevas por unit_id (idn > watermark); claves: lecturas tocadas
+            v_origen := 'WITH delta AS MATERIALIZED (
+    SELECT d.unit_id, d.moddate, d.idn
+    FROM stage.tbl_pozo_maestra m
+    LEFT JOIN stage.tbl_pivot_watermark w ON w.unit_id = m.well_id
+    CROSS JOIN LATERAL (
+        SELECT l.unit_id, l.moddate, l.idn
+        FROM stage.landing_scada_data l
+        WHERE l.unit_id = m.well_id
+          AND l.idn > COALESCE(w.ultimo_idn, 0)
+    ) d
+    WHERE $1::INT[] IS NULL OR m.well_id = ANY($1)
+),
+marcas AS (
+    INSERT INTO stage.tbl_pivot_watermark (unit_id, ultimo_idn, ultimo_moddate, actualizado_en)
+    SELECT unit_id, MAX(idn), MAX(moddate), CURRENT_TIMESTAMP
+    FROM delta
+    GROUP BY unit_id
+    ON CONFLICT (unit_id) DO UPDATE SET
+        ultimo_idn     = GREATEST(stage.tbl_pivot_watermark.ultimo_idn, EXCLUDED.ultimo_idn),
+        ultimo_moddate = GREATEST(stage.tbl_pivot_watermark.ultimo_moddate, EXCLUDED.ultimo_moddate),
+        actualizado_en = EXCLUDED.actualizado_en
+),
+claves AS (
+    SELECT DISTINCT unit_id, moddate FROM delta WHERE moddate IS NOT NULL
+),
+pivot AS (
+INSERT INTO stage.tbl_pozo_produccion AS p (
+    well_id, timestamp_lectura,
+    ' || v_cols || '
+)
+SELECT
+    l.unit_id, l.moddate,
+    ' || v_aggs || '
+FROM claves k
+JOIN stage.landing_scada_data l ON l.unit_id = k.unit_id AND l.moddate = k.moddate
+WHERE l.var_id = ANY(' || quote_literal(v_var_ids::TEXT) || '::INT[])
+';
+        ELSE
+            v_origen := 'WITH pivot AS (
+INSERT INTO stage.tbl_pozo_produccion AS p (
+    well_id, timestamp_lectura,
+    ' || v_cols || '
+)
+SELECT
+    l.unit_id, l.moddate,
+    ' || v_aggs || '
+FROM stage.landing_scada_data l
+JOIN stage.tbl_pozo_maestra m ON m.well_id = l.unit_id
+WHERE l.moddate >= $1
+  AND l.moddate <  $2
+  AND ($3::INT[] IS NULL OR l.unit_id = ANY($3))
+  AND l.var_id = ANY(' || quote_literal(v_var_ids::TEXT) || '::INT[])
+';
+        END IF;
+
+        v_sql := v_origen || 'GROUP BY l.unit_id, l.moddate
+ON CONFLICT (well_id, timestamp_lectura) DO UPDATE SET
+    ' || v_set || '
+WHERE (' || v_p_cols || ') IS DISTINCT FROM (' || v_ex_cols || ')
+RETURNING p.well_id, p.timestamp_lectura
+),
+cambios AS (
+    INSERT INTO stage.tbl_produccion_cambios (well_id, timestamp_lectura)
+    SELECT well_id, timestamp_lectura FROM pivot
+)
+SELECT COUNT(*) FROM pivot';
+    END IF;
+
+    SELECT string_agg(DISTINCT m.columna_stage, ', ')
+    INTO v_ignoradas
+    FROM referencial.tbl_var_scada_map m
+    WHERE m.activo
+      AND NOT EXISTS (SELECT 1 FROM stage.fnc_pivot_columnas() f WHERE f.columna = m.columna_stage);
+    IF v_ignoradas IS NOT NULL THEN
+        RAISE NOTICE '[PIVOT] Columnas del mapa SCADA sin columna en tbl_pozo_produccion (ignoradas): %', v_ignoradas;
+    END IF;
+
+    -- Una sola entrada vigente: las versiones anteriores ya no se usan
+    DELETE FROM stage.tbl_pivot_sql_cache WHERE variante = v_variante AND map_hash <> v_hash;
+    INSERT INTO stage.tbl_pivot_sql_cache (map_hash, variante, sql_text, num_columnas)
+    VALUES (v_hash, v_variante, v_sql, v_n)
+    ON CONFLICT (map_hash) DO NOTHING;
+
+    RAISE NOTICE '[PIVOT] SQL % recompilado (% columnas, hash %)', v_variante, v_n, left(v_hash, 8);
+    RETURN v_sql;
+END;
+$$;
+
+
+-- =============================================================================
+-- 5. PIVOT POR VENTANA
+-- =============================================================================
+-- Sin límites de ventana (pivot completo) siembra además el watermark con el
+-- MAX(idn) por unit_id: el siguiente incremental parte desde ahí. Se siembra
+-- antes del pivot: una fila que llegue entre ambos se pivotea dos veces
+-- (idempotente) en lugar de ninguna.
+CREATE OR REPLACE PROCEDURE stage.sp_pivot_landing_to_produccion(
+    p_desde    TIMESTAMP DEFAULT NULL,   -- moddate >= p_desde (NULL = sin límite)
+    p_hasta    TIMESTAMP DEFAULT NULL,   -- moddate <  p_hasta (NULL = sin límite)
+    p_unit_ids INT[]     DEFAULT NULL    -- NULL = todos los pozos
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count BIGINT := 0;
+BEGIN
+    IF p_desde IS NULL AND p_hasta IS NULL THEN
+        INSERT INTO stage.tbl_pivot_watermark (unit_id, ultimo_idn, ultimo_moddate, actualizado_en)
+        SELECT m.well_id, u.idn, u.moddate, CURRENT_TIMESTAMP
+        FROM stage.tbl_pozo_maestra m
+        CROSS JOIN LATERAL (
+            SELECT l.idn, l.moddate
+            FROM stage.landing_scada_data l
+            WHERE l.unit_id = m.well_id
+            ORDER BY l.idn DESC
+            LIMIT 1
+        ) u
+        WHERE p_unit_ids IS NULL OR m.well_id = ANY(p_unit_ids)
+        ON CONFLICT (unit_id) DO UPDATE SET
+            ultimo_idn     = GREATEST(stage.tbl_pivot_watermark.ultimo_idn, EXCLUDED.ultimo_idn),
+            ultimo_moddate = GREATEST(stage.tbl_pivot_watermark.ultimo_moddate, EXCLUDED.ultimo_moddate),
+            actualizado_en = EXCLUDED.actualizado_en;
+    END IF;
+
+    EXECUTE stage.fnc_pivot_sql_compilado()
+    INTO v_count
+    USING COALESCE(p_desde, '-infinity'::TIMESTAMP),
+          COALESCE(p_hasta, 'infinity'::TIMESTAMP),
+          p_unit_ids;
+    RAISE NOTICE '[PIVOT] landing → tbl_pozo_produccion: % lecturas insertadas/actualizadas.', v_count;
+END;
+$$;
+
+COMMENT ON PROCEDURE stage.sp_pivot_landing_to_produccion(TIMESTAMP, TIMESTAMP, INT[]) IS
+'Pivot EAV landing_scada_data → tbl_pozo_produccion generado desde tbl_var_scada_map (un scan, FILTER por columna).';
+
+
+-- =============================================================================
+-- 6. PIVOT INCREMENTAL (watermark por unit_id)
+-- =============================================================================
+CREATE OR REPLACE PROCEDURE stage.sp_pivot_landing_incremental(
+    p_unit_ids INT[] DEFAULT NULL    -- NULL = todos los pozos
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count BIGINT := 0;
+BEGIN
+    EXECUTE stage.fnc_pivot_sql_compilado(TRUE) INTO v_count USING p_unit_ids;
+    RAISE NOTICE '[PIVOT] incremental: % lecturas insertadas/actualizadas.', v_count;
+END;
+$$;
+
+COMMENT ON PROCEDURE stage.sp_pivot_landing_incremental(INT[]) IS
+'Pivot solo de las filas de landing con idn > tbl_pivot_watermark; avanza el watermark en la misma transacción.';
@@ -149,10 +149,8 @@ BEGIN
         ROUND((p.maximum_rod_load / NULLIF(m.carga_nominal_unidad, 0)) * 100, 2),  -- road_load_pct_act
         p.eficiencia_levantamiento, -- lift_efficiency_pct_act
 
-        -- [V6.8] pump_stroke_length_act = MAX posición carta fondo (downhole_pump_position)
-        (SELECT MAX(v::DECIMAL) FROM unnest(string_to_array(
-            NULLIF(TRIM(p.downhole_pump_position), ''), ',')) AS v
-         WHERE v ~ '^-?[0-9]+(\.[0-9]+)?$'),
+        -- [V6.8] pump_stroke_length_act = MAX posición carta fondo (downhole_pump_position REAL[])
+        (SELECT MAX(v)::DECIMAL FROM unnest(p.downhole_pump_position) AS v),
         -- [V6.8] pwf_psi_act = PIP + gradiente hidrostático × (Hf - Hp) / 144
         --   Hf = profundidad_vertical_yacimiento, Hp = profundidad_vertical_bomba
         --   Gradiente ≈ 0.433 psi/ft (agua) ajustado por gravedad API si disponible
@@ -168,10 +166,8 @@ BEGIN
         p.kwh_por_barril,                    -- kpi_kwh_bbl_act
         p.porcentaje_operacion_diario,       -- kpi_uptime_pct_act
         p.temperatura_tanque_aceite,         -- tank_fluid_temperature_f
-        -- current_stroke_length_act_in: MAX posición carta superficie (surface_rod_position ID:155)
-        (SELECT MAX(v::DECIMAL) FROM unnest(string_to_array(
-            NULLIF(TRIM(p.surface_rod_position), ''), ',')) AS v
-         WHERE v ~ '^-?[0-9]+(\.[0-9]+)?$'),
+        -- current_stroke_length_act_in: MAX posición carta superficie (surface_rod_position ID:155, REAL[])
+        (SELECT MAX(v)::DECIMAL FROM unnest(p.surface_rod_position) AS v),
         
         -- [V6.3] Mapeos adicionales
         p.pump_fill_monitor,                 -- llenado_bomba_pct (alias de pump_fill_monitor_pct)
@@ -200,10 +196,10 @@ BEGIN
         END,                                 -- kpi_mtbf_hrs_act
 
         -- [V6.7] Coordenadas última carta dinagráfica (directo desde stage)
-        p.surface_rod_position,              -- surface_rod_position TEXT
-        p.surface_rod_load,                  -- surface_rod_load TEXT
-        p.downhole_pump_position,            -- downhole_pump_position TEXT
-        p.downhole_pump_load,                -- downhole_pump_load TEXT
+        p.surface_rod_position,              -- surface_rod_position REAL[]
+        p.surface_rod_load,                  -- surface_rod_load REAL[]
+        p.downhole_pump_position,            -- downhole_pump_position REAL[]
+        p.downhole_pump_load,                -- downhole_pump_load REAL[]
 
         NOW()
     FROM stage.tbl_pozo_maestra m
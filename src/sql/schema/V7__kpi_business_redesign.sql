@@ -255,7 +255,8 @@ ON CONFLICT (kpi_nombre, parametro) DO NOTHING;
 -- =============================================================================
 CREATE OR REPLACE PROCEDURE reporting.poblar_kpi_business(
     p_fecha_inicio DATE DEFAULT CURRENT_DATE - 30,
-    p_fecha_fin DATE DEFAULT CURRENT_DATE
+    p_fecha_fin DATE DEFAULT CURRENT_DATE,
+    p_well_ids INT[] DEFAULT NULL          -- NULL = todos los pozos (modo incremental: solo afectados)
 )
 LANGUAGE plpgsql AS $$
 DECLARE
@@ -350,6 +351,7 @@ BEGIN
             LIMIT 1
         ) prod ON true
         WHERE dt.fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+          AND (p_well_ids IS NULL OR d.pozo_id = ANY(p_well_ids))
     )
     -- NOTA ARQUITECTÓNICA: Los semáforos (variance_pct, status_color, status_level,
     -- severity_label) SOLO se pueblan desde dataset_current_values en Paso C.
@@ -457,7 +459,8 @@ BEGIN
     FROM reporting.fact_operaciones_mensuales m
     WHERE kb.well_id = m.pozo_id
       AND TO_CHAR(kb.fecha, 'YYYY-MM') = m.anio_mes
-      AND kb.fecha BETWEEN p_fecha_inicio AND p_fecha_fin;
+      AND kb.fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+      AND (p_well_ids IS NULL OR kb.well_id = ANY(p_well_ids));
 
     -- =====================================================================
     -- PASO C: ASEGURAR FILA HOY + UPDATE CURRENT + SEMÁFOROS
@@ -494,6 +497,7 @@ BEGIN
     FROM reporting.dataset_current_values c
     LEFT JOIN reporting.dim_pozo p ON c.well_id = p.pozo_id
     WHERE CURRENT_DATE BETWEEN p_fecha_inicio AND p_fecha_fin
+      AND (p_well_ids IS NULL OR c.well_id = ANY(p_well_ids))
     ON CONFLICT (fecha, well_id) DO NOTHING;
 
     -- C.2  Poblar _current + sobrescribir semáforos para TODAS las filas del rango
@@ -560,7 +564,8 @@ BEGIN
     FROM reporting.dataset_current_values c
     JOIN reporting.dim_pozo p ON c.well_id = p.pozo_id
     WHERE kb.well_id = c.well_id
-      AND kb.fecha BETWEEN p_fecha_inicio AND p_fecha_fin;
+      AND kb.fecha BETWEEN p_fecha_inicio AND p_fecha_fin
+      AND (p_well_ids IS NULL OR kb.well_id = ANY(p_well_ids));
 
     RAISE NOTICE 'KPIs Business WIDE actualizados para % a % (DIARIO + MENSUAL + CURRENT)',
                  p_fecha_inicio, p_fecha_fin;
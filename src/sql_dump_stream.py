@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Streaming SQL Dump Loader
+=========================
+
+Loads multi-row INSERT dumps (the DBeaver exports used by
+ingest_real_telemetry.py, e.g. landing_scada_data_*.sql / tbl_maestra_*.sql)
+with COPY instead of sending the whole file as one statement.
+
+The file is read in fixed-size blocks and tokenized incrementally, so memory
+is bounded by one read block plus one COPY batch regardless of dump size:
+
+    INSERT INTO <table> (<cols>) VALUES (...), (...);   -- repeated
+
+Each tuple becomes one CSV line; lines are grouped per (table, columns) into
+batches of batch_rows and sent with COPY <table> (<cols>) FROM STDIN
+(FORMAT csv). NULL is written unquoted (-> NULL) and every quoted literal is
+written quoted, so '' stays an empty string. Quoted values bound for an
+array column (e.g. the REAL[] dynacard cards, V18) are converted from the
+legacy '[a,b,...]' text to an array literal '{a,b,...}'; an empty or
+malformed card becomes NULL, as stage.fnc_card_parse does.
+
+Only plain INSERT ... VALUES statements with literal values are accepted
+(quoted strings, NULL, bare numbers/booleans). Anything else — other
+statements, ON CONFLICT, casts, function calls, column-count mismatches —
+raises DumpParseError with the file offset; the caller's transaction is
+expected to roll back the whole file.
+
+Usage:
+    from src.sql_dump_stream import copy_sql_dump
+
+    with engine.begin() as conn:
+        stats = copy_sql_dump(conn, "landing_scada_data_202602021604.sql")
+    print(stats["filas"], stats["filas_s"])
+"""
+
+import io
+import os
+import re
+import time
+
+READ_BLOCK = 1 << 20  # characters per read()
+COPY_BATCH_ROWS = int(os.environ.get("INGEST_COPY_BATCH_ROWS", "50000"))
+
+_CARD = re.compile(r"^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?(\s*,\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)*$")
+
+_TOKEN = re.compile(r"""
+      (?P<ws>\s+)
+    | (?P<comment>--[^\n]*(?:\n|\Z))
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<punct>[(),;])
+    | (?P<bare>[^\s(),;']+)
+""", re.VERBOSE)
+
+# Parser states
+_STMT, _INTO, _TABLE, _COLS_OPEN, _COLS, _VALUES, _TUPLE_OPEN, _VAL, _AFTER_VAL, _AFTER_TUPLE = range(10)
+
+
+class DumpParseError(Exception):
+    """The dump contains something that cannot be turned into COPY rows."""
+
+
+def iter_tokens(path: str, block: int = READ_BLOCK):
+    """
+    Yield (kind, text, offset) tokens of a SQL file, skipping whitespace and
+    -- comments. A token touching the end of the buffer is only emitted once
+    the next block confirms it is complete; so is a string followed by a
+    quote, which is a '' escape whose remainder is still in the next block.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buf, base, eof = "", 0, False
+        pos = 0
+        while True:
+            if not eof and len(buf) - pos < block:
+                chunk = f.read(block)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                base += pos
+                pos = 0
+            if pos >= len(buf):
+                return
+            m = _TOKEN.match(buf, pos)
+            if m is None or (not eof and (
+                    m.end() == len(buf)
+                    or (m.lastgroup == "string" and buf.startswith("'", m.end())))):
+                if eof:
+                    raise DumpParseError(f"{path}: unterminated token at offset {base + pos}")
+                chunk = f.read(block)
+                eof = not chunk
+                buf += chunk
+                continue
+            kind = m.lastgroup
+            if kind not in ("ws", "comment"):
+                yield kind, m.group(kind), base + pos
+            pos = m.end()
+
+
+def _csv_field(kind: str, value: str) -> str:
+    if kind == "string":
+        return '"' + value[1:-1].replace("''", "'").replace('"', '""') + '"'
+    if value.upper() == "NULL":
+        return ""
+    return value
+
+
+def _csv_array(kind: str, value: str) -> str:
+    """Legacy comma-separated card text -> quoted array literal (empty / malformed -> NULL)."""
+    if kind != "string":
+        return _csv_field(kind, value)
+    inner = value[1:-1].strip("[]{} \t\r\n")
+    if not _CARD.match(inner):
+        return ""
+    return '"{' + inner + '}"'
+
+
+def iter_insert_batches(path: str, batch_rows: int = COPY_BATCH_ROWS, array_columns=None,
+                        block: int = READ_BLOCK):
+    """
+    Parse INSERT ... VALUES statements and yield (table, columns, csv_lines)
+    batches of at most batch_rows rows. A batch never mixes tables or column lists.
+
+    array_columns: optional callable(table) -> set of column names whose
+    values are written as array literals (see _csv_array).
+    block: characters per read() (see iter_tokens).
+    """
+    state = _STMT
+    table, cols, target = None, [], None
+    row, lines = [], []
+    arrays, array_cache = (), {}
+    for kind, tok, offset in iter_tokens(path, block):
+        word = tok.upper() if kind == "bare" else tok
+        if state == _STMT:
+            if tok == ";":
+                continue
+            if word != "INSERT":
+                raise DumpParseError(f"{path}: unsupported statement '{tok}' at offset {offset} "
+                                     f"(only INSERT ... VALUES)")
+            state = _INTO
+        elif state == _INTO:
+            if word != "INTO":
+                raise DumpParseError(f"{path}: expected INTO at offset {offset}, got '{tok}'")
+            state = _TABLE
+        elif state == _TABLE:
+            if kind != "bare":
+                raise DumpParseError(f"{path}: expected table name at offset {offset}, got '{tok}'")
+            table, cols = tok, []
+            state = _COLS_OPEN
+        elif state == _COLS_OPEN:
+            if tok != "(":
+                raise DumpParseError(f"{path}: INSERT into {table} without column list at offset {offset}")
+            state = _COLS
+        elif state == _COLS:
+            if kind == "bare":
+                cols.append(tok)
+            elif tok == ")":
+                if not cols:
+                    raise DumpParseError(f"{path}: empty column list at offset {offset}")
+                state = _VALUES
+            elif tok != ",":
+                raise DumpParseError(f"{path}: unexpected '{tok}' in column list at offset {offset}")
+        elif state == _VALUES:
+            if word != "VALUES":
+                raise DumpParseError(f"{path}: expected VALUES at offset {offset}, got '{tok}'")
+            key = (table, tuple(cols))
+            if target is not None and target != key and lines:
+                yield target[0], target[1], lines
+                lines = []
+            target = key
+            if array_columns is not None:
+                if table not in array_cache:
+                    array_cache[table] = set(array_columns(table))
+                arrays = {i for i, c in enumerate(cols) if c in array_cache[table]}
+            state = _TUPLE_OPEN
+        elif state == _TUPLE_OPEN:
+            if tok != "(":
+                raise DumpParseError(f"{path}: expected '(' at offset {offset}, got '{tok}'")
+            row = []
+            state = _VAL
+        elif state == _VAL:
+            if kind not in ("string", "bare"):
+                raise DumpParseError(f"{path}: expected a value at offset {offset}, got '{tok}'")
+            row.append(_csv_array(kind, tok) if len(row) in arrays else _csv_field(kind, tok))
+            state = _AFTER_VAL
+        elif state == _AFTER_VAL:
+            if tok == ",":
+                state = _VAL
+            elif tok == ")":
+                if len(row) != len(cols):
+                    raise DumpParseError(f"{path}: {len(row)} values for {len(cols)} columns "
+                                         f"of {table} at offset {offset}")
+                lines.append(",".join(row))
+                if len(lines) >= batch_rows:
+                    yield target[0], target[1], lines
+                    lines = []
+                state = _AFTER_TUPLE
+            else:
+                raise DumpParseError(f"{path}: unsupported value expression near '{tok}' "
+                                     f"at offset {offset} (only literals)")
+        elif state == _AFTER_TUPLE:
+            if tok == ",":
+                state = _TUPLE_OPEN
+            elif tok == ";":
+                state = _STMT
+            else:
+                raise DumpParseError(f"{path}: unsupported clause '{tok}' after VALUES at offset {offset}")
+    if state not in (_STMT, _AFTER_TUPLE):
+        raise DumpParseError(f"{path}: truncated INSERT statement at end of file")
+    if lines:
+        yield target[0], target[1], lines
+
+
+def copy_sql_dump(conn, path: str, batch_rows: int = COPY_BATCH_ROWS) -> dict:
+    """
+    Stream an INSERT dump into its target table(s) with batched COPY on the
+    open transaction of conn (SQLAlchemy Connection).
+
+    Returns:
+        {archivo, tablas: {table: rows}, filas, lotes, bytes, segundos, filas_s, mb_s}
+    """
+    t0 = time.perf_counter()
+    tablas, lotes = {}, 0
+    cursor = conn.connection.cursor()
+
+    def array_columns(table):
+        cursor.execute("""
+            SELECT a.attname FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+              AND t.typcategory = 'A'
+        """, (table,))
+        return {r[0] for r in cursor.fetchall()}
+
+    try:
+        for table, cols, lines in iter_insert_batches(path, batch_rows, array_columns):
+            payload = io.StringIO("\n".join(lines) + "\n")
+            cursor.copy_expert(f"COPY {table} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)",
+                               payload, size=1 << 16)
+            tablas[table] = tablas.get(table, 0) + len(lines)
+            lotes += 1
+    finally:
+        cursor.close()
+    segundos = time.perf_counter() - t0
+    filas = sum(tablas.values())
+    size = os.path.getsize(path)
+    return {
+        "archivo": os.path.basename(path),
+        "tablas": tablas,
+        "filas": filas,
+        "lotes": lotes,
+        "bytes": size,
+        "segundos": round(segundos, 3),
+        "filas_s": round(filas / segundos) if segundos else 0,
+        "mb_s": round(size / 1e6 / segundos, 2) if segundos else 0,
+    }
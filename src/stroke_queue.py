@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+CDI Stroke Work Queue
+=====================
+
+Claim / heartbeat / complete / fail API over universal.stroke for concurrent
+classification workers, built on the V20 functions (FOR UPDATE SKIP LOCKED
+claiming, partial index on PENDIENTE rows, visibility timeout for stuck
+EN_PROCESO rows).
+
+Every call is its own short transaction, so a claim commits (and releases its
+row locks) before the worker starts processing; the rows stay owned through
+estado = 'EN_PROCESO' + worker, not through locks. A worker keeps its claim
+alive with heartbeat(); rows without a heartbeat for CDI_VISIBILIDAD_S
+seconds are put back to PENDIENTE (or ERROR after CDI_MAX_INTENTOS claims)
+by the next worker's release_expired().
+
+Only strokes whose universal.stroke_features row has the current
+FEATURES_VERSION (src/dynacard_features.py) are claimed: the feature
+extractor only reads PENDIENTE strokes, so a stroke claimed before its
+features exist would never get them.
+
+The harness (python -m src.stroke_queue) starts N worker processes that
+claim, process and complete batches until the queue stays empty, and checks
+that no stroke was completed twice. Compute features first
+(python -m src.dynacard_features).
+
+Usage:
+    from src.stroke_queue import StrokeQueue
+
+    queue = StrokeQueue(engine, worker="cdi-1")
+    queue.release_expired()
+    batch = queue.claim(500)
+    ids = [s.stroke_id for s in batch]
+    try:
+        classify(batch)
+        queue.complete(ids)
+    except Exception as e:
+        queue.fail(ids, str(e))
+
+    python -m src.dynacard_features --enqueue
+    python -m src.stroke_queue --workers 4 --batch 500 --work-ms 2
+"""
+
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy import text
+
+from src.dynacard_features import FEATURES_VERSION
+
+logger = logging.getLogger(__name__)
+
+VISIBILITY_S = int(os.getenv("CDI_VISIBILIDAD_S", "300"))
+MAX_ATTEMPTS = int(os.getenv("CDI_MAX_INTENTOS", "3"))
+BATCH_SIZE = int(os.getenv("CDI_QUEUE_BATCH", "500"))
+
+ClaimedStroke = namedtuple("ClaimedStroke", "stroke_id produccion_id intentos")
+
+
+class StrokeQueue:
+    """One worker's handle on the universal.stroke queue."""
+
+    def __init__(self, engine, worker: Optional[str] = None,
+                 visibility_s: int = VISIBILITY_S, max_attempts: int = MAX_ATTEMPTS,
+                 features_version: str = FEATURES_VERSION):
+        self.engine = engine
+        self.worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_s = visibility_s
+        self.max_attempts = max_attempts
+        self.features_version = features_version
+
+    def _scalar(self, sql: str, params: dict, conn=None) -> int:
+        if conn is None:
+            with self.engine.begin() as own:
+                return self._scalar(sql, params, own)
+        return conn.execute(text(sql), params).scalar() or 0
+
+    def claim(self, n: int = BATCH_SIZE) -> List[ClaimedStroke]:
+        """
+        Claim up to n PENDIENTE strokes with current-version features (oldest
+        first); [] when none is ready.
+        """
+        with self.engine.begin() as conn:
+            rows = conn.execute(text("SELECT * FROM universal.fnc_stroke_reclamar(:w, :n, :v)"),
+                                {"w": self.worker, "n": n, "v": self.features_version}).fetchall()
+        return [ClaimedStroke(*r) for r in rows]
+
+    def heartbeat(self, ids: Sequence[int]) -> int:
+        """Extend the claim on ids; returns how many are still owned by this worker."""
+        return self._scalar("SELECT universal.fnc_stroke_heartbeat(:w, :ids)",
+                            {"w": self.worker, "ids": list(ids)})
+
+    def complete(self, ids: Sequence[int], conn=None) -> int:
+        """
+        Mark ids COMPLETADO. Pass conn to commit together with the results.
+
+        Returns:
+            Strokes completed; fewer than len(ids) means some claims expired
+            and were handed to another worker (their results must be discarded).
+        """
+        return self._scalar("SELECT universal.fnc_stroke_completar(:w, :ids)",
+                            {"w": self.worker, "ids": list(ids)}, conn)
+
+    def fail(self, ids: Sequence[int], error: str) -> int:
+        """Return ids to PENDIENTE for a retry, or ERROR once max_attempts claims were used."""
+        return self._scalar("SELECT universal.fnc_stroke_fallar(:w, :ids, :e, :m)",
+                            {"w": self.worker, "ids": list(ids), "e": error[:2000],
+                             "m": self.max_attempts})
+
+    def release_expired(self) -> int:
+        """Requeue EN_PROCESO strokes whose heartbeat is older than the visibility timeout."""
+        released = self._scalar(
+            "SELECT universal.fnc_stroke_liberar_vencidos(make_interval(secs => :v), :m)",
+            {"v": self.visibility_s, "m": self.max_attempts})
+        if released:
+            logger.warning(f"Queue: {released} expired strokes released")
+        return released
+
+
+class Heartbeat:
+    """Background thread that heartbeats a claimed batch every visibility/3 seconds."""
+
+    def __init__(self, queue: StrokeQueue, ids: Sequence[int]):
+        self.queue, self.ids = queue, list(ids)
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stroke-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(max(1.0, self.queue.visibility_s / 3)):
+            if self.queue.heartbeat(self.ids) < len(self.ids):
+                self.lost = True
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+# ---------------------------------------------------------------------------
+# Multi-process harness
+# ---------------------------------------------------------------------------
+
+def simulated_handler(work_ms: float) -> Callable:
+    """Stand-in classifier: sleeps work_ms per stroke."""
+    def handle(batch: List[ClaimedStroke]) -> None:
+        time.sleep(work_ms * len(batch) / 1000)
+    return handle
+
+
+def load_handler(spec: str) -> Callable:
+    """'package.module:function' -> callable(batch)."""
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def worker_loop(queue: StrokeQueue, handler: Callable, batch_size: int = BATCH_SIZE,
+                idle_exit_s: float = 2.0, poll_s: float = 0.2) -> dict:
+    """
+    Claim → handle → complete until the queue has been empty for idle_exit_s.
+
+    A handler exception fails the whole batch (retry or ERROR); a batch whose
+    claim was lost mid-way is not completed.
+    """
+    done, failed, lost, batches = [], 0, 0, 0
+    idle_since = None
+    while True:
+        queue.release_expired()
+        batch = queue.claim(batch_size)
+        if not batch:
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since >= idle_exit_s:
+                break
+            time.sleep(poll_s)
+            continue
+        idle_since = None
+        batches += 1
+        ids = [s.stroke_id for s in batch]
+        try:
+            with Heartbeat(queue, ids) as hb:
+                handler(batch)
+            if hb.lost:
+                lost += len(ids)
+                continue
+            completed = queue.complete(ids)
+            lost += len(ids) - completed
+            if completed == len(ids):
+                done.extend(ids)
+        except Exception as e:
+            logger.exception(f"Worker {queue.worker}: batch failed")
+            failed += queue.fail(ids, f"{type(e).__name__}: {e}")
+    return {"worker": queue.worker, "completados": done, "lotes": batches,
+            "fallados": failed, "perdidos": lost}
+
+
+def _worker_process(url: str, name: str, batch_size: int, work_ms: float,
+                    handler_spec: Optional[str], idle_exit_s: float, results) -> None:
+    from src.db import get_engine
+
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s {name} %(levelname)s %(message)s")
+    engine = get_engine(url, pool_size=2)
+    handler = load_handler(handler_spec) if handler_spec else simulated_handler(work_ms)
+    results.put(worker_loop(StrokeQueue(engine, worker=name), handler, batch_size, idle_exit_s))
+
+
+def run_workers(url: str, workers: int, batch_size: int = BATCH_SIZE, work_ms: float = 1.0,
+                handler_spec: Optional[str] = None, idle_exit_s: float = 2.0) -> dict:
+    """
+    Run ``workers`` processes against the queue and aggregate their results.
+
+    Returns:
+        {workers, strokes, duplicados, fallados, perdidos, segundos, strokes_s, por_worker}
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    t0 = time.perf_counter()
+    procs = [ctx.Process(target=_worker_process, name=f"cdi-{i}",
+                         args=(url, f"cdi-{i}@{socket.gethostname()}", batch_size, work_ms,
+                               handler_spec, idle_exit_s, results))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    segundos = time.perf_counter() - t0
+    ids = [i for s in stats for i in s["completados"]]
+    return {
+        "workers": workers,
+        "strokes": len(ids),
+        "duplicados": len(ids) - len(set(ids)),
+        "fallados": sum(s["fallados"] for s in stats),
+        "perdidos": sum(s["perdidos"] for s in stats),
+        "segundos": round(segundos, 3),
+        "strokes_s": round(len(ids) / segundos) if segundos else 0,
+        "por_worker": {s["worker"]: {"strokes": len(s["completados"]), "lotes": s["lotes"]} for s in stats},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Multi-process CDI worker harness over universal.stroke")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--work-ms", type=float, default=1.0, help="simulated work per stroke")
+    parser.add_argument("--handler", default=None, help="module:function called with each claimed batch")
+    parser.add_argument("--idle-exit", type=float, default=2.0, help="seconds of empty queue before a worker exits")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    url = (f"postgresql://{os.getenv('DB_USER', 'audit')}:{os.getenv('DEV_DB_PASSWORD', 'audit')}"
+           f"@{os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', '5433')}/{os.getenv('DB_NAME', 'etl_data')}")
+    stats = run_workers(url, args.workers, args.batch, args.work_ms, args.handler, args.idle_exit)
+    for worker, s in stats["por_worker"].items():
+        print(f"  {worker}: {s['strokes']} strokes in {s['lotes']} batches")
+    print(f"{stats['strokes']} strokes, {stats['workers']} workers, {stats['segundos']}s "
+          f"({stats['strokes_s']}/s); duplicates {stats['duplicados']}, "
+          f"failed {stats['fallados']}, lost {stats['perdidos']}")
+    return 1 if stats["duplicados"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la planificación de chunks de backfill_reporting.py (sin base de datos).
+
+- chunks_mensuales: cortes en fin de mes (febrero bisiesto y no bisiesto),
+  primer y último mes parciales, rango dentro de un solo mes o de un día y
+  paso de diciembre a enero.
+- chunks_por_particion: tramos alineados a las particiones anuales, huecos
+  (partición DEFAULT) cortados por año calendario y por el inicio de la
+  siguiente partición, y sin particiones.
+- En ambos modos los chunks son contiguos y cubren el rango exacto.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import unittest
+from datetime import date, timedelta
+
+from backfill_reporting import chunks_mensuales, chunks_por_particion
+
+# Particiones anuales fact_horarias_y2024 / y2025 ([desde, hasta_exclusivo)).
+PARTICIONES = [(date(2024, 1, 1), date(2025, 1, 1)), (date(2025, 1, 1), date(2026, 1, 1))]
+
+
+class _Chunks(unittest.TestCase):
+
+    def assertCubre(self, chunks, desde, hasta):
+        self.assertEqual(chunks[0][0], desde)
+        self.assertEqual(chunks[-1][1], hasta)
+        for ini, fin in chunks:
+            self.assertLessEqual(ini, fin)
+        for (_, fin), (ini, _) in zip(chunks, chunks[1:]):
+            self.assertEqual(ini, fin + timedelta(days=1))
+
+
+class TestChunksMensuales(_Chunks):
+
+    def test_meses_completos(self):
+        chunks = chunks_mensuales(date(2024, 1, 1), date(2024, 3, 31))
+        self.assertEqual(chunks, [
+            (date(2024, 1, 1), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 3, 1), date(2024, 3, 31)),
+        ])
+
+    def test_febrero_no_bisiesto(self):
+        self.assertEqual(chunks_mensuales(date(2025, 2, 1), date(2025, 2, 28)),
+                         [(date(2025, 2, 1), date(2025, 2, 28))])
+
+    def test_primero_y_ultimo_parciales(self):
+        chunks = chunks_mensuales(date(2024, 1, 15), date(2024, 3, 10))
+        self.assertEqual(chunks, [
+            (date(2024, 1, 15), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+            (date(2024, 3, 1), date(2024, 3, 10)),
+        ])
+
+    def test_dentro_de_un_mes(self):
+        self.assertEqual(chunks_mensuales(date(2024, 4, 5), date(2024, 4, 20)),
+                         [(date(2024, 4, 5), date(2024, 4, 20))])
+        self.assertEqual(chunks_mensuales(date(2024, 4, 30), date(2024, 4, 30)),
+                         [(date(2024, 4, 30), date(2024, 4, 30))])
+
+    def test_cambio_de_anio(self):
+        chunks = chunks_mensuales(date(2024, 11, 20), date(2025, 1, 5))
+        self.assertEqual(chunks, [
+            (date(2024, 11, 20), date(2024, 11, 30)),
+            (date(2024, 12, 1), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 1, 5)),
+        ])
+
+    def test_rango_vacio(self):
+        self.assertEqual(chunks_mensuales(date(2024, 2, 1), date(2024, 1, 31)), [])
+
+    def test_cobertura(self):
+        desde, hasta = date(2016, 3, 17), date(2026, 8, 9)
+        chunks = chunks_mensuales(desde, hasta)
+        self.assertEqual(len(chunks), 126)
+        self.assertCubre(chunks, desde, hasta)
+        for ini, fin in chunks:
+            self.assertEqual((ini.year, ini.month), (fin.year, fin.month))
+
+
+class TestChunksPorParticion(_Chunks):
+
+    def test_alineados_a_particiones(self):
+        chunks = chunks_por_particion(date(2024, 1, 1), date(2025, 12, 31), PARTICIONES)
+        self.assertEqual(chunks, [
+            (date(2024, 1, 1), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 12, 31)),
+        ])
+
+    def test_parciales(self):
+        chunks = chunks_por_particion(date(2024, 6, 1), date(2025, 3, 31), PARTICIONES)
+        self.assertEqual(chunks, [
+            (date(2024, 6, 1), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 3, 31)),
+        ])
+
+    def test_huecos_por_anio_calendario(self):
+        chunks = chunks_por_particion(date(2022, 7, 1), date(2026, 2, 28), PARTICIONES)
+        self.assertEqual(chunks, [
+            (date(2022, 7, 1), date(2022, 12, 31)),
+            (date(2023, 1, 1), date(2023, 12, 31)),
+            (date(2024, 1, 1), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 12, 31)),
+            (date(2026, 1, 1), date(2026, 2, 28)),
+        ])
+
+    def test_hueco_cortado_por_la_siguiente_particion(self):
+        limites = [(date(2024, 7, 1), date(2025, 7, 1))]
+        chunks = chunks_por_particion(date(2024, 3, 1), date(2025, 9, 30), limites)
+        self.assertEqual(chunks, [
+            (date(2024, 3, 1), date(2024, 6, 30)),
+            (date(2024, 7, 1), date(2025, 6, 30)),
+            (date(2025, 7, 1), date(2025, 9, 30)),
+        ])
+
+    def test_sin_particiones(self):
+        chunks = chunks_por_particion(date(2024, 12, 15), date(2025, 1, 15), [])
+        self.assertEqual(chunks, [
+            (date(2024, 12, 15), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 1, 15)),
+        ])
+
+    def test_cobertura(self):
+        desde, hasta = date(2016, 3, 17), date(2026, 8, 9)
+        chunks = chunks_por_particion(desde, hasta, PARTICIONES)
+        self.assertCubre(chunks, desde, hasta)
+        for ini, fin in chunks:
+            self.assertEqual(ini.year, fin.year)
+
+
+if __name__ == "__main__":
+    unittest.main()
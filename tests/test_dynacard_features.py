@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Pruebas de src/dynacard_features.py (sin base de datos).
+
+- Rectángulo conocido: área = ancho × alto, llenado 1.0, carrera y rangos.
+- Puntos NaN (NULL en la carta) se descartan sin cambiar el polígono.
+- Menos de 3 puntos válidos → área y llenado NaN; sin carta de fondo la forma
+  usa la de superficie.
+- Lote con cartas de distinta longitud: cada fila da lo mismo que sola.
+- Vector de forma: 2 × shape_points, normalizado a 0-1; NaN con < 2 puntos.
+- COPY: los NaN salen como NULL (\\N), también la forma incompleta.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import math
+import unittest
+
+import numpy as np
+
+from src.dynacard_features import (
+    FEATURE_COLUMNS, compute_features, features_to_copy, synthetic_cards,
+)
+
+NAN = float("nan")
+
+# Rectángulo 10 in × 5000 lb recorrido en sentido antihorario
+RECT_X = [0.0, 10.0, 10.0, 0.0]
+RECT_Y = [1000.0, 1000.0, 6000.0, 6000.0]
+
+
+def _una(sx, sy, dx=None, dy=None, **kwargs):
+    """Features de una sola carrera como escalares (forma como array)."""
+    f = compute_features([sx], [sy], [dx], [dy], **kwargs)
+    return {k: (v[0] if k == "forma" else v[0].item()) for k, v in f.items()}
+
+
+class TestRectangulo(unittest.TestCase):
+
+    def test_area_y_llenado(self):
+        f = _una(RECT_X, RECT_Y, RECT_X, RECT_Y)
+        self.assertAlmostEqual(f["area_superficie"], 10 * 5000)
+        self.assertAlmostEqual(f["area_fondo"], 10 * 5000)
+        self.assertAlmostEqual(f["llenado_estimado"], 1.0)
+        self.assertEqual(f["carrera_superficie_in"], 10.0)
+        self.assertEqual(f["carrera_fondo_in"], 10.0)
+        self.assertEqual(f["carga_max_superficie"], 6000.0)
+        self.assertEqual(f["carga_min_superficie"], 1000.0)
+        self.assertEqual(f["rango_carga_superficie"], 5000.0)
+        self.assertEqual(f["rango_carga_fondo"], 5000.0)
+        self.assertEqual((f["puntos_superficie"], f["puntos_fondo"]), (4, 4))
+
+    def test_sentido_horario(self):
+        f = _una(RECT_X[::-1], RECT_Y[::-1], RECT_X[::-1], RECT_Y[::-1])
+        self.assertAlmostEqual(f["area_fondo"], 50000.0)
+
+    def test_triangulo_llena_la_mitad(self):
+        f = _una([0.0, 10.0, 10.0], [0.0, 0.0, 4.0], [0.0, 10.0, 10.0], [0.0, 0.0, 4.0])
+        self.assertAlmostEqual(f["area_fondo"], 20.0)
+        self.assertAlmostEqual(f["llenado_estimado"], 0.5)
+
+
+class TestPuntosInvalidos(unittest.TestCase):
+
+    def test_nan_descartados(self):
+        x = [0.0, 10.0, NAN, 10.0, 0.0, 5.0]
+        y = [1000.0, 1000.0, 3000.0, 6000.0, 6000.0, NAN]
+        f = _una(x, y, x, y)
+        self.assertEqual(f["puntos_superficie"], 4)
+        self.assertAlmostEqual(f["area_superficie"], 50000.0)
+        self.assertAlmostEqual(f["llenado_estimado"], 1.0)
+        self.assertEqual(f["carrera_superficie_in"], 10.0)
+
+    def test_menos_de_tres_puntos(self):
+        for nombre, (x, y) in {
+            "dos puntos": ([0.0, 10.0], [1.0, 2.0]),
+            "tres con un NaN": ([0.0, 10.0, NAN], [1.0, 2.0, 3.0]),
+            "vacía": ([], []),
+        }.items():
+            with self.subTest(nombre):
+                f = _una(x, y, x, y)
+                self.assertTrue(math.isnan(f["area_superficie"]))
+                self.assertTrue(math.isnan(f["area_fondo"]))
+                self.assertTrue(math.isnan(f["llenado_estimado"]))
+
+    def test_sin_carta_de_fondo(self):
+        f = _una(RECT_X, RECT_Y, shape_points=4)
+        self.assertEqual(f["puntos_fondo"], 0)
+        self.assertTrue(math.isnan(f["area_fondo"]))
+        self.assertTrue(math.isnan(f["llenado_estimado"]))
+        self.assertTrue(np.isfinite(f["forma"]).all())
+
+
+class TestLoteMixto(unittest.TestCase):
+
+    def test_longitudes_distintas(self):
+        sx, sy, dx, dy = synthetic_cards(3, points=50, seed=7)
+        sx = [sx[0], RECT_X, sx[2][:10], [1.0, 2.0]]
+        sy = [sy[0], RECT_Y, sy[2][:10], [1.0, 2.0]]
+        dx = [dx[0], None, dx[2][:7], [1.0, 2.0]]
+        dy = [dy[0], None, dy[2][:7], [1.0, 2.0]]
+        lote = compute_features(sx, sy, dx, dy, shape_points=16)
+        for i in range(len(sx)):
+            sola = compute_features([sx[i]], [sy[i]], [dx[i]], [dy[i]], shape_points=16)
+            for columna, valores in sola.items():
+                with self.subTest(fila=i, columna=columna):
+                    np.testing.assert_allclose(lote[columna][i], valores[0], equal_nan=True)
+
+    def test_sinteticas(self):
+        f = compute_features(*synthetic_cards(25, points=120), shape_points=32)
+        self.assertTrue((f["puntos_fondo"] == 120).all())
+        self.assertTrue(((f["llenado_estimado"] > 0) & (f["llenado_estimado"] <= 1)).all())
+        self.assertEqual(f["forma"].shape, (25, 64))
+
+
+class TestForma(unittest.TestCase):
+
+    def test_longitud_y_normalizada(self):
+        for puntos in (2, 8, 64):
+            with self.subTest(puntos=puntos):
+                forma = _una(RECT_X, RECT_Y, RECT_X, RECT_Y, shape_points=puntos)["forma"]
+                self.assertEqual(forma.shape, (2 * puntos,))
+                self.assertEqual(forma.min(), 0.0)
+                self.assertEqual(forma.max(), 1.0)
+                # Extremos: primer y último punto de la carta
+                self.assertEqual((forma[0], forma[puntos]), (0.0, 0.0))
+                self.assertEqual((forma[puntos - 1], forma[-1]), (0.0, 1.0))
+
+    def test_un_punto(self):
+        forma = _una([1.0], [2.0], [1.0], [2.0], shape_points=8)["forma"]
+        self.assertEqual(forma.shape, (16,))
+        self.assertTrue(np.isnan(forma).all())
+
+
+class TestCopy(unittest.TestCase):
+
+    def test_nan_como_null(self):
+        f = compute_features([RECT_X, [1.0, 2.0]], [RECT_Y, [1.0, 2.0]],
+                             [RECT_X, None], [RECT_Y, None], shape_points=2)
+        rect, corta = features_to_copy([11, 12], f).read().splitlines()
+        campos = rect.split("\t")
+        self.assertEqual(len(campos), len(FEATURE_COLUMNS) + 3)
+        self.assertEqual(campos[0], "11")
+        self.assertEqual(campos[FEATURE_COLUMNS.index("llenado_estimado") + 1], "1.0")
+        self.assertEqual(campos[-2], "{0.0,0.0,0.0,1.0}")
+        campos = corta.split("\t")
+        self.assertEqual(campos[FEATURE_COLUMNS.index("area_superficie") + 1], r"\N")
+        self.assertEqual(campos[FEATURE_COLUMNS.index("llenado_estimado") + 1], r"\N")
+        self.assertNotEqual(campos[-2], r"\N")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Pruebas de src/pipeline_checkpoint.py (sin base de datos, ficheros temporales).
+
+- Reanudación: un paso completado con entradas sin cambios se salta; si cambia
+  un fichero de entrada se vuelve a ejecutar junto con todo lo que depende de
+  él, y lo independiente se sigue saltando.
+- Estado: persiste entre instancias, reset() lo vacía, un JSON ilegible se
+  ignora y un paso fallido no queda marcado.
+- file_digest: depende del contenido y distingue un fichero ausente.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.pipeline_checkpoint import RunState, file_digest
+from src.pipeline_dag import PipelineDAG, PipelineStep, PipelineStepError
+
+BASE = "FULL|localhost:5433/etl_data"
+
+
+class _Checkpoint(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.tmp = Path(self._dir.name)
+        self.state_path = self.tmp / "run_state.json"
+        self.entrada = self.tmp / "maestra.csv"
+        self.entrada.write_text("well_id\n1\n", encoding="utf-8")
+        self.ejecutados = []
+        self.fallar = set()
+
+    def accion(self, name):
+        def run():
+            self.ejecutados.append(name)
+            if name in self.fallar:
+                raise RuntimeError(name)
+        return run
+
+    def dag(self):
+        dag = PipelineDAG()
+        dag.add(PipelineStep("load", self.accion("load"), writes={"stage.maestra"},
+                             fingerprint=lambda: file_digest([self.entrada])))
+        dag.add(PipelineStep("dq", self.accion("dq"), reads={"stage.maestra"},
+                             writes={"stage.dq"}))
+        dag.add(PipelineStep("kpi", self.accion("kpi"), writes={"reporting.kpi"}))
+        return dag
+
+    def ejecutar(self):
+        """Una corrida --resume: salta lo reanudable y marca cada éxito."""
+        self.ejecutados = []
+        state = RunState(self.state_path)
+        dag = self.dag()
+        fingerprints = dag.fingerprints(BASE)
+        skip = state.resumable(dag, fingerprints)
+        dag.run(max_workers=1, skip=skip,
+                on_success=lambda name: state.mark_done(name, fingerprints[name]))
+        return skip
+
+
+class TestReanudar(_Checkpoint):
+
+    def test_entradas_sin_cambios_se_saltan(self):
+        self.assertEqual(self.ejecutar(), set())
+        self.assertEqual(sorted(self.ejecutados), ["dq", "kpi", "load"])
+        self.assertEqual(self.ejecutar(), {"load", "dq", "kpi"})
+        self.assertEqual(self.ejecutados, [])
+
+    def test_fichero_modificado_reejecuta(self):
+        self.ejecutar()
+        self.entrada.write_text("well_id\n1\n2\n", encoding="utf-8")
+        self.assertEqual(self.ejecutar(), {"kpi"})
+        self.assertEqual(self.ejecutados, ["load", "dq"])
+        self.assertEqual(self.ejecutar(), {"load", "dq", "kpi"})
+
+    def test_fallo_reanuda_desde_el_paso_fallido(self):
+        self.fallar = {"dq"}
+        with self.assertRaises(PipelineStepError):
+            self.ejecutar()
+        self.assertNotIn("dq", RunState(self.state_path).steps)
+        self.fallar = set()
+        self.assertEqual(self.ejecutar(), {"load", "kpi"})
+        self.assertEqual(self.ejecutados, ["dq"])
+
+    def test_dependencia_no_reanudable(self):
+        # dq con su huella al día no se salta si load tiene que volver a correr.
+        self.ejecutar()
+        state = RunState(self.state_path)
+        del state.steps["load"]
+        dag = self.dag()
+        self.assertEqual(state.resumable(dag, dag.fingerprints(BASE)), {"kpi"})
+
+    def test_otra_base_no_reanuda(self):
+        self.ejecutar()
+        dag = self.dag()
+        state = RunState(self.state_path)
+        self.assertEqual(state.resumable(dag, dag.fingerprints("INCREMENTAL|otra")), set())
+
+
+class TestEstado(_Checkpoint):
+
+    def test_persistencia_y_reset(self):
+        state = RunState(self.state_path)
+        state.mark_done("load", "abc")
+        self.assertTrue(RunState(self.state_path).is_done("load", "abc"))
+        self.assertFalse(RunState(self.state_path).is_done("load", "otra"))
+        state.reset()
+        self.assertEqual(RunState(self.state_path).steps, {})
+        self.assertFalse(self.state_path.with_suffix(".json.tmp").exists())
+
+    def test_json_ilegible(self):
+        self.state_path.write_text("{no es json", encoding="utf-8")
+        with self.assertLogs("src.pipeline_checkpoint", level="WARNING"):
+            state = RunState(self.state_path)
+        self.assertEqual(state.steps, {})
+
+
+class TestFileDigest(_Checkpoint):
+
+    def test_contenido_y_ausente(self):
+        antes = file_digest([self.entrada])
+        self.assertEqual(file_digest([self.entrada]), antes)
+        self.entrada.write_text("well_id\n9\n", encoding="utf-8")
+        self.assertNotEqual(file_digest([self.entrada]), antes)
+        ausente = self.tmp / "no_existe.csv"
+        vacio = self.tmp / "vacio.csv"
+        vacio.write_bytes(b"")
+        self.assertNotEqual(file_digest([ausente]), file_digest([vacio]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Pruebas de src/pipeline_dag.py (sin base de datos, acciones stub).
+
+- Dependencias: derivadas de los conjuntos reads/writes (RAW, WAR, WAW),
+  comodines "schema.*" y restricciones explícitas ``after``.
+- Serialización: dos pasos que escriben la misma tabla nunca se solapan,
+  aunque haya workers libres; los independientes sí corren en paralelo.
+- Ciclos: un ``after`` hacia un paso posterior o inexistente se rechaza al
+  declararlo (el orden de declaración impide ciclos); nombres duplicados.
+- Fallos: PipelineStepError con el paso culpable, los dependientes no se
+  ejecutan y los pasos en vuelo terminan; skip/on_success y fingerprints.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import threading
+import time
+import unittest
+
+from src.pipeline_dag import PipelineDAG, PipelineStep, PipelineStepError, steps_conflict
+
+
+def _noop():
+    pass
+
+
+def _paso(name, reads=(), writes=(), after=(), action=_noop, fingerprint=None):
+    return PipelineStep(name, action, reads=set(reads), writes=set(writes),
+                        after=set(after), fingerprint=fingerprint)
+
+
+class _Registro:
+    """Acciones stub que anotan inicio/fin y el máximo de pasos simultáneos."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.eventos = []
+        self.activos = set()
+        self.solapes = []
+
+    def accion(self, name, pausa=0.05, error=None):
+        def run():
+            with self.lock:
+                if self.activos:
+                    self.solapes.append((name, frozenset(self.activos)))
+                self.activos.add(name)
+                self.eventos.append(("inicio", name))
+            time.sleep(pausa)
+            with self.lock:
+                self.activos.discard(name)
+                self.eventos.append(("fin", name))
+            if error is not None:
+                raise error
+        return run
+
+    def ejecutados(self):
+        return [name for evento, name in self.eventos if evento == "inicio"]
+
+
+class TestDependencias(unittest.TestCase):
+
+    def test_conflictos(self):
+        w = _paso("w", writes={"stage.a"})
+        casos = {
+            "raw": (w, _paso("r", reads={"stage.a"}), True),
+            "waw": (w, _paso("w2", writes={"stage.a"}), True),
+            "war": (_paso("r", reads={"stage.a"}), _paso("w2", writes={"stage.a"}), True),
+            "rar": (_paso("r", reads={"stage.a"}), _paso("r2", reads={"stage.a"}), False),
+            "otra tabla": (w, _paso("x", reads={"stage.b"}, writes={"stage.c"}), False),
+            "comodín": (_paso("reset", writes={"stage.*"}), _paso("r", reads={"stage.a"}), True),
+            "comodín inverso": (w, _paso("dump", reads={"stage.*"}), True),
+            "otro esquema": (_paso("reset", writes={"stage.*"}), _paso("r", reads={"reporting.a"}), False),
+        }
+        for nombre, (anterior, posterior, esperado) in casos.items():
+            with self.subTest(nombre):
+                self.assertEqual(steps_conflict(anterior, posterior), esperado)
+
+    def test_dependencias_derivadas(self):
+        dag = PipelineDAG()
+        dag.add(_paso("load", writes={"stage.prod"}))
+        dag.add(_paso("dq", reads={"stage.prod"}, writes={"stage.dq"}))
+        dag.add(_paso("kpi", reads={"stage.prod"}, writes={"reporting.kpi"}))
+        dag.add(_paso("fact", reads={"stage.dq", "reporting.kpi"}, writes={"reporting.fact"}))
+        dag.add(_paso("audit", after={"load"}))
+        self.assertEqual(dag.dependencies, {
+            "load": set(),
+            "dq": {"load"},
+            "kpi": {"load"},
+            "fact": {"dq", "kpi"},
+            "audit": {"load"},
+        })
+        self.assertEqual(dag.levels(), [["load"], ["dq", "kpi", "audit"], ["fact"]])
+        self.assertIn("Wave 2: dq, kpi, audit", dag.describe())
+
+
+class TestCiclos(unittest.TestCase):
+
+    def test_after_hacia_paso_posterior(self):
+        dag = PipelineDAG()
+        dag.add(_paso("a"))
+        with self.assertRaises(ValueError):
+            dag.add(_paso("b", after={"c"}))
+        self.assertNotIn("b", dag.steps)
+        dag.add(_paso("c"))
+        self.assertEqual(dag.dependencies["c"], set())
+
+    def test_autodependencia(self):
+        with self.assertRaises(ValueError):
+            PipelineDAG().add(_paso("a", after={"a"}))
+
+    def test_duplicado(self):
+        dag = PipelineDAG()
+        dag.add(_paso("a"))
+        with self.assertRaises(ValueError):
+            dag.add(_paso("a"))
+
+
+class TestEjecucion(unittest.TestCase):
+
+    def test_escritura_escritura_serializada(self):
+        reg = _Registro()
+        dag = PipelineDAG()
+        dag.add(_paso("w1", writes={"stage.a"}, action=reg.accion("w1")))
+        dag.add(_paso("w2", writes={"stage.a"}, action=reg.accion("w2")))
+        dag.add(_paso("w3", writes={"stage.a"}, action=reg.accion("w3")))
+        completados = dag.run(max_workers=4)
+        self.assertEqual(completados, ["w1", "w2", "w3"])
+        self.assertEqual(reg.solapes, [])
+
+    def test_independientes_en_paralelo(self):
+        reg = _Registro()
+        dag = PipelineDAG()
+        dag.add(_paso("a", writes={"stage.a"}, action=reg.accion("a", pausa=0.2)))
+        dag.add(_paso("b", writes={"stage.b"}, action=reg.accion("b", pausa=0.2)))
+        dag.run(max_workers=2)
+        self.assertTrue(reg.solapes)
+
+    def test_secuencial_respeta_orden(self):
+        reg = _Registro()
+        dag = PipelineDAG()
+        for name in ("c", "a", "b"):
+            dag.add(_paso(name, writes={f"stage.{name}"}, action=reg.accion(name, pausa=0)))
+        self.assertEqual(dag.run(max_workers=1), ["c", "a", "b"])
+        self.assertEqual(reg.solapes, [])
+
+    def test_fallo_propaga(self):
+        reg = _Registro()
+        causa = RuntimeError("boom")
+        dag = PipelineDAG()
+        dag.add(_paso("load", writes={"stage.prod"}, action=reg.accion("load", error=causa)))
+        dag.add(_paso("lento", writes={"stage.otro"}, action=reg.accion("lento", pausa=0.2)))
+        dag.add(_paso("dq", reads={"stage.prod"}, action=reg.accion("dq")))
+        dag.add(_paso("fact", after={"dq"}, action=reg.accion("fact")))
+        dag.add(_paso("tras_lento", reads={"stage.otro"}, action=reg.accion("tras_lento")))
+        with self.assertRaises(PipelineStepError) as ctx:
+            dag.run(max_workers=2)
+        self.assertEqual(ctx.exception.step_name, "load")
+        self.assertIs(ctx.exception.cause, causa)
+        # El paso en vuelo termina; no se arranca nada nuevo tras el fallo.
+        self.assertIn(("fin", "lento"), reg.eventos)
+        self.assertEqual(sorted(reg.ejecutados()), ["lento", "load"])
+
+    def test_system_exit_en_paso(self):
+        def salir():
+            raise SystemExit(1)
+        dag = PipelineDAG()
+        dag.add(_paso("a", action=salir))
+        with self.assertRaises(PipelineStepError) as ctx:
+            dag.run()
+        self.assertIsInstance(ctx.exception.cause, SystemExit)
+
+    def test_skip_y_on_success(self):
+        reg = _Registro()
+        hechos = []
+        dag = PipelineDAG()
+        dag.add(_paso("load", writes={"stage.prod"}, action=reg.accion("load", pausa=0)))
+        dag.add(_paso("dq", reads={"stage.prod"}, action=reg.accion("dq", pausa=0)))
+        completados = dag.run(skip={"load"}, on_success=hechos.append)
+        self.assertEqual(completados, ["dq"])
+        self.assertEqual(hechos, ["dq"])
+        self.assertEqual(reg.ejecutados(), ["dq"])
+
+
+class TestFingerprints(unittest.TestCase):
+
+    def test_encadenados(self):
+        entrada = {"load": "v1"}
+
+        def construir():
+            dag = PipelineDAG()
+            dag.add(_paso("load", writes={"stage.prod"}, fingerprint=lambda: entrada["load"]))
+            dag.add(_paso("dq", reads={"stage.prod"}))
+            dag.add(_paso("aparte", writes={"stage.x"}))
+            return dag
+
+        antes = construir().fingerprints("full")
+        self.assertEqual(construir().fingerprints("full"), antes)
+        entrada["load"] = "v2"
+        despues = construir().fingerprints("full")
+        self.assertNotEqual(despues["load"], antes["load"])
+        self.assertNotEqual(despues["dq"], antes["dq"])
+        self.assertEqual(despues["aparte"], antes["aparte"])
+        self.assertNotEqual(construir().fingerprints("incremental")["aparte"], antes["aparte"])
+
+
+if __name__ == "__main__":
+    unittest.main()
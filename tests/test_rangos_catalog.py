@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pruebas de src/rangos_catalog.py con módulos Rangos_*.py temporales (sin base de datos).
+
+- compile_source: literales y nombres de tipo; rechaza expresiones no
+  literales, nombres desconocidos y claves no string, sin ejecutar el módulo.
+- Validación: Rango_Min > Rango_Max, rangos no numéricos y tipo inválido.
+- Comentarios '# ID:': enlazan con la clave siguiente aunque haya líneas en
+  medio; un ID no numérico ("CALCULADO. NO APLICA") o al final se ignora.
+- stale_sources / catalog(): detectan un módulo editado, añadido o borrado y
+  recompilan el artefacto.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from src import rangos_catalog
+from src.rangos_catalog import (
+    RangosCatalogError, build, catalog, compile_source, stale_sources,
+)
+
+LIMPIO = """# Rangos de prueba
+VARIABLES_PETROLERAS = {
+    # ID: 101
+    "presion_cabeza": {
+        "descripcion": "Presión en cabeza",
+        "unidad": "psi",
+        "tipo": float,
+        "Rango_Min": 0,
+        "Rango_Max": 5000.0,
+        "ejemplo": 150.5,
+    },
+    # ID:102  (comentario libre)
+    # nota sin ID
+
+    "velocidad_bomba": {"tipo": int, "Rango_Min": -1e1, "Rango_Max": 12, "ejemplo": [1, 2]},
+    # ID: CALCULADO. NO APLICA
+    "estado": {"tipo": str, "Rango_Min": None, "Rango_Max": None},
+    # id: 104
+    "temperatura": {"tipo": float, "unidad": "°F"},
+}
+# ID: 999
+"""
+
+
+class _Modulos(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+        self.dir = self._dir.name
+
+    def modulo(self, nombre: str, contenido: str) -> str:
+        path = os.path.join(self.dir, f"{nombre}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        return path
+
+    def entrada(self, cuerpo: str) -> str:
+        return self.modulo("Rangos_x", "VARIABLES_PETROLERAS = {\n    \"v\": " + cuerpo + ",\n}\n")
+
+
+class TestCompileSource(_Modulos):
+
+    def test_literales_y_tipos(self):
+        data = compile_source(self.modulo("Rangos_limpio", LIMPIO))
+        self.assertEqual(data["archivo"], "Rangos_limpio.py")
+        self.assertEqual(len(data["sha256"]), 64)
+        presion = data["variables"]["presion_cabeza"]
+        self.assertEqual(presion["tipo"], "float")
+        self.assertEqual((presion["Rango_Min"], presion["Rango_Max"]), (0, 5000.0))
+        self.assertEqual(data["variables"]["velocidad_bomba"]["Rango_Min"], -10.0)
+        self.assertEqual(data["variables"]["velocidad_bomba"]["ejemplo"], [1, 2])
+        json.dumps(data)
+
+    def test_no_literal(self):
+        casos = {
+            "llamada": '{"tipo": float, "Rango_Max": max(1, 2)}',
+            "atributo": '{"tipo": float, "Rango_Max": math.pi}',
+            "nombre": '{"tipo": Decimal}',
+            "comprensión": '{"ejemplo": [i for i in range(3)]}',
+        }
+        for nombre, cuerpo in casos.items():
+            with self.subTest(nombre):
+                with self.assertRaises(RangosCatalogError):
+                    compile_source(self.entrada(cuerpo))
+
+    def test_no_ejecuta_el_modulo(self):
+        marca = os.path.join(self.dir, "ejecutado")
+        path = self.modulo("Rangos_x", f"open({marca!r}, 'w').close()\n"
+                                       "VARIABLES_PETROLERAS = {\"v\": {\"tipo\": int}}\n")
+        self.assertEqual(compile_source(path)["variables"], {"v": {"tipo": "int"}})
+        self.assertFalse(os.path.exists(marca))
+
+    def test_estructura_invalida(self):
+        casos = {
+            "sin variable": "OTRA = {}\n",
+            "no dict": "VARIABLES_PETROLERAS = dict(a=1)\n",
+            "clave no string": "VARIABLES_PETROLERAS = {1: {}}\n",
+            "sintaxis": "VARIABLES_PETROLERAS = {\n",
+        }
+        for nombre, contenido in casos.items():
+            with self.subTest(nombre):
+                with self.assertRaises(RangosCatalogError):
+                    compile_source(self.modulo("Rangos_x", contenido))
+
+
+class TestValidacion(_Modulos):
+
+    def test_min_mayor_que_max(self):
+        with self.assertRaisesRegex(RangosCatalogError, "Rango_Min 10 > Rango_Max 5"):
+            compile_source(self.entrada('{"Rango_Min": 10, "Rango_Max": 5}'))
+
+    def test_min_igual_a_max(self):
+        path = self.entrada('{"Rango_Min": 5, "Rango_Max": 5.0}')
+        self.assertEqual(compile_source(path)["variables"]["v"]["Rango_Max"], 5.0)
+
+    def test_invalidos(self):
+        casos = {
+            "rango string": '{"Rango_Min": "0", "Rango_Max": 5}',
+            "rango bool": '{"Rango_Min": True}',
+            "tipo": '{"tipo": "decimal"}',
+            "descripcion": '{"descripcion": 3}',
+            "entrada no dict": '[1, 2]',
+        }
+        for nombre, cuerpo in casos.items():
+            with self.subTest(nombre):
+                with self.assertRaises(RangosCatalogError):
+                    compile_source(self.entrada(cuerpo))
+
+
+class TestIds(_Modulos):
+
+    def test_enlaces(self):
+        data = compile_source(self.modulo("Rangos_limpio", LIMPIO))
+        self.assertEqual(data["ids"], [
+            [101, "presion_cabeza"],
+            [102, "velocidad_bomba"],
+            [104, "temperatura"],
+        ])
+
+    def test_clave_repetida(self):
+        path = self.modulo("Rangos_x", (
+            "VARIABLES_PETROLERAS = {\n"
+            "    # ID: 1\n    \"v\": {\"Rango_Max\": 1},\n"
+            "    # ID: 2\n    \"v\": {\"Rango_Max\": 2},\n}\n"
+        ))
+        data = compile_source(path)
+        self.assertEqual(data["variables"], {"v": {"Rango_Max": 2}})
+        self.assertEqual(data["ids"], [[1, "v"], [2, "v"]])
+
+
+class TestStale(_Modulos):
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.modulo("Rangos_limpio", LIMPIO)
+        self.out = os.path.join(self.dir, "rangos_catalog.json")
+        self.addCleanup(rangos_catalog._cache.clear)
+
+    def test_modulo_editado(self):
+        data = build(self.dir, self.out)
+        self.assertEqual(stale_sources(data, self.dir), [])
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("# editado\n")
+        self.assertEqual(stale_sources(data, self.dir), ["Rangos_limpio"])
+
+    def test_modulo_anadido_y_borrado(self):
+        data = build(self.dir, self.out)
+        nuevo = self.modulo("Rangos_nuevo", "VARIABLES_PETROLERAS = {}\n")
+        self.assertEqual(stale_sources(data, self.dir), ["Rangos_nuevo"])
+        os.remove(nuevo)
+        os.remove(self.path)
+        self.assertEqual(stale_sources(data, self.dir), ["Rangos_limpio"])
+
+    def test_catalog_recompila(self):
+        build(self.dir, self.out)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(LIMPIO.replace('"Rango_Max": 12', '"Rango_Max": 99'))
+        limpio = catalog(self.out, self.dir).source("Rangos_limpio.py")
+        self.assertEqual(limpio.variables["velocidad_bomba"]["Rango_Max"], 99)
+        self.assertEqual(limpio.by_id()[101], "presion_cabeza")
+        with open(self.out, "r", encoding="utf-8") as f:
+            self.assertEqual(stale_sources(json.load(f), self.dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Pruebas de src/sql_dump_stream.py (sin base de datos).
+
+- Tokenizer: comas y paréntesis dentro de strings, escapes '', comentarios,
+  NULL y números negativos / con exponente.
+- Lotes: sentencias multi-fila, varias tablas destino, corte por batch_rows
+  y tuplas partidas entre bloques de lectura (el resultado no depende del
+  tamaño del bloque).
+- Cartas REAL[]: '[a,b,...]' → '{a,b,...}'; vacías o mal formadas → NULL.
+- Errores: lo que no es INSERT ... VALUES con literales → DumpParseError.
+
+Uso:
+  python -m unittest discover -s tests -t .
+"""
+
+import os
+import tempfile
+import unittest
+
+from src.sql_dump_stream import DumpParseError, iter_insert_batches, iter_tokens
+
+DUMP = """-- Exportado por DBeaver; it's a comment
+INSERT INTO stage.landing_scada_data (idn,unit_id,measure,moddate) VALUES
+\t (1,5,'a,(b)','2026-01-01 00:00:00'),
+\t (2,5,'O''Brien','2026-01-01 00:01:00'),
+\t (3,NULL,'','2026-01-01 00:02:00');
+INSERT INTO stage.landing_scada_data (idn,unit_id,measure,moddate) VALUES
+\t (4,-7,'say "hi"',NULL);
+INSERT INTO stage.tbl_pozo_maestra (well_id,profundidad) VALUES
+\t (10,-1.5e3),
+\t (11,2.5E+10);
+INSERT INTO stage.landing_scada_data (idn,unit_id,measure,moddate) VALUES
+\t (5,6,'x',null);
+"""
+
+
+class _Dump(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def write(self, content: str) -> str:
+        path = os.path.join(self._dir.name, "dump.sql")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def batches(self, content: str, **kwargs) -> list:
+        return list(iter_insert_batches(self.write(content), **kwargs))
+
+
+class TestTokens(unittest.TestCase):
+
+    def test_strings_y_comentarios(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.sql")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("-- it's\n('a,(b)', 'x''y', -1e-3);")
+            tokens = [(k, t) for k, t, _ in iter_tokens(path)]
+        self.assertEqual(tokens, [
+            ("punct", "("), ("string", "'a,(b)'"), ("punct", ","),
+            ("string", "'x''y'"), ("punct", ","), ("bare", "-1e-3"),
+            ("punct", ")"), ("punct", ";"),
+        ])
+
+
+class TestLotes(_Dump):
+
+    def test_valores(self):
+        (_, _, lines), *_ = self.batches(DUMP)
+        self.assertEqual(lines, [
+            '1,5,"a,(b)","2026-01-01 00:00:00"',
+            "2,5,\"O'Brien\",\"2026-01-01 00:01:00\"",
+            '3,,"","2026-01-01 00:02:00"',
+            '4,-7,"say ""hi""",',
+        ])
+
+    def test_multi_fila_y_varias_tablas(self):
+        resumen = [(t, c, len(lines)) for t, c, lines in self.batches(DUMP)]
+        landing = ("idn", "unit_id", "measure", "moddate")
+        self.assertEqual(resumen, [
+            ("stage.landing_scada_data", landing, 4),
+            ("stage.tbl_pozo_maestra", ("well_id", "profundidad"), 2),
+            ("stage.landing_scada_data", landing, 1),
+        ])
+        self.assertEqual(self.batches(DUMP)[1][2], ["10,-1.5e3", "11,2.5E+10"])
+
+    def test_batch_rows(self):
+        tamanos = [len(lines) for _, _, lines in self.batches(DUMP, batch_rows=3)]
+        self.assertEqual(tamanos, [3, 1, 2, 1])
+
+    def test_tuplas_partidas_entre_bloques(self):
+        esperado = self.batches(DUMP)
+        for block in (1, 2, 3, 7, 16, 61):
+            with self.subTest(block=block):
+                self.assertEqual(self.batches(DUMP, block=block), esperado)
+
+    def test_cartas(self):
+        dump = ("INSERT INTO stage.tbl_pozo_produccion (well_id,surface_rod_load) VALUES "
+                "(1,'[1, 2.5,-3e-1]'),(2,''),(3,'[1,,2]'),(4,NULL);")
+        (_, _, lines), = self.batches(dump, array_columns=lambda table: {"surface_rod_load"})
+        self.assertEqual(lines, ['1,"{1, 2.5,-3e-1}"', "2,", "3,", "4,"])
+
+
+class TestErrores(_Dump):
+
+    def test_rechaza(self):
+        casos = {
+            "otra sentencia": "UPDATE t SET a = 1;",
+            "on conflict": "INSERT INTO t (a) VALUES (1) ON CONFLICT DO NOTHING;",
+            "función": "INSERT INTO t (a) VALUES (now());",
+            "columnas": "INSERT INTO t (a,b) VALUES (1);",
+            "sin columnas": "INSERT INTO t VALUES (1);",
+            "truncado": "INSERT INTO t (a) VALUES (1),",
+            "string abierto": "INSERT INTO t (a) VALUES ('abc",
+        }
+        for nombre, dump in casos.items():
+            with self.subTest(nombre):
+                with self.assertRaises(DumpParseError):
+                    self.batches(dump)
+
+
+if __name__ == "__main__":
+    unittest.main()
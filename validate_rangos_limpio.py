@@ -1,25 +1,25 @@
-import importlib.util
 import sys
 from pathlib import Path
 
+from src.rangos_catalog import RangosCatalogError, compile_source
+
 path = Path('inputs_referencial') / 'Rangos_validacion_variables_petroleras_limpio.py'
 if not path.exists():
     print('MISSING', path)
     sys.exit(2)
 
-spec = importlib.util.spec_from_file_location('rango_mod', str(path))
-mod = importlib.util.module_from_spec(spec)
+# Parseo AST + validación del catálogo (src/rangos_catalog.py); el módulo no se ejecuta
 try:
-    spec.loader.exec_module(mod)
-except Exception as e:
+    compiled = compile_source(str(path))
+except RangosCatalogError as e:
     print('IMPORT_ERROR', e)
     raise
 
-if not hasattr(mod, 'VARIABLES_PETROLERAS'):
+vars_dict = compiled['variables']
+if not vars_dict:
     print('MISSING_VARIABLES_PETROLERAS')
     sys.exit(3)
 
-vars_dict = mod.VARIABLES_PETROLERAS
 print('VARIABLES_COUNT', len(vars_dict))
 
 missing_ranges = []